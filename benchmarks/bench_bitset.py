@@ -0,0 +1,59 @@
+# Benchmark of the bitset engine against mlxtend's apriori on the groceries dataset.
+# Run from the project root:  python -m benchmarks.bench_bitset
+import argparse
+import time
+
+import pandas as pd
+from mlxtend.frequent_patterns import apriori
+
+from utils.bitsetMiner import bitset_apriori
+from utils.dataLoader import DATASET_PATH, load_clean_data
+from utils.encoder import encode_baskets
+
+SUPPORT_LEVELS = [0.1, 0.05, 0.02, 0.01, 0.005]
+
+
+def best_time(func, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_result(expected, actual):
+    expected = dict(zip(expected["itemsets"], expected["support"]))
+    actual = dict(zip(actual["itemsets"], actual["support"]))
+    return expected == actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bitset engine vs mlxtend apriori")
+    parser.add_argument("--csv", default=DATASET_PATH)
+    parser.add_argument("--supports", type=float, nargs="+", default=SUPPORT_LEVELS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = load_clean_data(args.csv)
+    rows = []
+    for grouping in ["member", "transaction"]:
+        one_hot, _, _ = encode_baskets(data, grouping)
+        dense = one_hot.sparse.to_dense()
+        for min_support in args.supports:
+            mlxtend_time, expected = best_time(lambda: apriori(dense, min_support=min_support, use_colnames=True), args.repeat)
+            bitset_time, actual = best_time(lambda: bitset_apriori(one_hot, min_support=min_support, use_colnames=True), args.repeat)
+            rows.append({
+                "grouping": grouping,
+                "min_support": min_support,
+                "itemsets": len(expected),
+                "mlxtend_s": round(mlxtend_time, 4),
+                "bitset_s": round(bitset_time, 4),
+                "speedup": round(mlxtend_time / bitset_time, 1),
+                "identical": same_result(expected, actual),
+            })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
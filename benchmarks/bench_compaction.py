@@ -0,0 +1,64 @@
+# How much smaller closed / maximal itemsets and pruned rules make the outputs, and what
+# each step costs, at falling support levels on the member baskets. Sizes are the frames
+# in memory and their CSV downloads. Run from the project root:
+#   python -m benchmarks.bench_compaction --supports 0.02 0.01 0.005
+import argparse
+import time
+
+import pandas as pd
+
+from utils.compaction import compact_itemsets, prune_redundant_rules
+from utils.dataLoader import load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.mining import generate_rules, mine_frequent_itemsets
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def sizes(frame):
+    return len(frame), frame.memory_usage(index=True, deep=True).sum() / 2**20, len(frame.to_csv(index=False)) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Itemset compaction and redundant-rule pruning")
+    parser.add_argument("--supports", type=float, nargs="+", default=[0.02, 0.01, 0.005])
+    parser.add_argument("--confidence", type=float, default=0.05)
+    parser.add_argument("--grouping", default="member", choices=["member", "transaction"])
+    args = parser.parse_args()
+
+    matrix, items, _ = load_basket_matrix(grouping=args.grouping)
+    one_hot = to_one_hot(matrix, items)
+    rows = []
+    for min_support in args.supports:
+        mine_seconds, frequent_itemsets = timed(lambda: mine_frequent_itemsets(one_hot, min_support, engine="bitset"))
+        rules_seconds, rules = timed(lambda: generate_rules(frequent_itemsets, args.confidence, one_hot))
+        steps = [("frequent itemsets", mine_seconds, frequent_itemsets), ("association rules", rules_seconds, rules)]
+        for mode in ("closed", "maximal"):
+            seconds, compacted = timed(lambda: compact_itemsets(frequent_itemsets, mode))
+            steps.append((f"{mode} itemsets", seconds, compacted))
+        seconds, pruned = timed(lambda: prune_redundant_rules(rules))
+        steps.append(("pruned rules", seconds, pruned))
+
+        base = {"itemsets": sizes(frequent_itemsets), "rules": sizes(rules)}
+        for step, seconds, frame in steps:
+            count, memory_mb, csv_mb = sizes(frame)
+            full = base["rules"] if "rules" in step else base["itemsets"]
+            rows.append({
+                "min_support": min_support,
+                "step": step,
+                "seconds": seconds,
+                "rows": count,
+                "memory_mb": memory_mb,
+                "csv_mb": csv_mb,
+                "rows_kept": count / full[0] if full[0] else 1.0,
+            })
+    pd.set_option("display.width", 200)
+    print(pd.DataFrame(rows).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
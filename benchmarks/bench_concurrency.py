@@ -0,0 +1,85 @@
+# Load test of the shared result cache: N sessions open a mining page at the same time
+# with the same sliders, each running the page's cached_itemsets + cached_rules calls
+# on its own thread (as Streamlit runs each session's script). With single-flight
+# sharing one session mines and the rest wait for its result; "duplicate" is the cache
+# without it, where every session that misses mines on its own. Each round uses a fresh
+# key so it starts cold. Run from the project root:
+#   python -m benchmarks.bench_concurrency --sessions 8 --rounds 3
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.dataLoader import load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.resultCache import MiningCache, cached_itemsets, cached_rules, mining_key
+
+
+class DuplicateCache(MiningCache):
+    # The cache as it was before single-flight: concurrent misses all compute
+    def in_flight(self, flight, compute, *args):
+        return compute(*args)
+
+
+def run_round(cache, key, one_hot, args):
+    latencies = [None] * args.sessions
+    barrier = threading.Barrier(args.sessions)
+
+    def session(i):
+        barrier.wait()
+        time.sleep(i * args.stagger)
+        start = time.perf_counter()
+        frequent_itemsets = cached_itemsets(key, one_hot, args.support, engine=args.engine, cache=cache)
+        cached_rules(key, frequent_itemsets, one_hot, args.support, args.confidence, cache=cache)
+        latencies[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent identical mining requests")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--stagger", type=float, default=0.0, help="seconds between session arrivals")
+    parser.add_argument("--grouping", default="member", choices=["member", "transaction"])
+    parser.add_argument("--support", type=float, default=0.01)
+    parser.add_argument("--confidence", type=float, default=0.1)
+    parser.add_argument("--engine", default="apriori")
+    args = parser.parse_args()
+
+    matrix, items, _ = load_basket_matrix(grouping=args.grouping)
+    one_hot = to_one_hot(matrix, items)
+
+    rows = []
+    for mode, cache_class in [("duplicate", DuplicateCache), ("single-flight", MiningCache)]:
+        cache = cache_class()
+        wall, latencies = 0.0, []
+        for round_number in range(args.rounds):
+            # A fingerprint no artifact matches, so every round mines
+            key = mining_key(f"bench-{mode}-{round_number}", args.grouping, args.engine)
+            seconds, round_latencies = run_round(cache, key, one_hot, args)
+            wall += seconds
+            latencies.extend(round_latencies)
+        rows.append({
+            "mode": mode,
+            "sessions": args.sessions,
+            "computed": cache.misses,
+            "shared": cache.shared,
+            "requests_per_s": round(len(latencies) / wall, 2),
+            "p50_s": round(float(np.percentile(latencies, 50)), 3),
+            "p95_s": round(float(np.percentile(latencies, 95)), 3),
+            "cache_mb": round(cache.bytes / 2**20, 1),
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Sales chart aggregations straight from the cleaned rows (what the page used to do on
+# every rerun) against the pre-aggregated sales cube, on a synthetic dataset. Run from
+# the project root:
+#   python -m benchmarks.bench_cube --members 50 --dates 4
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic
+from utils.dataLoader import clean_data
+from utils.salesCube import SalesCube, cube_from_frame
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def groupby_charts(data, start, end, item):
+    # The four chart aggregations plus the same drill-downs done on the rows
+    rows = data[(data["Date"] >= start) & (data["Date"] <= end)]
+    rows.groupby(rows["Date"].dt.to_period("M"))["itemDescription"].count()
+    rows.groupby("Member_number")["itemDescription"].count()
+    rows.groupby("Date")["Member_number"].nunique()
+    rows.groupby("Date")["itemDescription"].count()
+    picked = rows[rows["itemDescription"] == item]
+    picked.groupby(picked["Date"].dt.to_period("W")).size()
+
+
+def cube_charts(cube, start, end, item):
+    cube.totals("month", start, end)
+    cube.items_per_customer(start, end)
+    cube.totals("day", start, end)
+    cube.item_series(item, "week", start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales cube query latency")
+    parser.add_argument("--members", type=float, default=50, help="member count multiplier")
+    parser.add_argument("--dates", type=float, default=4, help="date range multiplier")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = write_synthetic(members_scale=args.members, dates_scale=args.dates)
+    data = clean_data(pd.read_csv(path))
+    print(f"{len(data):,} rows, {data['Date'].nunique():,} days, {data['Member_number'].nunique():,} members")
+
+    start = time.perf_counter()
+    cube = SalesCube(cube_from_frame(data))
+    print(f"cube build: {time.perf_counter() - start:.2f} s, {sum(len(t) for t in cube.tables.values()):,} rows in total")
+
+    item = data["itemDescription"].value_counts().index[0]
+    days = np.sort(data["Date"].dropna().unique())
+    ranges = {"all": (days[0], days[-1]), "middle half": (days[len(days) // 4], days[3 * len(days) // 4])}
+    for name, (first, last) in ranges.items():
+        rows = best_of(lambda: groupby_charts(data, first, last, item), args.repeat)
+        cubed = best_of(lambda: cube_charts(cube, first, last, item), args.repeat)
+        print(f"{name:>12}: groupby {rows * 1e3:8.1f} ms   cube {cubed * 1e3:7.2f} ms   {rows / cubed:6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Daily refresh cost of the incremental (FUP) miner against mining the grown file from
+# scratch. A synthetic dataset is sorted by date; everything but the last few days is
+# written as the starting CSV, then one day at a time is appended and both ways of
+# mining are timed and checked to agree. Run from the project root:
+#   python -m benchmarks.bench_incremental --members 20 --days 5
+import argparse
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic
+from utils.dataLoader import DATE_FORMAT, clean_data
+from utils.encoder import build_basket_matrix, to_one_hot
+from utils.incrementalMiner import refresh
+from utils.mining import mine_frequent_itemsets
+
+
+def full_mine(path, grouping, min_support):
+    data = clean_data(pd.read_csv(path))
+    matrix, items, _ = build_basket_matrix(data, grouping)
+    return mine_frequent_itemsets(to_one_hot(matrix, items), min_support, engine="bitset")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental vs full mining per appended day")
+    parser.add_argument("--members", type=float, default=20, help="member count multiplier")
+    parser.add_argument("--days", type=int, default=5, help="days appended one at a time")
+    parser.add_argument("--grouping", default="transaction", choices=["transaction", "member"])
+    parser.add_argument("--support", type=float, default=0.001)
+    parser.add_argument("--folder", default="assets/cache/bench/incremental")
+    args = parser.parse_args()
+
+    raw = pd.read_csv(write_synthetic(members_scale=args.members))
+    day = pd.to_datetime(raw["Date"], format=DATE_FORMAT)
+    raw = raw.assign(day=day).sort_values("day", kind="stable")
+    last_days = sorted(raw["day"].unique())[-args.days:]
+
+    shutil.rmtree(args.folder, ignore_errors=True)
+    os.makedirs(args.folder)
+    path = os.path.join(args.folder, "groceries.csv")
+    state = os.path.join(args.folder, "state")
+    raw[raw["day"] < last_days[0]].drop(columns="day").to_csv(path, index=False)
+
+    start = time.perf_counter()
+    miner = refresh(path, args.grouping, args.support, root=state)
+    print(f"initial: {len(raw):,} rows in the full file, {miner.n_baskets:,} baskets, first run {time.perf_counter() - start:.2f} s")
+
+    for when in last_days:
+        rows = raw[raw["day"] == when].drop(columns="day")
+        rows.to_csv(path, mode="a", header=False, index=False)
+
+        start = time.perf_counter()
+        miner = refresh(path, args.grouping, args.support, root=state)
+        incremental = time.perf_counter() - start
+        itemsets = miner.frequent_itemsets()
+
+        start = time.perf_counter()
+        expected = full_mine(path, args.grouping, args.support)
+        full = time.perf_counter() - start
+
+        same = itemsets[["itemsets", "support"]].equals(expected[["itemsets", "support"]])
+        update = miner.last_update
+        print(
+            f"{pd.Timestamp(when):%Y-%m-%d}: {len(rows):>6,} rows  incremental {incremental:6.2f} s  full {full:6.2f} s  "
+            f"{full / incremental:5.1f}x  rescanned {update['rescanned']:,}  same={same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Memory / throughput comparison of the regular loader against the streaming loader.
+# Each loader runs in its own process so peak RSS is measured independently.
+# Run from the project root:  python -m benchmarks.bench_ingest --scale 1 20 100
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.scaled import scaled_path, write_scaled_copy
+
+MODES = ["regular", "stream-pandas", "stream-pyarrow"]
+
+
+def run_mode(mode, csv_path):
+    from utils.dataLoader import clean_data
+    from utils.encoder import build_basket_matrix
+    from utils.streamLoader import stream_baskets
+
+    start = time.perf_counter()
+    if mode == "regular":
+        data = clean_data(pd.read_csv(csv_path))
+        matrices = [build_basket_matrix(data, grouping)[0] for grouping in ["member", "transaction"]]
+    else:
+        baskets = stream_baskets(csv_path, engine=mode.split("-", 1)[1])
+        matrices = [baskets.basket_matrix(grouping)[0] for grouping in ["member", "transaction"]]
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "baskets": [m.shape[0] for m in matrices],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regular vs streaming CSV ingestion")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 20, 100])
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_mode(args.run, args.csv)))
+        return
+
+    rows = []
+    for factor in args.scale:
+        csv_path = write_scaled_copy(factor, scaled_path(factor))
+        n_rows = 38765 * factor
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_ingest", "--run", mode, "--csv", csv_path],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows.append({
+                "scale": factor,
+                "file_mb": round(os.path.getsize(csv_path) / 2**20, 1),
+                "mode": mode,
+                "seconds": round(result["seconds"], 2),
+                "rows_per_s": int(n_rows / result["seconds"]),
+                "peak_rss_mb": round(result["peak_rss_mb"], 1),
+            })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Pair rules from the co-occurrence matrix against apriori (max_len=2) plus
+# association_rules, at several support levels. The matrix is built once; each support
+# level after that is only a mask over its arrays. Run from the project root:
+#   python -m benchmarks.bench_pairs --scale 1 10 --supports 0.01 0.005 0.001
+import argparse
+import time
+
+import pandas as pd
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from benchmarks.scaled import scaled_path, write_scaled_copy
+from utils.dataLoader import load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.pairMatrix import PairMatrix
+from utils.streamLoader import stream_baskets
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Co-occurrence pair rules against apriori")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--supports", type=float, nargs="+", default=[0.01, 0.005, 0.001])
+    parser.add_argument("--grouping", default="member", choices=["member", "transaction"])
+    args = parser.parse_args()
+
+    rows = []
+    for factor in args.scale:
+        if factor == 1:
+            matrix, items, _ = load_basket_matrix(grouping=args.grouping)
+        else:
+            matrix, items, _ = stream_baskets(write_scaled_copy(factor, scaled_path(factor))).basket_matrix(args.grouping)
+        one_hot = to_one_hot(matrix, items)
+        build_seconds, pairs = timed(lambda: PairMatrix(matrix, items))
+        for min_support in args.supports:
+            def mine():
+                frequent_itemsets = apriori(one_hot, min_support=min_support, use_colnames=True, max_len=2)
+                return association_rules(frequent_itemsets, metric="confidence", min_threshold=0.0, num_itemsets=len(one_hot))
+
+            apriori_seconds, rules = timed(mine)
+            query_seconds, pair_rules = timed(lambda: pairs.pairs(min_support))
+            rows.append({
+                "scale": factor,
+                "baskets": matrix.shape[0],
+                "min_support": min_support,
+                "apriori_s": apriori_seconds,
+                "matrix_build_s": build_seconds,
+                "pair_query_s": query_seconds,
+                "speedup": apriori_seconds / query_seconds,
+                "apriori_rules": len(rules),
+                "pair_rules": len(pair_rules),
+            })
+    print(pd.DataFrame(rows).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
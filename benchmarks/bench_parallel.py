@@ -0,0 +1,58 @@
+# Speedup of partitioned (SON) mining over single-core mining on scaled-up copies of
+# the groceries data. Run from the project root:
+#   python -m benchmarks.bench_parallel --scale 10 50 --workers 1 2 4 8 16
+# (mlxtend gets slow past ~10x; add --skip-mlxtend for the larger copies)
+import argparse
+import os
+import time
+
+import pandas as pd
+from mlxtend.frequent_patterns import apriori
+
+from benchmarks.scaled import scaled_path, write_scaled_copy
+from utils.bitsetMiner import bitset_apriori
+from utils.encoder import to_one_hot
+from utils.parallelMiner import son_apriori
+from utils.streamLoader import stream_baskets
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SON multi-core mining speedup")
+    parser.add_argument("--scale", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--supports", type=float, nargs="+", default=[0.01, 0.005])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--grouping", default="member", choices=["member", "transaction"])
+    parser.add_argument("--skip-mlxtend", action="store_true")
+    args = parser.parse_args()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    rows = []
+    for factor in args.scale:
+        matrix, items, _ = stream_baskets(write_scaled_copy(factor, scaled_path(factor))).basket_matrix(args.grouping)
+        one_hot = to_one_hot(matrix, items)
+        for min_support in args.supports:
+            baseline = {}
+            if not args.skip_mlxtend:
+                baseline["mlxtend apriori"], _ = timed(lambda: apriori(one_hot, min_support=min_support, use_colnames=True))
+            baseline["bitset (1 core)"], expected = timed(lambda: bitset_apriori(one_hot, min_support=min_support, use_colnames=True))
+            for name, seconds in baseline.items():
+                rows.append({"scale": factor, "baskets": matrix.shape[0], "min_support": min_support,
+                             "engine": name, "seconds": round(seconds, 3), "speedup_vs_bitset": 1.0 if name.startswith("bitset") else None})
+            for workers in args.workers:
+                son_apriori(one_hot, min_support=min_support, use_colnames=True, workers=workers)  # warm the pool
+                seconds, result = timed(lambda: son_apriori(one_hot, min_support=min_support, use_colnames=True, workers=workers))
+                assert result["itemsets"].tolist() == expected["itemsets"].tolist()
+                rows.append({"scale": factor, "baskets": matrix.shape[0], "min_support": min_support,
+                             "engine": f"son ({workers} workers)", "seconds": round(seconds, 3),
+                             "speedup_vs_bitset": round(baseline["bitset (1 core)"] / seconds, 2)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# Stage-by-stage and end-to-end benchmark of the page pipeline
+#   load -> clean -> group/encode -> one-hot -> mine -> rules -> plot
+# on the real dataset and on synthetic copies scaled 10x-1000x. Wall time and peak
+# memory of every stage are written to JSON so runs on two commits can be compared.
+# Run from the project root:
+#   python -m benchmarks.bench_pipeline --scale 10 100
+#   python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline-<old>.json
+# Peak memory is the traced Python / NumPy heap high-water mark (tracemalloc) of each
+# stage, measured in a separate run from the timing so tracing does not skew the times.
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly.io
+
+from benchmarks.synthetic import write_synthetic
+from utils.charts import rule_scatter
+from utils.dataLoader import DATASET_PATH, clean_data
+from utils.encoder import build_basket_matrix, to_one_hot
+from utils.mining import ENGINES, generate_rules, mine_frequent_itemsets
+
+RESULTS_DIR = "benchmarks/results"
+
+STAGES = ["load", "clean", "group_encode", "one_hot", "mine", "rules", "plot"]
+
+
+def plot_rules(rules):
+    # The confidence vs lift chart of dataPage.py, serialized the way st.plotly_chart does
+    return plotly.io.to_json(rule_scatter(rules, title="Confidence vs Lift for Association Rules"), validate=False)
+
+
+def stage_functions(csv_path, grouping, min_support, min_confidence, engine):
+    # Each stage takes the previous stage's output
+    return {
+        "load": lambda _: pd.read_csv(csv_path),
+        "clean": clean_data,
+        "group_encode": lambda data: build_basket_matrix(data, grouping),
+        "one_hot": lambda encoded: to_one_hot(encoded[0], encoded[1]),
+        "mine": lambda one_hot: (one_hot, mine_frequent_itemsets(one_hot, min_support, engine=engine)),
+        "rules": lambda mined: generate_rules(mined[1], min_confidence, mined[0]),
+        "plot": plot_rules,
+    }
+
+
+def measure(func, value, repeat):
+    # Best wall time over `repeat` runs, then one traced run for the peak
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(value)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(value)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}, result
+
+
+def run_dataset(name, csv_path, args):
+    functions = stage_functions(csv_path, args.grouping, args.support, args.confidence, args.engine)
+    stages, value = {}, None
+    for stage in STAGES:
+        if stage == "plot" and args.skip_plot:
+            continue
+        stages[stage], value = measure(functions[stage], value, args.repeat)
+        if stage == "rules":
+            n_rules = len(value)
+
+    def end_to_end(_):
+        value = None
+        for stage in STAGES:
+            if not (stage == "plot" and args.skip_plot):
+                value = functions[stage](value)
+        return value
+
+    total, _ = measure(end_to_end, None, 1)
+    return {
+        "name": name,
+        "csv": csv_path,
+        "csv_bytes": os.path.getsize(csv_path),
+        "rules": int(n_rules),
+        "stages": stages,
+        "end_to_end": total,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old, new, threshold):
+    # Per-stage time ratio new / old for datasets present in both runs
+    previous = {d["name"]: d for d in old["datasets"]}
+    rows = []
+    for dataset in new["datasets"]:
+        before = previous.get(dataset["name"])
+        if before is None:
+            continue
+        for stage, after in list(dataset["stages"].items()) + [("end_to_end", dataset["end_to_end"])]:
+            base = before["stages"].get(stage) if stage != "end_to_end" else before["end_to_end"]
+            if base is None:
+                continue
+            ratio = after["seconds"] / base["seconds"] if base["seconds"] else np.nan
+            rows.append({
+                "dataset": dataset["name"],
+                "stage": stage,
+                "old_s": base["seconds"],
+                "new_s": after["seconds"],
+                "ratio": ratio,
+                "peak_ratio": after["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else np.nan,
+                "regression": ratio > 1 + threshold,
+            })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline stage benchmark")
+    parser.add_argument("--scale", type=float, nargs="*", default=[10, 100], help="synthetic member multipliers")
+    parser.add_argument("--dates", type=float, default=1, help="synthetic date range multiplier")
+    parser.add_argument("--items", type=float, default=1, help="synthetic item vocabulary multiplier")
+    parser.add_argument("--basket", type=float, default=1, help="synthetic basket size multiplier")
+    parser.add_argument("--skip-real", action="store_true")
+    parser.add_argument("--grouping", default="member", choices=["member", "transaction"])
+    parser.add_argument("--support", type=float, default=0.01)
+    parser.add_argument("--confidence", type=float, default=0.1)
+    parser.add_argument("--engine", default="apriori", choices=list(ENGINES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-plot", action="store_true", help="skip the rule scatter")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as a regression")
+    args = parser.parse_args()
+
+    datasets = [] if args.skip_real else [("real", DATASET_PATH)]
+    for factor in args.scale:
+        path = write_synthetic(members_scale=factor, dates_scale=args.dates, items_scale=args.items, basket_scale=args.basket)
+        datasets.append((f"synthetic_m{factor:g}_d{args.dates:g}_i{args.items:g}_b{args.basket:g}", path))
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+        "config": {k: getattr(args, k) for k in ["grouping", "support", "confidence", "engine", "repeat", "skip_plot"]},
+        "datasets": [],
+    }
+    for name, path in datasets:
+        result = run_dataset(name, path, args)
+        results["datasets"].append(result)
+        times = ", ".join(f"{stage} {m['seconds']:.3f}s/{m['peak_bytes'] / 2**20:.0f}MiB" for stage, m in result["stages"].items())
+        print(f"{name}: {times}; end to end {result['end_to_end']['seconds']:.2f}s")
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if baseline.get("config") != results["config"]:
+            print(f"note: {args.compare} was run with {baseline.get('config')}")
+        table = compare(baseline, results, args.threshold)
+        print(table.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
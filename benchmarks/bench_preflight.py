@@ -0,0 +1,54 @@
+# How close the pre-flight estimates are: predicted candidates and frequent itemsets per
+# level against what the bitset engine finds, and predicted memory against the peak
+# tracemalloc sees while each engine runs. Run from the project root:
+#   python -m benchmarks.bench_preflight --engines apriori bitset fpgrowth
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from utils.bitsetMiner import bitset_apriori
+from utils.dataLoader import load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.mining import ENGINES
+from utils.preflight import estimate_levels, estimate_memory
+
+SUPPORTS = {"member": [0.05, 0.02, 0.01], "transaction": [0.005, 0.001]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-flight estimates against actual runs")
+    parser.add_argument("--engines", nargs="+", default=["apriori", "bitset", "fpgrowth"], choices=list(ENGINES))
+    args = parser.parse_args()
+
+    rows = []
+    for grouping, supports in SUPPORTS.items():
+        matrix, items, _ = load_basket_matrix(grouping=grouping)
+        one_hot = to_one_hot(matrix, items)
+        for min_support in supports:
+            start = time.perf_counter()
+            levels = estimate_levels(one_hot, min_support)
+            estimate_ms = (time.perf_counter() - start) * 1e3
+            actual = bitset_apriori(one_hot, min_support)["itemsets"].map(len).value_counts().to_dict()
+            print(f"{grouping} @ {min_support}: estimated in {estimate_ms:.0f} ms")
+            for level in levels:
+                print(f"  size {level['size']}: {level['candidates']:>8,} candidates  "
+                      f"{level['frequent']:>7,} frequent predicted  {actual.get(level['size'], 0):>7,} found")
+            for engine in args.engines:
+                tracemalloc.start()
+                ENGINES[engine](one_hot, min_support=min_support, use_colnames=True)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                rows.append({
+                    "grouping": grouping,
+                    "support": min_support,
+                    "engine": engine,
+                    "predicted_mb": round(estimate_memory(one_hot, levels, engine) / 2**20, 1),
+                    "peak_mb": round(peak / 2**20, 1),
+                })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Lookups per second of the compiled rule index against a linear scan of the rules
+# DataFrame, for carts sampled from the real member baskets. Run from the project root:
+#   python -m benchmarks.bench_recommend --support 0.01 --confidence 0.1
+import argparse
+import time
+
+import numpy as np
+
+from utils.dataLoader import DATASET_PATH, load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.mining import generate_rules, mine_frequent_itemsets
+from utils.ruleIndex import RuleIndex, linear_recommend
+
+
+def sample_carts(matrix, items, count, max_size, seed=0):
+    rng = np.random.default_rng(seed)
+    carts = []
+    for row in rng.integers(0, matrix.shape[0], count):
+        basket = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+        size = min(len(basket), int(rng.integers(1, max_size + 1)))
+        carts.append([items[i] for i in rng.choice(basket, size, replace=False)])
+    return carts
+
+
+def lookups_per_second(func, carts, min_seconds=1.0):
+    done, start = 0, time.perf_counter()
+    while True:
+        for cart in carts:
+            func(cart)
+        done += len(carts)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule index lookup throughput")
+    parser.add_argument("--grouping", default="member", choices=["member", "transaction"])
+    parser.add_argument("--support", type=float, default=0.01)
+    parser.add_argument("--confidence", type=float, default=0.1)
+    parser.add_argument("--carts", type=int, default=2000)
+    parser.add_argument("--max-cart", type=int, default=8)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    matrix, items, _ = load_basket_matrix(DATASET_PATH, args.grouping)
+    one_hot = to_one_hot(matrix, items)
+    rules = generate_rules(mine_frequent_itemsets(one_hot, args.support, engine="bitset"), args.confidence, one_hot)
+    carts = sample_carts(matrix, list(items), args.carts, args.max_cart)
+    print(f"{len(rules)} rules, {len(carts)} carts of 1-{args.max_cart} items")
+
+    for metric in ["lift", "confidence"]:
+        start = time.perf_counter()
+        index = RuleIndex(rules, metric=metric)
+        build = time.perf_counter() - start
+
+        # Same suggestions (scores) as the linear scan
+        for cart in carts[:200]:
+            expected = [score for _, score in linear_recommend(rules, cart, args.k, metric)]
+            actual = [score for _, score in index.recommend(cart, args.k)]
+            assert np.allclose(expected, actual), (cart, expected, actual)
+
+        indexed = lookups_per_second(lambda cart: index.recommend(cart, args.k), carts)
+        linear = lookups_per_second(lambda cart: linear_recommend(rules, cart, args.k, metric), carts[:200])
+        print(
+            f"{metric:>10}: build {build * 1000:.1f} ms, index {indexed:,.0f} lookups/s "
+            f"({1e6 / indexed:.1f} us each), linear scan {linear:,.0f} lookups/s, {indexed / linear:.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Accuracy against speed of the sampled preview (Toivonen) compared with the exact apriori
+# path, on the groceries data and optionally scaled-up copies of it. For each sample size
+# it reports how many of the exact itemsets and rules the preview finds (recall), how many
+# of its own are real (precision), the mean support error, and how often the true support
+# falls inside the reported interval; the verified runs should always match exactly.
+# Run from the project root:
+#   python -m benchmarks.bench_sampling --samples 500 1000 2000 5000 --scale 1 10
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.scaled import scaled_path, write_scaled_copy
+from utils.bitsetMiner import as_matrix, count_itemsets, pack_item_bitsets
+from utils.dataLoader import load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.mining import generate_rules, mine_frequent_itemsets
+from utils.sampleMiner import sample_mine
+from utils.streamLoader import stream_baskets
+
+SETTINGS = {"transaction": (0.005, 0.05), "member": (0.02, 0.2)}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def rule_keys(rules):
+    return set(zip(rules["antecedents"], rules["consequents"]))
+
+
+def true_supports(one_hot, itemsets):
+    # Support of each itemset over every basket
+    bits = pack_item_bitsets(as_matrix(one_hot))
+    code = {item: i for i, item in enumerate(one_hot.columns)}
+    supports = np.empty(len(itemsets))
+    for i, itemset in enumerate(itemsets):
+        supports[i] = count_itemsets(bits, np.array([sorted(code[item] for item in itemset)]))[0]
+    return supports / len(one_hot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampled mining accuracy and speed")
+    parser.add_argument("--samples", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1])
+    parser.add_argument("--groupings", nargs="+", default=list(SETTINGS), choices=list(SETTINGS))
+    parser.add_argument("--seeds", type=int, default=5, help="samples drawn per size; the table shows their mean")
+    args = parser.parse_args()
+
+    rows = []
+    for factor in args.scale:
+        for grouping in args.groupings:
+            if factor == 1:
+                matrix, items, _ = load_basket_matrix(grouping=grouping)
+            else:
+                matrix, items, _ = stream_baskets(write_scaled_copy(factor, scaled_path(factor))).basket_matrix(grouping)
+            one_hot = to_one_hot(matrix, items)
+            min_support, min_confidence = SETTINGS[grouping]
+
+            def exact_run():
+                frequent_itemsets = mine_frequent_itemsets(one_hot, min_support, engine="apriori", budget_mb=0)
+                return frequent_itemsets, generate_rules(frequent_itemsets, min_confidence, one_hot)
+
+            exact_seconds, (exact_itemsets, exact_rules) = timed(exact_run)
+            exact = set(exact_itemsets["itemsets"])
+            exact_rule_keys = rule_keys(exact_rules)
+            base = {"scale": factor, "grouping": grouping, "baskets": matrix.shape[0], "min_support": min_support}
+            rows.append({**base, "mode": "exact apriori", "sample": matrix.shape[0], "seconds": exact_seconds,
+                         "speedup": 1.0, "recall": 1.0, "precision": 1.0, "rule_recall": 1.0, "rule_precision": 1.0})
+
+            for sample_size in args.samples:
+                if sample_size >= matrix.shape[0]:
+                    continue
+                for verify in (False, True):
+                    runs = []
+                    for seed in range(args.seeds):
+                        seconds, (frequent_itemsets, rules, info) = timed(
+                            lambda: sample_mine(one_hot, min_support, min_confidence, sample_size, verify=verify, seed=seed)
+                        )
+                        found = set(frequent_itemsets["itemsets"])
+                        found_rules = rule_keys(rules)
+                        truth = true_supports(one_hot, list(frequent_itemsets["itemsets"]))
+                        inside = (frequent_itemsets["support_low"] <= truth + 1e-12) & (truth <= frequent_itemsets["support_high"] + 1e-12)
+                        runs.append({
+                            "seconds": seconds,
+                            "recall": len(found & exact) / max(len(exact), 1),
+                            "precision": len(found & exact) / max(len(found), 1),
+                            "rule_recall": len(found_rules & exact_rule_keys) / max(len(exact_rule_keys), 1),
+                            "rule_precision": len(found_rules & exact_rule_keys) / max(len(found_rules), 1),
+                            "support_error": float(np.abs(frequent_itemsets["support"] - truth).mean()) if len(truth) else 0.0,
+                            "interval_coverage": float(inside.mean()) if len(truth) else 1.0,
+                            "border_misses": info.get("misses", 0),
+                        })
+                    mean = pd.DataFrame(runs).mean().to_dict()
+                    rows.append({**base, "mode": "sample + verify" if verify else "sample", "sample": sample_size,
+                                 **mean, "speedup": exact_seconds / mean["seconds"]})
+
+    pd.set_option("display.width", 200)
+    print(pd.DataFrame(rows).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
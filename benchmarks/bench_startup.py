@@ -0,0 +1,68 @@
+# Time to first render of each page in a fresh Python process: the imports the page
+# pulls in plus its first run, with the on-disk dataset caches already written (as they
+# are after the first deploy). With --warmup the process first runs main.py with
+# GROCERIES_WARMUP=1 and waits for the warmup to finish, which is what the first user
+# after a deploy sees once the server has warmed itself. Run from the project root:
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup --warmup
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+# "main" is the app entry point, which renders the default (introduction) page
+PAGES = [
+    "main", "introductionPage", "dataPage", "dataPage2", "testPage",
+    "conclusionNRecommendationPage", "recommendPage", "driftPage",
+]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+warmup = 0.0
+if {warmup}:
+    AppTest.from_file("main.py", default_timeout=600).run()
+    from utils.warmup import wait_for_warmup
+    wait_for_warmup()
+    warmup = time.perf_counter() - start
+first = time.perf_counter()
+app = AppTest.from_file("{script}", default_timeout=600).run()
+print(json.dumps({{
+    "warmup": warmup,
+    "seconds": time.perf_counter() - first if {warmup} else time.perf_counter() - start,
+    "errors": len(app.exception),
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start time per page")
+    parser.add_argument("--warmup", action="store_true", help="warm the process up before the first render")
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    args = parser.parse_args()
+
+    env = dict(os.environ, GROCERIES_WARMUP="1" if args.warmup else "0")
+    rows = []
+    for page in args.pages:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD.format(script="main.py" if page == "main" else f"views/{page}.py", warmup=args.warmup)],
+            capture_output=True, text=True, check=True, env=env,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rows.append({
+            "page": page,
+            "first_render_s": round(result["seconds"], 2),
+            "warmup_s": round(result["warmup"], 2),
+            "modules": result["modules"],
+            "errors": result["errors"],
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
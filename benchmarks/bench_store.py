@@ -0,0 +1,50 @@
+# Basket matrices straight from the cleaned rows (build_basket_matrix) against the
+# memory-mapped transaction store, on a synthetic dataset: build time, size on disk and
+# the cost of getting both groupings' matrices back on a later run. Run from the
+# project root:
+#   python -m benchmarks.bench_store --members 50 --dates 4
+import argparse
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic
+from utils.dataLoader import clean_data
+from utils.encoder import GROUPINGS, build_basket_matrix
+from utils.transactionStore import TransactionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction store build and load time")
+    parser.add_argument("--members", type=float, default=50, help="member count multiplier")
+    parser.add_argument("--dates", type=float, default=4, help="date range multiplier")
+    parser.add_argument("--folder", default="assets/cache/bench/store")
+    args = parser.parse_args()
+
+    path = write_synthetic(members_scale=args.members, dates_scale=args.dates)
+    data = clean_data(pd.read_csv(path))
+    print(f"{len(data):,} rows, {data['Member_number'].nunique():,} members")
+
+    start = time.perf_counter()
+    for grouping in GROUPINGS:
+        build_basket_matrix(data, grouping)
+    print(f"build_basket_matrix, both groupings: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    store = TransactionStore.from_frame(data)
+    shutil.rmtree(args.folder, ignore_errors=True)
+    os.makedirs(os.path.dirname(args.folder), exist_ok=True)
+    store.save(args.folder)
+    print(f"store build + save: {time.perf_counter() - start:.2f} s, {store.nbytes() / 2**20:.1f} MB")
+
+    start = time.perf_counter()
+    loaded = TransactionStore.load(args.folder)
+    for grouping in GROUPINGS:
+        loaded.basket_matrix(grouping)
+    print(f"store load, both groupings: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
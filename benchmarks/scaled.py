@@ -0,0 +1,25 @@
+# Helpers for building larger copies of the groceries dataset for benchmarks.
+import os
+
+import pandas as pd
+
+from utils.dataLoader import DATASET_PATH
+
+
+def write_scaled_copy(factor, output_path, source_path=DATASET_PATH):
+    # Repeat the dataset `factor` times; each copy gets its own member numbers so the
+    # baskets stay distinct and the copy behaves like a bigger store, not duplicate rows
+    if os.path.exists(output_path):
+        return output_path
+    source = pd.read_csv(source_path)
+    offset = int(source["Member_number"].max()) + 1
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", newline="") as handle:
+        for copy in range(factor):
+            chunk = source.assign(Member_number=source["Member_number"] + copy * offset)
+            chunk.to_csv(handle, index=False, header=copy == 0)
+    return output_path
+
+
+def scaled_path(factor, folder="assets/cache/bench"):
+    return os.path.join(folder, f"groceries_x{factor}.csv")
@@ -0,0 +1,121 @@
+# Synthetic groceries-style transaction files for benchmarks.
+# The real dataset is profiled (transactions per member, basket sizes, item popularity)
+# and every dimension can be scaled on its own: members, the date range, the item
+# vocabulary and the basket sizes. Members keep a few favourite items they buy again,
+# so member baskets have real co-occurrence for the miners to find.
+# Write a file from the project root:
+#   python -m benchmarks.synthetic --members 100 --items 10 --output assets/cache/bench/synthetic.csv
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.dataLoader import DATASET_PATH, DATE_FORMAT
+
+# Members generated per chunk; keeps memory flat however many rows are written
+MEMBER_CHUNK = 50_000
+
+# Favourite items per member and the share of basket slots filled from them
+FAVOURITES = 8
+FAVOURITE_SHARE = 0.3
+
+START_DATE = date(2014, 1, 1)
+
+
+def profile_dataset(source_path=DATASET_PATH):
+    data = pd.read_csv(source_path)
+    sizes = data.groupby(["Member_number", "Date"]).size().to_numpy()
+    popularity = data["itemDescription"].value_counts()
+    return {
+        "members": int(data["Member_number"].nunique()),
+        "days": int(data["Date"].nunique()),
+        "transactions_per_member": len(sizes) / data["Member_number"].nunique(),
+        "basket_sizes": sizes,
+        "items": popularity.index.to_numpy(dtype=object),
+        "popularity": popularity.to_numpy(dtype=float),
+    }
+
+
+def _vocabulary(profile, items_scale):
+    # Real items first; extra items repeat the real names with a copy number and a
+    # popularity that decays with it, giving a longer and thinner tail
+    base, weights = profile["items"], profile["popularity"]
+    copies = max(1, int(round(items_scale)))
+    names = [base] + [np.array([f"{name} #{copy}" for name in base], dtype=object) for copy in range(1, copies)]
+    popularity = np.concatenate([weights / (copy + 1) for copy in range(copies)])
+    return np.concatenate(names), popularity / popularity.sum()
+
+
+def generate_chunks(members_scale=1, dates_scale=1, items_scale=1, basket_scale=1, seed=0, source_path=DATASET_PATH):
+    # Yields DataFrames with the same columns and date format as the real CSV
+    profile = profile_dataset(source_path)
+    rng = np.random.default_rng(seed)
+    names, popularity = _vocabulary(profile, items_scale)
+    cumulative = np.cumsum(popularity)
+    n_days = max(1, int(round(profile["days"] * dates_scale)))
+    day_names = np.array([(START_DATE + timedelta(days=d)).strftime(DATE_FORMAT) for d in range(n_days)], dtype=object)
+    sizes = profile["basket_sizes"]
+    n_members = max(1, int(round(profile["members"] * members_scale)))
+
+    def draw_items(count):
+        return np.minimum(np.searchsorted(cumulative, rng.random(count)), len(names) - 1)
+
+    for first in range(0, n_members, MEMBER_CHUNK):
+        chunk_members = np.arange(first, min(first + MEMBER_CHUNK, n_members))
+        visits = np.maximum(1, rng.poisson(profile["transactions_per_member"], len(chunk_members)))
+        member_of_visit = np.repeat(chunk_members, visits)
+        day_of_visit = rng.integers(0, n_days, len(member_of_visit))
+        basket_size = np.maximum(1, np.round(rng.choice(sizes, len(member_of_visit)) * basket_scale).astype(np.int64))
+
+        member = np.repeat(member_of_visit, basket_size)
+        day = np.repeat(day_of_visit, basket_size)
+        item = draw_items(len(member))
+        favourites = draw_items(len(chunk_members) * FAVOURITES).reshape(len(chunk_members), FAVOURITES)
+        from_favourites = rng.random(len(member)) < FAVOURITE_SHARE
+        picks = rng.integers(0, FAVOURITES, int(from_favourites.sum()))
+        item[from_favourites] = favourites[member[from_favourites] - first, picks]
+
+        yield pd.DataFrame({
+            "Member_number": member + 1000,
+            "Date": day_names[day],
+            "itemDescription": names[item],
+        })
+
+
+def synthetic_path(members_scale=1, dates_scale=1, items_scale=1, basket_scale=1, seed=0, folder="assets/cache/bench"):
+    name = f"synthetic_m{members_scale:g}_d{dates_scale:g}_i{items_scale:g}_b{basket_scale:g}_s{seed}.csv"
+    return os.path.join(folder, name)
+
+
+def write_synthetic(output_path=None, members_scale=1, dates_scale=1, items_scale=1, basket_scale=1, seed=0, source_path=DATASET_PATH):
+    # Writes (or reuses) the file and returns its path
+    scales = dict(members_scale=members_scale, dates_scale=dates_scale, items_scale=items_scale, basket_scale=basket_scale, seed=seed)
+    output_path = output_path or synthetic_path(**scales)
+    if os.path.exists(output_path):
+        return output_path
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    partial = output_path + ".tmp"
+    with open(partial, "w", newline="") as handle:
+        for number, chunk in enumerate(generate_chunks(source_path=source_path, **scales)):
+            chunk.to_csv(handle, index=False, header=number == 0)
+    os.replace(partial, output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic groceries transaction CSV")
+    parser.add_argument("--members", type=float, default=10, help="member count multiplier")
+    parser.add_argument("--dates", type=float, default=1, help="date range multiplier")
+    parser.add_argument("--items", type=float, default=1, help="item vocabulary multiplier")
+    parser.add_argument("--basket", type=float, default=1, help="basket size multiplier")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    path = write_synthetic(args.output, args.members, args.dates, args.items, args.basket, args.seed)
+    print(f"{path}: {os.path.getsize(path) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
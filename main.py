@@ -1,5 +1,8 @@
 import streamlit as st
 import os
+from utils.controls import instrumentation_controls, instrumentation_panel
+from utils.instrumentation import begin_run, end_run
+from utils.warmup import WARMUP, start_warmup
 
 thisfile = os.path.abspath(__file__)
 base_dir = os.path.dirname(thisfile)
@@ -48,6 +51,30 @@ conc_reco_page = st.Page(
     icon=":material/home:",
 )
 
+# Recommendation Page
+## Suggests products for a cart from the mined association rules
+recommend_page = st.Page(
+    page="views/recommendPage.py",
+    title="Basket Recommendations",
+    icon=":material/shopping_cart:",
+)
+
+# Drift Page
+## Mines each month (or longer window) separately and compares the rules between them
+drift_page = st.Page(
+    page="views/driftPage.py",
+    title="Rule Drift Over Time",
+    icon=":material/timeline:",
+)
+
+# Pairs Page
+## Pairwise support, confidence and lift of every item pair from the co-occurrence counts
+pairs_page = st.Page(
+    page="views/pairsPage.py",
+    title="Item Pairs",
+    icon=":material/grid_on:",
+)
+
 # Members Page
 ## Self explanatory
 member_page = st.Page(
@@ -61,8 +88,8 @@ member_page = st.Page(
 pg = st.navigation(
     {
         "Home": [home_page],
-        "Data Visualization": [data_page_2, data_page, data_test_page],
-        "Finale": [conc_reco_page],
+        "Data Visualization": [data_page_2, data_page, data_test_page, drift_page, pairs_page],
+        "Finale": [conc_reco_page, recommend_page],
         "BaoBao": [member_page],
     }
 )
@@ -74,5 +101,21 @@ st.logo("assets/image/BAOBAO.png")
 st.sidebar.text("For CSIT342 - Industry Elective 3")
 
 
+# WARMUP
+## With GROCERIES_WARMUP=1 the first run of the server fills the shared caches in the background
+if WARMUP:
+    start_warmup()
+
+
+# INSTRUMENTATION
+## Optional per-stage timings of the page about to run, shown in the sidebar afterwards
+timings_on, trace_memory, log_stages, show_prometheus = instrumentation_controls()
+begin_run(pg.title, enabled=timings_on, trace_memory=trace_memory, log=log_stages)
+
+
 # RUN NAVIGATION
-pg.run()
+try:
+    pg.run()
+finally:
+    stage_run = end_run()
+instrumentation_panel(stage_run, prometheus=show_prometheus)
@@ -0,0 +1,82 @@
+# Headless batch mining: runs the same load -> clean -> group -> encode -> mine -> rules
+# pipeline as the pages and writes the results where the pages pick them up.
+#   python mine.py --grouping both --support 0.01 --confidence 0.1 --engine bitset
+# The pages read assets/artifacts/<grouping>-<engine>[-closed]/ when the dataset
+# fingerprint matches and the slider thresholds are at or above the mined ones.
+# With --incremental, a CSV that only grows is re-mined from the rows appended since the
+# previous --incremental run (same results as mining it all again).
+import argparse
+
+from utils.artifacts import ARTIFACT_DIR, FORMATS, artifact_folder, save_artifacts
+from utils.dataLoader import DATASET_PATH
+from utils.encoder import GROUPINGS
+from utils.mining import ENGINES
+from utils.pipeline import run_incremental_pipeline, run_pipeline
+from utils.preflight import MemoryBudgetError
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mine frequent itemsets and association rules without Streamlit")
+    parser.add_argument("--csv", default=DATASET_PATH, help="transactions CSV (Member_number, Date, itemDescription)")
+    parser.add_argument("--grouping", default="both", choices=list(GROUPINGS) + ["both"])
+    parser.add_argument("--support", type=float, default=0.01, help="minimum support")
+    parser.add_argument("--confidence", type=float, default=0.1, help="minimum confidence")
+    parser.add_argument("--lift", type=float, default=None, help="minimum lift (rules below are dropped)")
+    parser.add_argument("--engine", default="apriori", choices=list(ENGINES))
+    parser.add_argument("--closed", action="store_true", help="keep closed itemsets only")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for the son engine")
+    parser.add_argument("--max-len", type=int, default=None, help="largest itemset size")
+    parser.add_argument("--memory-budget", type=int, default=None, help="MB a run may use before it is capped or refused (0 = no limit, default GROCERIES_MEMORY_BUDGET_MB)")
+    parser.add_argument("--output", default=ARTIFACT_DIR)
+    parser.add_argument("--format", nargs="+", default=["parquet"], choices=FORMATS,
+                        help="files to write; the pages only read parquet, so csv (for other tools) needs parquet too")
+    parser.add_argument("--incremental", action="store_true", help="update the saved supports with the appended rows instead of mining from scratch")
+    parser.add_argument("--state", default=None, help="folder for the incremental state (default assets/cache/incremental)")
+    args = parser.parse_args()
+    if args.incremental and (args.closed or args.engine == "fpmax"):
+        parser.error("--incremental keeps every frequent itemset; it cannot stand in for --closed or the fpmax engine")
+    if "parquet" not in args.format:
+        parser.error("--format csv alone writes nothing the pages can load; add parquet (--format parquet csv)")
+
+    groupings = list(GROUPINGS) if args.grouping == "both" else [args.grouping]
+    for grouping in groupings:
+        if args.incremental:
+            frequent_itemsets, rules, meta = run_incremental_pipeline(
+                args.csv,
+                grouping=grouping,
+                min_support=args.support,
+                min_confidence=args.confidence,
+                min_lift=args.lift,
+                engine=args.engine,
+                max_len=args.max_len,
+                state_dir=args.state,
+            )
+        else:
+            try:
+                frequent_itemsets, rules, meta = run_pipeline(
+                    args.csv,
+                    grouping=grouping,
+                    min_support=args.support,
+                    min_confidence=args.confidence,
+                    min_lift=args.lift,
+                    engine=args.engine,
+                    closed=args.closed,
+                    workers=args.workers,
+                    max_len=args.max_len,
+                    budget_mb=args.memory_budget,
+                )
+            except MemoryBudgetError as error:
+                parser.exit(1, f"{grouping}: {error}\n")
+        folder = save_artifacts(
+            artifact_folder(grouping, args.engine, args.closed, args.output),
+            frequent_itemsets,
+            rules,
+            meta,
+            formats=args.format,
+        )
+        timings = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in meta["timings"].items())
+        print(f"{grouping}: {meta['itemset_count']} itemsets, {meta['rule_count']} rules -> {folder} ({timings})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.instrumentation import stage
+
+# Precomputed mining results written by mine.py and read back by the pages.
+# One folder per (grouping, engine, closed) holding itemsets, rules and a meta.json
+# that records the dataset version and thresholds they were mined with.
+ARTIFACT_DIR = "assets/artifacts"
+
+ITEMSET_COLUMNS = ["itemsets", "antecedents", "consequents"]
+
+FORMATS = ["parquet", "csv"]
+
+
+def artifact_folder(grouping, engine="apriori", closed=False, root=ARTIFACT_DIR):
+    name = f"{grouping}-{engine}" + ("-closed" if closed else "")
+    return os.path.join(root, name)
+
+
+def itemsets_to_lists(frame):
+    # frozenset columns -> sorted lists, which Parquet / Arrow store natively
+    frame = frame.copy()
+    for column in ITEMSET_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].map(sorted)
+    return frame
+
+
+def lists_to_itemsets(frame):
+    frame = frame.copy()
+    for column in ITEMSET_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].map(frozenset)
+    return frame
+
+
+def save_artifacts(folder, frequent_itemsets, rules, meta, formats=("parquet",)):
+    os.makedirs(folder, exist_ok=True)
+    for name, frame in [("itemsets", frequent_itemsets), ("rules", rules)]:
+        frame = itemsets_to_lists(frame)
+        if "parquet" in formats:
+            frame.to_parquet(os.path.join(folder, f"{name}.parquet"), index=False)
+        if "csv" in formats:
+            # CSV has no list type, so items are written as "a, b" like the rules tables on the pages
+            text = frame.copy()
+            for column in ITEMSET_COLUMNS:
+                if column in text:
+                    text[column] = text[column].map(", ".join)
+            text.to_csv(os.path.join(folder, f"{name}.csv"), index=False)
+
+    meta = dict(meta, created=datetime.now(timezone.utc).isoformat(timespec="seconds"), formats=list(formats))
+    with open(os.path.join(folder, "meta.json"), "w") as handle:
+        json.dump(meta, handle, indent=2)
+    return folder
+
+
+def read_meta(folder):
+    path = os.path.join(folder, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _read_frame(folder, name):
+    # Only the Parquet files are read back: the CSV copies are for other tools, and their
+    # "a, b" item lists do not round-trip
+    path = os.path.join(folder, f"{name}.parquet")
+    if not os.path.exists(path):
+        return None
+    with stage(f"read artifact {name}"):
+        return lists_to_itemsets(pd.read_parquet(path))
+
+
+def _usable(meta, fingerprint):
+    # Artifacts of another dataset version, or cut short by max_len / the memory guard,
+    # are not complete answers for the pages
+    return meta is not None and meta.get("fingerprint") == fingerprint and meta.get("max_len") is None and not meta.get("capped")
+
+
+def load_artifact_itemsets(fingerprint, grouping, engine, closed, min_support, monotone, root=ARTIFACT_DIR):
+    # Itemsets at min_support from a matching artifact, or None when there is none usable.
+    # Artifacts mined at a lower support are filtered for monotone engines.
+    folder = artifact_folder(grouping, engine, closed, root)
+    meta = read_meta(folder)
+    if not _usable(meta, fingerprint):
+        return None
+    if not (meta["min_support"] == min_support or (monotone and meta["min_support"] <= min_support)):
+        return None
+    frequent_itemsets = _read_frame(folder, "itemsets")
+    if frequent_itemsets is None:
+        return None
+    frequent_itemsets = frequent_itemsets[frequent_itemsets["support"] >= min_support].reset_index(drop=True)
+    frequent_itemsets.attrs["compact"] = meta.get("compact")
+    return frequent_itemsets
+
+
+def load_artifact_rules(fingerprint, grouping, engine, closed, min_support, min_confidence, monotone, root=ARTIFACT_DIR):
+    folder = artifact_folder(grouping, engine, closed, root)
+    meta = read_meta(folder)
+    if not _usable(meta, fingerprint):
+        return None
+    # Rules cut by a lift threshold cannot answer requests without one
+    if meta.get("min_lift") or meta["min_confidence"] > min_confidence:
+        return None
+    if not (meta["min_support"] == min_support or (monotone and meta["min_support"] <= min_support)):
+        return None
+    rules = _read_frame(folder, "rules")
+    if rules is None:
+        return None
+    keep = (rules["support"] >= min_support) & (rules["confidence"] >= min_confidence)
+    return rules[keep].reset_index(drop=True)
@@ -0,0 +1,186 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.bitsetMiner import levels_to_frame
+from utils.resultCache import cached_itemsets, cached_rules, get_mining_cache
+
+# Mining off the script thread. A page submits a job and renders straight away; the job
+# runs on a small thread pool shared by the server process, records which level it is
+# counting and the levels it has finished, and goes through cached_itemsets and
+# cached_rules like the page would: precomputed artifacts are used first, a session
+# mining the same thing in the foreground is waited on (and waits on the job) through
+# MiningCache.in_flight, and the results land in the shared MiningCache, so the page's
+# next run picks them up like any cache hit.
+#
+# Jobs are shared: sessions asking for the same (key, support, confidence) watch one
+# job. A session that moves on to other parameters, turns background mining off, or
+# presses cancel, stops watching, and a job nobody watches any more is cancelled at its
+# next batch of candidates.
+
+# Jobs mined at the same time; the rest wait in the queue
+BACKGROUND_WORKERS = 1
+
+# Seconds between refreshes of the progress panel
+PROGRESS_INTERVAL = 0.5
+
+
+class MiningCancelled(BaseException):
+    # A BaseException, like Streamlit's rerun and stop: in_flight then hands the sessions
+    # waiting on the cancelled job None, and they mine for themselves instead of failing
+    pass
+
+
+class MiningJob:
+
+    def __init__(self, params):
+        self.params = params
+        self.stage = "queued"
+        self.size = 0
+        self.counted = 0
+        self.candidates = 0
+        self.unit = "candidates"
+        self.levels = []
+        self.columns = None
+        self.n_rows = 0
+        self.error = None
+        self.started = None
+        self.seconds = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._watchers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.stage in ("done", "failed", "cancelled")
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def watch(self, session):
+        with self._lock:
+            self._watchers.add(session)
+
+    def release(self, session):
+        # Stop watching; the last watcher to leave cancels the job
+        with self._lock:
+            self._watchers.discard(session)
+            if not self._watchers and not self.done:
+                self._cancel.set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise MiningCancelled()
+
+    def progress(self, size, counted, candidates, levels, unit="candidates"):
+        # Called by the miner after every batch. SON reports its partitions instead, with
+        # size the pass it is in.
+        self.check()
+        self.size, self.counted, self.candidates, self.unit = size, counted, candidates, unit
+        self.levels = list(levels)
+
+    def partial_itemsets(self):
+        # Itemsets of the levels finished so far
+        levels = [level for level in self.levels if len(level[0])]
+        if not levels or self.columns is None:
+            return None
+        return levels_to_frame(levels, self.n_rows, self.columns)
+
+
+def _run(job, cache, key, one_hot, min_support, min_confidence, engine, closed, workers):
+    job.started = time.perf_counter()
+    try:
+        job.check()
+        job.stage = "itemsets"
+        job.columns, job.n_rows = list(one_hot.columns), len(one_hot)
+        frequent_itemsets = cached_itemsets(
+            key, one_hot, min_support, engine=engine, closed=closed, workers=workers, cache=cache, progress=job.progress
+        )
+        job.check()
+        job.stage = "rules"
+        if not frequent_itemsets.empty:
+            cached_rules(key, frequent_itemsets, one_hot, min_support, min_confidence, cache=cache)
+        job.stage = "done"
+    except MiningCancelled:
+        job.stage = "cancelled"
+    except Exception as error:
+        job.error = error
+        job.stage = "failed"
+    finally:
+        job.seconds = time.perf_counter() - job.started
+
+
+class JobRegistry:
+    # The jobs of the server process, one per (key, support, confidence)
+
+    def __init__(self, workers=BACKGROUND_WORKERS):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mining")
+
+    def submit(self, session, key, one_hot, min_support, min_confidence, engine="apriori", closed=False,
+               workers=None, cache=None):
+        cache = get_mining_cache() if cache is None else cache
+        params = (key, min_support, min_confidence)
+        with self._lock:
+            # Finished jobs have handed their results to the cache
+            self._jobs = {p: j for p, j in self._jobs.items() if not j.done}
+            job = self._jobs.get(params)
+            if job is None or job.cancelled:
+                job = self._jobs[params] = MiningJob(params)
+                job.future = self._executor.submit(
+                    _run, job, cache, key, one_hot, min_support, min_confidence, engine, closed, workers
+                )
+            job.watch(session)
+        return job
+
+
+@st.cache_resource
+def get_job_registry():
+    return JobRegistry()
+
+
+def background_job(key, one_hot, min_support, min_confidence, engine="apriori", closed=False, workers=None,
+                   slot="mining_job"):
+    # This session's job for these parameters, or None when the cache already has the
+    # itemsets and rules. The job the session watched before, for other parameters, is
+    # released (and cancelled if no other session watches it).
+    cache = get_mining_cache()
+    params = (key, min_support, min_confidence)
+    previous = st.session_state.get(slot)
+    if cache.get_itemsets(key, min_support) is not None and cache.get_rules(key, min_support, min_confidence) is not None:
+        job = None
+    elif previous is not None and previous.params == params and (
+        previous.stage == "failed" or st.session_state.get(f"{slot}_cancelled") == params
+    ):
+        # Failed, or cancelled from this session: not restarted until asked to or the parameters change
+        job = previous
+    else:
+        st.session_state.pop(f"{slot}_cancelled", None)
+        session = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+        job = get_job_registry().submit(session, key, one_hot, min_support, min_confidence, engine, closed, workers, cache)
+    if previous is not None and previous is not job:
+        previous.release(st.session_state.get("session_id"))
+    st.session_state[slot] = job
+    return job
+
+
+def release_job(slot="mining_job"):
+    # Stop watching this session's job, e.g. once background mining is turned off, or to
+    # restart a cancelled one on the next run
+    st.session_state.pop(f"{slot}_cancelled", None)
+    job = st.session_state.pop(slot, None)
+    if job is not None:
+        job.release(st.session_state.get("session_id"))
+
+
+def cancel_job(slot="mining_job"):
+    job = st.session_state.get(slot)
+    if job is not None:
+        job.release(st.session_state.get("session_id"))
+        st.session_state[f"{slot}_cancelled"] = job.params
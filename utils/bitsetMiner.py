@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Frequent itemset miner that stores each item's baskets as a packed bit vector
+# (one bit per basket in uint64 words). The support of a whole batch of candidates
+# is counted with a vectorized AND + popcount, level by level like Apriori.
+
+# Number of candidates whose bitsets are materialized at once
+BATCH_SIZE = 4096
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    # numpy < 2.0: count bits byte by byte through a lookup table
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        as_bytes = words.view(np.uint8).reshape(*words.shape[:-1], -1)
+        return _BYTE_COUNTS[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def pack_item_bitsets(matrix):
+    # (n_items, n_words) uint64 array; bit b of item i is set when basket b holds item i
+    coo = sparse.coo_matrix(matrix)
+    n_words = max(1, -(-matrix.shape[0] // 64))
+    bits = np.zeros((matrix.shape[1], n_words), dtype=np.uint64)
+    baskets = coo.row.astype(np.uint64)
+    np.bitwise_or.at(
+        bits,
+        (coo.col, (baskets >> np.uint64(6)).astype(np.intp)),
+        np.left_shift(np.uint64(1), baskets & np.uint64(63)),
+    )
+    return bits
+
+
+def join_candidates(itemsets):
+    # Pairs (i, j) of frequent k-itemsets that share their first k-1 items.
+    # Itemsets are kept sorted, so those pairs sit in contiguous blocks.
+    m, k = itemsets.shape
+    if m < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if k == 1:
+        return np.triu_indices(m, 1)
+    prefix = itemsets[:, :-1]
+    breaks = np.flatnonzero(np.any(prefix[1:] != prefix[:-1], axis=1)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [m]))
+    left, right = [], []
+    for start, end in zip(starts, ends):
+        if end - start > 1:
+            i, j = np.triu_indices(end - start, 1)
+            left.append(i + start)
+            right.append(j + start)
+    if not left:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def mine_bitsets(matrix, min_support, max_len=None, bits=None, progress=None):
+    # Level-wise mining over packed bitsets.
+    # Returns one (itemsets, counts) pair per level, itemsets as sorted item-code rows.
+    # progress(size, counted, candidates, levels) is called after every batch with the
+    # levels finished so far; it may raise to stop the search.
+    n_rows = matrix.shape[0]
+    bits = pack_item_bitsets(matrix) if bits is None else bits
+
+    counts = popcount(bits)
+    keep = counts / n_rows >= min_support
+    itemsets = np.flatnonzero(keep).reshape(-1, 1)
+    level_bits = bits[keep]
+    levels = [(itemsets, counts[keep])]
+    if progress is not None:
+        progress(1, len(counts), len(counts), levels)
+
+    while len(itemsets) > 1 and (max_len is None or itemsets.shape[1] < max_len):
+        left, right = join_candidates(itemsets)
+        found, found_counts, found_bits = [], [], []
+        for start in range(0, len(left), BATCH_SIZE):
+            i = left[start:start + BATCH_SIZE]
+            j = right[start:start + BATCH_SIZE]
+            candidate_bits = level_bits[i] & level_bits[j]
+            candidate_counts = popcount(candidate_bits)
+            mask = candidate_counts / n_rows >= min_support
+            if mask.any():
+                found.append(np.column_stack((itemsets[i[mask]], itemsets[j[mask], -1])))
+                found_counts.append(candidate_counts[mask])
+                found_bits.append(candidate_bits[mask])
+            if progress is not None:
+                progress(itemsets.shape[1] + 1, min(start + BATCH_SIZE, len(left)), len(left), levels)
+        if not found:
+            break
+        itemsets = np.concatenate(found)
+        level_bits = np.concatenate(found_bits)
+        levels.append((itemsets, np.concatenate(found_counts)))
+    return levels
+
+
+def count_itemsets(bits, candidates):
+    # Baskets that contain each candidate row (all candidates the same size),
+    # given the packed item bitsets of those baskets
+    counts = np.empty(len(candidates), dtype=np.int64)
+    for start in range(0, len(candidates), BATCH_SIZE):
+        chunk = candidates[start:start + BATCH_SIZE]
+        present = bits[chunk[:, 0]]
+        for k in range(1, chunk.shape[1]):
+            present = present & bits[chunk[:, k]]
+        counts[start:start + BATCH_SIZE] = popcount(present)
+    return counts
+
+
+def levels_to_frame(levels, n_rows, columns=None):
+    # Same ['support', 'itemsets'] layout that mlxtend returns
+    supports, itemsets = [], []
+    for codes, counts in levels:
+        supports.append(counts / n_rows)
+        if columns is None:
+            itemsets.extend(frozenset(row) for row in codes.tolist())
+        else:
+            itemsets.extend(frozenset(columns[c] for c in row) for row in codes.tolist())
+    support = np.concatenate(supports) if supports else np.empty(0)
+    return pd.DataFrame({"support": support, "itemsets": pd.Series(itemsets, dtype="object")})
+
+
+def as_matrix(df):
+    if hasattr(df, "sparse"):
+        return df.sparse.to_coo().tocsr()
+    return sparse.csr_matrix(df.to_numpy(dtype=bool))
+
+
+def bitset_apriori(df, min_support=0.5, use_colnames=False, max_len=None, progress=None):
+    # Drop-in for mlxtend's apriori on a one-hot (dense or sparse) DataFrame
+    if min_support <= 0.0 or min_support > 1.0:
+        raise ValueError(f"`min_support` must be a positive number within the interval `(0, 1]`. Got {min_support}.")
+    matrix = as_matrix(df)
+    levels = mine_bitsets(matrix, min_support, max_len=max_len, progress=progress)
+    return levels_to_frame(levels, matrix.shape[0], list(df.columns) if use_colnames else None)
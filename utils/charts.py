@@ -0,0 +1,107 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# Rule scatter plots that stay fast however many rules there are: points are drawn
+# with WebGL (Scattergl) instead of one matplotlib artist each, only the strongest
+# rules get a text label, and past DENSITY_THRESHOLD rules the points are binned into
+# a density heatmap. Figures are cached on a fingerprint of the plotted rules.
+
+# Rules labelled with their row number
+LABEL_TOP_N = 20
+
+# Above this many rules the scatter becomes a density heatmap (plus the labelled rules)
+DENSITY_THRESHOLD = 20_000
+
+# Heatmap resolution along each axis
+DENSITY_BINS = 120
+
+# Item set columns of itemset / rule frames (frozensets, or already joined strings)
+SET_COLUMNS = ["itemsets", "antecedents", "consequents"]
+
+
+def rules_fingerprint(rules, columns=None):
+    # Stable within the server process; changes whenever the rows or their order do.
+    # Works for itemset frames too (support + itemsets).
+    if columns is None:
+        columns = [c for c in rules.columns if c not in SET_COLUMNS]
+    hashed = pd.util.hash_pandas_object(rules[list(columns)], index=True).to_numpy()
+    for column in SET_COLUMNS:
+        if column in rules:
+            hashed = hashed ^ rules[column].map(hash).to_numpy(dtype=np.int64).view(np.uint64)
+    return f"{len(rules)}-{hashlib.sha1(hashed.tobytes()).hexdigest()[:16]}"
+
+
+def _describe(rules):
+    def join(items):
+        return items if isinstance(items, str) else ", ".join(sorted(items))
+
+    return [
+        f"Row {i}: {join(a)} → {join(c)}"
+        for i, a, c in zip(rules.index, rules["antecedents"], rules["consequents"])
+    ]
+
+
+def rule_scatter(rules, x="confidence", y="lift", label_by="lift", top_n=LABEL_TOP_N, density_threshold=DENSITY_THRESHOLD, title=None):
+    fig = go.Figure()
+    if len(rules) > density_threshold:
+        counts, x_edges, y_edges = np.histogram2d(rules[x], rules[y], bins=DENSITY_BINS)
+        counts = np.where(counts > 0, counts, np.nan).T
+        fig.add_trace(go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=np.log10(counts),
+            customdata=counts,
+            colorscale="Blues",
+            colorbar={"title": "rules (log10)"},
+            hovertemplate=f"{x}: %{{x:.3f}}<br>{y}: %{{y:.3f}}<br>rules: %{{customdata:.0f}}<extra></extra>",
+            name="density",
+        ))
+    else:
+        fig.add_trace(go.Scattergl(
+            x=rules[x],
+            y=rules[y],
+            mode="markers",
+            marker={"size": 6, "opacity": 0.7},
+            hovertext=_describe(rules),
+            hoverinfo="text+x+y",
+            name="rules",
+        ))
+
+    top = rules.nlargest(top_n, label_by) if top_n else rules.iloc[:0]
+    if len(top):
+        fig.add_trace(go.Scatter(
+            x=top[x],
+            y=top[y],
+            mode="markers+text",
+            text=[f"Row {i}" for i in top.index],
+            textposition="middle right",
+            textfont={"size": 10},
+            marker={"size": 8, "color": "black"},
+            hovertext=_describe(top),
+            hoverinfo="text+x+y",
+            name=f"top {len(top)} by {label_by}",
+        ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title=x.title(),
+        yaxis_title=y.title(),
+        showlegend=False,
+        margin={"t": 50 if title else 20},
+    )
+    return fig
+
+
+# cache_resource hands back the same figure without pickling it; st.plotly_chart only reads it
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_rule_scatter(fingerprint, x, y, label_by, top_n, density_threshold, title, _rules):
+    return rule_scatter(_rules, x, y, label_by, top_n, density_threshold, title)
+
+
+def cached_rule_scatter(rules, x="confidence", y="lift", label_by="lift", top_n=LABEL_TOP_N, density_threshold=DENSITY_THRESHOLD, title=None):
+    # Same figure as rule_scatter, rebuilt only when the rules (or options) change
+    return _cached_rule_scatter(rules_fingerprint(rules), x, y, label_by, top_n, density_threshold, title, rules)
@@ -0,0 +1,158 @@
+import time
+
+import numpy as np
+import streamlit as st
+
+from utils.charts import rules_fingerprint
+from utils.instrumentation import stage
+from utils.mining import closed_itemsets
+
+# Smaller outputs for the itemset and rule tables and their downloads. Nothing here
+# changes what is mined or cached; the pages run these on the results they show.
+#
+# Itemsets are compacted to the closed ones (no superset with the same support) or the
+# maximal ones (no frequent superset). Rules are pruned when they only restate another:
+#   - a simpler antecedent: some rule with the same consequent and a smaller antecedent
+#     is at least as confident (so at least the same lift), after Bayardo's minimum
+#     improvement
+#   - a larger consequent: the rule with the same antecedent and one more consequent
+#     item has the same confidence, so it says everything this one does
+# Both checks look the smaller / larger sets up in a dict keyed on the frozensets, one
+# item removed at a time, rather than comparing every pair of rules.
+
+ITEMSET_MODES = {None: "All frequent itemsets", "closed": "Closed itemsets", "maximal": "Maximal itemsets"}
+
+# Confidence a rule must gain over its simpler rules to be kept
+MIN_IMPROVEMENT = 0.0
+
+
+def maximal_itemsets(frequent_itemsets):
+    # Same one-item-larger marking as closed_itemsets, without the support check. Needs
+    # every subset of a frequent itemset in the frame (the engines' full results).
+    itemsets = set(frequent_itemsets["itemsets"])
+    not_maximal = set()
+    for itemset in itemsets:
+        if len(itemset) > 1:
+            not_maximal.update(itemset - {item} for item in itemset)
+    keep = ~frequent_itemsets["itemsets"].isin(not_maximal)
+    return frequent_itemsets[keep].reset_index(drop=True)
+
+
+def _without_supersets(frequent_itemsets):
+    # Itemsets with no strict superset in the frame, for frames that are already compact
+    # (closed), where the one-item-larger superset may be missing. Each item keeps the sorted
+    # rows that contain it; an itemset's supersets are the longer rows in all of its items'
+    # lists, intersected from its rarest item on and stopping once nothing is left.
+    itemsets = frequent_itemsets["itemsets"].tolist()
+    lengths = np.fromiter(map(len, itemsets), dtype=np.intp, count=len(itemsets))
+    rows = {}
+    for row, itemset in enumerate(itemsets):
+        for item in itemset:
+            rows.setdefault(item, []).append(row)
+    postings = {item: np.array(held, dtype=np.intp) for item, held in rows.items()}
+    keep = np.ones(len(itemsets), dtype=bool)
+    for row, itemset in enumerate(itemsets):
+        lists = sorted((postings[item] for item in itemset), key=len)
+        holders = lists[0][lengths[lists[0]] > lengths[row]]
+        for other in lists[1:]:
+            if not len(holders):
+                break
+            holders = np.intersect1d(holders, other, assume_unique=True)
+        keep[row] = not len(holders)
+    return frequent_itemsets[keep].reset_index(drop=True)
+
+
+def compact_itemsets(frequent_itemsets, mode):
+    # mode is "closed" or "maximal"; compact input (attrs["compact"]) is handled too
+    compact = frequent_itemsets.attrs.get("compact")
+    if mode is None or compact == mode or compact == "maximal":
+        return frequent_itemsets
+    if compact is None:
+        result = closed_itemsets(frequent_itemsets) if mode == "closed" else maximal_itemsets(frequent_itemsets)
+    else:
+        # Closed to maximal: every maximal itemset is closed, so the maximal ones are the
+        # closed ones without a closed superset
+        result = _without_supersets(frequent_itemsets)
+    result.attrs = {**frequent_itemsets.attrs, "compact": mode}
+    return result
+
+
+def prune_redundant_rules(rules, min_improvement=MIN_IMPROVEMENT):
+    antecedents = rules["antecedents"].tolist()
+    consequents = rules["consequents"].tolist()
+    confidences = rules["confidence"].to_numpy(dtype=float)
+
+    # Simpler antecedent: the best confidence of any rule with the same consequent and a
+    # strictly smaller antecedent, built up one item at a time (rules that are missing fell
+    # under the minimum confidence, so they never beat a rule that is there)
+    by_consequent = dict(zip(zip(consequents, antecedents), confidences))
+    best = {}
+
+    def best_simpler(consequent, antecedent):
+        key = (consequent, antecedent)
+        if key not in best:
+            value = -np.inf
+            if len(antecedent) > 1:
+                for item in antecedent:
+                    smaller = antecedent - {item}
+                    value = max(value, by_consequent.get((consequent, smaller), -np.inf), best_simpler(consequent, smaller))
+            best[key] = value
+        return best[key]
+
+    simpler = np.array([best_simpler(c, a) for a, c in zip(antecedents, consequents)], dtype=float)
+    keep = confidences > simpler + min_improvement
+
+    # Larger consequent: each rule marks the rules with one consequent item fewer that it
+    # matches in confidence
+    by_antecedent = dict(zip(zip(antecedents, consequents), confidences))
+    covered = set()
+    for antecedent, consequent, confidence in zip(antecedents, consequents, confidences):
+        if len(consequent) > 1:
+            for item in consequent:
+                smaller = (antecedent, consequent - {item})
+                if smaller in by_antecedent and np.isclose(by_antecedent[smaller], confidence):
+                    covered.add(smaller)
+    if covered:
+        keep &= np.array([key not in covered for key in zip(antecedents, consequents)], dtype=bool)
+    return rules[keep].reset_index(drop=True)
+
+
+def _bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def _report(step, before, after, seconds):
+    return {
+        "step": step,
+        "rows_before": len(before),
+        "rows_after": len(after),
+        "bytes_before": _bytes(before),
+        "bytes_after": _bytes(after),
+        "seconds": seconds,
+    }
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_step(fingerprint, step, option, _frame):
+    # (result, report) per input frame and setting, shared between reruns and sessions
+    start = time.perf_counter()
+    with stage(step):
+        if step == "compact itemsets":
+            result = compact_itemsets(_frame, option)
+        else:
+            result = prune_redundant_rules(_frame, option)
+    return result, _report(f"{step} ({option})" if step == "compact itemsets" else step, _frame, result, time.perf_counter() - start)
+
+
+def compacted_itemsets(frequent_itemsets, mode):
+    # (itemsets to show, report); no report when mode is None
+    if mode is None or frequent_itemsets.empty:
+        return frequent_itemsets, None
+    return _cached_step(rules_fingerprint(frequent_itemsets), "compact itemsets", mode, frequent_itemsets)
+
+
+def pruned_rules(rules, prune, min_improvement=MIN_IMPROVEMENT):
+    # (rules to show, report); no report when prune is off
+    if not prune or rules.empty:
+        return rules, None
+    return _cached_step(rules_fingerprint(rules), "prune redundant rules", min_improvement, rules)
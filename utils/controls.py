@@ -0,0 +1,181 @@
+import pandas as pd
+import streamlit as st
+
+from utils.backgroundMiner import PROGRESS_INTERVAL, cancel_job, release_job
+from utils.compaction import ITEMSET_MODES
+from utils.encoder import format_bytes
+from utils.instrumentation import prometheus_text
+from utils.mining import ENGINE_LABELS, ENGINES, PARALLEL_ENGINES, compare_engines
+from utils.parallelMiner import DEFAULT_WORKERS
+from utils.sampleMiner import CONFIDENCE_LEVEL, SAMPLE_SIZE
+from utils.topkMiner import RULE_POOL
+
+
+def engine_controls():
+    # Sidebar choice of mining backend shared by all mining pages
+    engine = st.sidebar.selectbox("Mining Engine", list(ENGINES), format_func=ENGINE_LABELS.get)
+    closed = st.sidebar.checkbox(
+        "Closed itemsets only",
+        value=False,
+        disabled=engine == "fpmax",
+        help="Keep only itemsets that have no superset with the same support.",
+    )
+    return engine, closed
+
+
+def top_k_controls():
+    # Sidebar switch to the top-K mode, which mines without a support threshold.
+    # Returns (k, rank) with rank "itemsets" or "rules", or (None, None) when off.
+    if not st.sidebar.toggle("Top-K mode", help="Mine the K most frequent itemsets instead of using a minimum support."):
+        return None, None
+    k = st.sidebar.number_input("K", min_value=1, max_value=5000, value=100, step=10)
+    rank = st.sidebar.radio(
+        "Rank",
+        ["itemsets", "rules"],
+        format_func={"itemsets": "Itemsets by support", "rules": "Rules by lift"}.get,
+        help=f"Rules are ranked among the {RULE_POOL} x K most frequent itemsets.",
+    )
+    return int(k), rank
+
+
+def sample_controls():
+    # Sidebar switch to the sampled preview. Returns (sample_size, verify, seed), or
+    # (None, False, 0) when off.
+    if not st.sidebar.toggle("Quick preview (sample)", help="Mine a random sample of the baskets for a fast, approximate result."):
+        return None, False, 0
+    sample_size = st.sidebar.number_input("Sample size (baskets)", min_value=100, value=SAMPLE_SIZE, step=500)
+    verify = st.sidebar.checkbox(
+        "Verify on the full data",
+        help="Count the sampled itemsets and their negative border over every basket: exact supports, one extra pass.",
+    )
+    if st.sidebar.button("Draw another sample"):
+        st.session_state["sample_seed"] = st.session_state.get("sample_seed", 0) + 1
+    return int(sample_size), verify, st.session_state.get("sample_seed", 0)
+
+
+def sample_note(info):
+    # How the sampled result was obtained and how far it can be trusted
+    if info["verified"]:
+        passes = f"{info['passes']} passes" if info["passes"] > 1 else "one pass"
+        text = (f"Mined a sample of {info['sample']:,} of {info['baskets']:,} baskets, then verified over every basket "
+                f"in {passes}: supports, confidences and lifts are exact.")
+        if info["misses"]:
+            text += f" {info['misses']} itemset(s) the sample missed were found on the negative border and added."
+        st.caption(text)
+    else:
+        st.caption(
+            f"Approximate: mined a sample of {info['sample']:,} of {info['baskets']:,} baskets "
+            f"(at a lowered support of {info['lowered_support']:.4f} to find {info['candidates']:,} candidates). "
+            f"The _low / _high columns are {CONFIDENCE_LEVEL:.0%} confidence intervals; turn on verification for exact values."
+        )
+
+
+def compaction_controls():
+    # Sidebar options that shrink the itemset and rule tables (and their downloads).
+    # Returns (itemset_mode, prune_rules).
+    mode = st.sidebar.selectbox(
+        "Show Itemsets",
+        list(ITEMSET_MODES),
+        format_func=ITEMSET_MODES.get,
+        help="Closed: no superset has the same support. Maximal: no superset is frequent.",
+    )
+    prune = st.sidebar.checkbox(
+        "Prune redundant rules",
+        help="Drop rules that a shorter antecedent or a larger consequent already covers at the same or higher confidence.",
+    )
+    return mode, prune
+
+
+def compaction_note(report):
+    # How much smaller a compacted table is, and how long it took
+    if report is None:
+        return
+    removed = 1 - report["rows_after"] / report["rows_before"] if report["rows_before"] else 0.0
+    st.caption(
+        f"{report['step'].capitalize()}: {report['rows_before']:,} -> {report['rows_after']:,} rows ({removed:.0%} fewer), "
+        f"{format_bytes(report['bytes_before'])} -> {format_bytes(report['bytes_after'])}, "
+        f"in {report['seconds'] * 1e3:,.0f} ms."
+    )
+
+
+def budget_note(frequent_itemsets):
+    # Tell the user when the memory guard cut the run down
+    capped = frequent_itemsets.attrs.get("capped")
+    if capped:
+        st.info(f"This run was predicted to go over the memory budget, so it was limited to {capped}.")
+
+
+@st.fragment(run_every=PROGRESS_INTERVAL)
+def mining_progress(job, slot="mining_job"):
+    # Progress of a background mining job, refreshed on its own while the rest of the page
+    # stays as it is; the whole page reruns once the job has finished. slot is where the
+    # page's background_job keeps the job.
+    if job.stage in ("done", "failed"):
+        st.rerun()
+    if job.stage == "cancelled" or job.cancelled:
+        st.info("Mining was cancelled. Change the parameters or restart it.")
+        st.button("Restart mining", on_click=release_job, args=(slot,))
+        return
+
+    if job.stage == "queued":
+        st.progress(0.0, text="Waiting for another mining job to finish...")
+    elif job.stage == "itemsets" and job.size == 0:
+        st.progress(0.0, text="Counting single items...")
+    elif job.stage == "itemsets" and job.unit != "candidates":
+        fraction = job.counted / job.candidates if job.candidates else 0.0
+        st.progress(fraction, text=f"Pass {job.size} of 2: {job.counted:,} of {job.candidates:,} {job.unit}")
+    elif job.stage == "itemsets":
+        fraction = job.counted / job.candidates if job.candidates else 0.0
+        st.progress(fraction, text=f"Counting {job.size}-itemsets: {job.counted:,} of {job.candidates:,} candidates")
+    else:
+        st.progress(1.0, text="Generating association rules...")
+    st.button("Cancel", on_click=cancel_job, args=(slot,))
+
+    # Levels already finished, while the deeper ones are still being counted
+    partial = job.partial_itemsets()
+    if partial is not None:
+        st.caption(f"{len(partial):,} frequent itemsets found so far (up to {int(partial['itemsets'].map(len).max())} items).")
+        st.dataframe(partial.assign(itemsets=partial["itemsets"].map(lambda s: ", ".join(sorted(s)))), hide_index=True)
+
+
+def worker_controls(engine):
+    # Worker processes for the multi-core engines (None lets the engine use its default)
+    if engine not in PARALLEL_ENGINES:
+        return None
+    return st.sidebar.number_input("Worker Processes", min_value=1, max_value=64, value=DEFAULT_WORKERS)
+
+
+def engine_timing_panel(one_hot, min_support, workers=None):
+    # Side-by-side timing of every engine for the current dataset and support level
+    with st.sidebar.expander("Compare engine timings"):
+        st.write(f"Times each engine at a minimum support of {min_support:.2f}.")
+        if st.button("Run timing comparison"):
+            st.dataframe(compare_engines(one_hot, min_support, workers=workers), hide_index=True)
+
+
+def instrumentation_controls():
+    # Sidebar switches for the per-stage breakdown (all off by default)
+    with st.sidebar.expander("Performance"):
+        enabled = st.toggle("Stage timings", value=False)
+        trace_memory = st.checkbox("Measure allocations", disabled=not enabled, help="Uses tracemalloc, which slows the page while on.")
+        log = st.checkbox("Log stage lines", disabled=not enabled, help="One JSON log line per stage.")
+        prometheus = st.checkbox("Prometheus text", disabled=not enabled)
+    return enabled, trace_memory, log, prometheus
+
+
+def instrumentation_panel(run, prometheus=False):
+    # Collapsible breakdown of the stages timed during the page run
+    if run is None:
+        return
+    with st.sidebar.expander("Stage breakdown", expanded=True):
+        breakdown = pd.DataFrame({
+            "Stage": [" " * record["depth"] + record["stage"] for record in run.records],
+            "ms": [record["seconds"] * 1000 for record in run.records],
+        })
+        if run.trace_memory:
+            # Blank for stages another session's run overlapped (tracemalloc is process-wide)
+            breakdown["MiB"] = [None if record["alloc_bytes"] is None else record["alloc_bytes"] / 2**20 for record in run.records]
+        st.dataframe(breakdown, hide_index=True, column_config={"ms": st.column_config.NumberColumn(format="%.1f"), "MiB": st.column_config.NumberColumn(format="%.2f")})
+        st.caption(f"Page run: {run.seconds * 1000:,.0f} ms")
+        if prometheus:
+            st.code(prometheus_text(run), language="text")
@@ -0,0 +1,111 @@
+import hashlib
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentation import stage
+
+# Default location of the groceries dataset (relative to the project root, same as the pages)
+DATASET_PATH = "assets/csv/Groceries_dataset.csv"
+
+# Folder that holds the preprocessed columnar snapshots of the dataset
+CACHE_DIR = "assets/cache"
+
+# Dates in the groceries dataset are written as day-month-year (e.g. 21-07-2015)
+DATE_FORMAT = "%d-%m-%Y"
+
+# CSV files at least this large are turned into baskets by the chunked streaming
+# reader instead of being loaded whole (override with GROCERIES_STREAMING_THRESHOLD_MB)
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("GROCERIES_STREAMING_THRESHOLD_MB", "512")) << 20
+
+
+def dataset_fingerprint(file_path=DATASET_PATH):
+    # Identify a version of the source file by its size and modification time,
+    # so a changed CSV gets a new key without having to read the whole file
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def clean_data(data):
+    # Same cleaning steps the pages used to repeat on every rerun
+    data = data.dropna(subset=["Member_number", "itemDescription"])
+    data = data.assign(itemDescription=data["itemDescription"].str.lower().str.strip())
+    data = data.drop_duplicates().reset_index(drop=True)
+
+    # Parse the dates once and store the items as a categorical column
+    data["Date"] = pd.to_datetime(data["Date"], format=DATE_FORMAT, errors="coerce")
+    data["itemDescription"] = data["itemDescription"].astype("category")
+    return data
+
+
+def snapshot_path(file_path=DATASET_PATH, fingerprint=None):
+    fingerprint = fingerprint or dataset_fingerprint(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{fingerprint}.parquet")
+
+
+def _remove_stale_snapshots(file_path, keep):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith(f"{stem}-") and name.endswith(".parquet") and path != keep:
+            os.remove(path)
+
+
+def load_clean_data(file_path=DATASET_PATH):
+    # Read the cleaned dataset from its Parquet snapshot, rebuilding the snapshot
+    # only when the source CSV has changed since it was written
+    path = snapshot_path(file_path)
+    if os.path.exists(path):
+        with stage("read snapshot"):
+            return pd.read_parquet(path)
+
+    with stage("parse csv"):
+        raw = pd.read_csv(file_path)
+    with stage("clean"):
+        data = clean_data(raw)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        data.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        _remove_stale_snapshots(file_path, keep=path)
+    except (OSError, ImportError):
+        # A read-only checkout or a missing Parquet engine only loses the snapshot, not the data
+        pass
+    return data
+
+
+@st.cache_data(show_spinner="Loading dataset...")
+def _cached_clean_data(file_path, fingerprint):
+    return load_clean_data(file_path)
+
+
+def get_clean_data(file_path=DATASET_PATH):
+    # Cleaned dataset shared by every page; cached across reruns and sessions
+    # until the CSV on disk changes
+    return _cached_clean_data(file_path, dataset_fingerprint(file_path))
+
+
+def load_basket_matrix(file_path=DATASET_PATH, grouping="member"):
+    # (matrix, items, baskets) for the grouping, read from the integer-coded transaction
+    # store (built once per dataset version, streamed for large files)
+    from utils.transactionStore import load_transaction_store
+
+    return load_transaction_store(file_path).basket_matrix(grouping)
+
+
+# cache_resource shares the one read-only matrix between sessions without copying it:
+# cache_data would unpickle a fresh heap copy of the memory-mapped arrays on every call
+@st.cache_resource(max_entries=4, show_spinner="Building baskets...")
+def _cached_basket_matrix(file_path, grouping, fingerprint):
+    return load_basket_matrix(file_path, grouping)
+
+
+def get_basket_matrix(file_path=DATASET_PATH, grouping="member"):
+    # Basket matrix shared by the mining pages, cached until the CSV on disk changes.
+    # Callers must not modify the matrix, items or baskets in place.
+    return _cached_basket_matrix(file_path, grouping, dataset_fingerprint(file_path))
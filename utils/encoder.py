@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.instrumentation import stage
+
+# Columns that identify one basket for each way of grouping the dataset
+GROUPINGS = {
+    "transaction": ["Member_number", "Date"],  # one shopping trip (member + day)
+    "member": ["Member_number"],  # everything a member ever bought
+}
+
+
+def build_basket_matrix(data, grouping="member"):
+    # Build the basket x item matrix straight from integer codes:
+    # rows are baskets, columns are items, True where the item is in the basket
+    with stage(f"group baskets ({grouping})"):
+        items = data["itemDescription"]
+        if not isinstance(items.dtype, pd.CategoricalDtype):
+            items = items.astype("category")
+        items = items.cat.remove_unused_categories()
+        item_codes = items.cat.codes.to_numpy()
+
+        grouper = data.groupby(GROUPINGS[grouping], sort=True, dropna=False)
+        basket_codes = grouper.ngroup().to_numpy()
+        baskets = grouper.size().index
+
+        # Repeated items in a basket collapse into a single True when converting to CSR
+        matrix = sparse.coo_matrix(
+            (np.ones(len(item_codes), dtype=bool), (basket_codes, item_codes)),
+            shape=(len(baskets), len(items.cat.categories)),
+        ).tocsr()
+    return matrix, pd.Index(items.cat.categories.astype(str)), baskets
+
+
+def to_one_hot(matrix, items):
+    # Sparse-dtype DataFrame that mlxtend's apriori/fpgrowth accept as-is
+    with stage("one-hot"):
+        return pd.DataFrame.sparse.from_spmatrix(matrix, columns=items)
+
+
+def encoding_memory(matrix):
+    # Bytes used by the sparse matrix next to what the old dense bool frame needed
+    sparse_bytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    dense_bytes = matrix.shape[0] * matrix.shape[1] * np.dtype(bool).itemsize
+    return {
+        "baskets": matrix.shape[0],
+        "items": matrix.shape[1],
+        "sparse_bytes": sparse_bytes,
+        "dense_bytes": dense_bytes,
+        "ratio": dense_bytes / sparse_bytes if sparse_bytes else float("inf"),
+    }
+
+
+def basket_preview(matrix, items, baskets, n=5):
+    # Small grouped view (key columns + list of items) for the first few baskets
+    head = matrix[:n]
+    preview = baskets[:n].to_frame(index=False)
+    preview["itemDescription"] = [
+        list(items[head.indices[head.indptr[i]:head.indptr[i + 1]]]) for i in range(head.shape[0])
+    ]
+    return preview
+
+
+def encode_baskets(data, grouping="member"):
+    # One-hot basket matrix for the given grouping plus a memory report
+    matrix, items, baskets = build_basket_matrix(data, grouping)
+    return to_one_hot(matrix, items), baskets, encoding_memory(matrix)
+
+
+def format_bytes(num_bytes):
+    for unit in ["B", "KB", "MB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+def describe_memory(stats):
+    return (
+        f"Sparse basket matrix ({stats['baskets']:,} baskets x {stats['items']} items): "
+        f"{format_bytes(stats['sparse_bytes'])}, dense encoding would need "
+        f"{format_bytes(stats['dense_bytes'])} ({stats['ratio']:.1f}x more)."
+    )
@@ -0,0 +1,97 @@
+import functools
+import gzip
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.artifacts import ITEMSET_COLUMNS
+
+# Downloads of itemset / rule frames. Nothing is serialized while the page runs: the
+# download buttons get a callable that Streamlit only invokes on click (on its own
+# thread). The file is then written chunk by chunk, so there is never a full text copy
+# of the frame next to the encoded bytes. Item sets are written as lists (list<string>
+# in Parquet / Arrow, JSON arrays in CSV) instead of frozenset reprs.
+
+# Rows converted and written per chunk
+CHUNK_ROWS = 50_000
+
+EXPORT_FORMATS = {
+    "csv.gz": ("Gzip CSV", "application/gzip"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", "application/vnd.apache.arrow.file"),
+}
+
+
+def _as_list(items):
+    return sorted(items) if isinstance(items, (set, frozenset)) else [part for part in str(items).split(", ") if part]
+
+
+def _chunks(frame):
+    # Copies of CHUNK_ROWS rows at a time with item set columns as sorted lists
+    for start in range(0, max(len(frame), 1), CHUNK_ROWS):
+        chunk = frame.iloc[start:start + CHUNK_ROWS].copy()
+        for column in ITEMSET_COLUMNS:
+            if column in chunk:
+                chunk[column] = pd.Series([_as_list(items) for items in chunk[column]], index=chunk.index, dtype=object)
+        yield chunk
+
+
+def arrow_schema(frame):
+    fields = []
+    for column in frame.columns:
+        if column in ITEMSET_COLUMNS:
+            fields.append(pa.field(column, pa.list_(pa.string())))
+        else:
+            fields.append(pa.Schema.from_pandas(frame[[column]].iloc[:0], preserve_index=False).field(column))
+    return pa.schema(fields)
+
+
+def _arrow_tables(frame):
+    schema = arrow_schema(frame)
+    for chunk in _chunks(frame):
+        yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def write_export(frame, fmt, handle):
+    if fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=handle, mode="wb", compresslevel=6, mtime=0) as compressed:
+            text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+            for number, chunk in enumerate(_chunks(frame)):
+                for column in ITEMSET_COLUMNS:
+                    if column in chunk:
+                        chunk[column] = chunk[column].map(json.dumps)
+                chunk.to_csv(text, index=False, header=number == 0)
+            text.flush()
+            text.detach()
+    elif fmt == "parquet":
+        with pq.ParquetWriter(handle, arrow_schema(frame), compression="zstd") as writer:
+            for table in _arrow_tables(frame):
+                writer.write_table(table)
+    elif fmt == "arrow":
+        with pa.ipc.new_file(handle, arrow_schema(frame), options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+            for table in _arrow_tables(frame):
+                writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+    return handle
+
+
+def export_bytes(frame, fmt):
+    return write_export(frame, fmt, io.BytesIO()).getvalue()
+
+
+def export_buttons(frame, name, key):
+    # One lazy download button per format
+    for slot, (fmt, (label, mime)) in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS.items()):
+        slot.download_button(
+            label=label,
+            data=functools.partial(export_bytes, frame, fmt),
+            file_name=f"{name}.{fmt}",
+            mime=mime,
+            key=f"{key}_{fmt}",
+            on_click="ignore",
+        )
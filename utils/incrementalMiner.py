@@ -0,0 +1,328 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.bitsetMiner import count_itemsets, join_candidates, levels_to_frame, pack_item_bitsets
+from utils.dataLoader import CACHE_DIR, DATASET_PATH, clean_data, load_clean_data
+from utils.instrumentation import stage
+
+# Incremental frequent itemset mining for a transactions CSV that only ever grows, after
+# Cheung et al.'s FUP (Fast UPdate). The miner keeps every basket as packed item bitsets,
+# the support counts from the last pass and the byte offset of the CSV read so far.
+# A refresh reads just the appended bytes and merges those rows into the baskets: new
+# baskets are added, and a basket that gains items (a member buying more on a day that
+# is already in the file) counts as its old contents removed plus its new contents added.
+#
+# Level by level, the new count of an itemset that was counted last time is its old count
+# plus its net count in the changed baskets. An itemset that was never counted had fewer than
+# min_support * N baskets, so it can only be frequent among the N + dN baskets now if the
+# delta adds more than min_support * dN of them; only those few candidates are counted
+# over the whole history. The result is identical to mining everything again.
+
+# Where refresh keeps the miner state between runs
+STATE_DIR = os.path.join(CACHE_DIR, "incremental")
+
+# Bytes at the start of the CSV hashed to notice a rewritten (rather than appended) file
+HEAD_BYTES = 1 << 16
+
+# Slack on the FUP bound so float rounding can never prune a candidate that is frequent
+PRUNE_SLACK = 1e-6
+
+# Transaction keys hold the day (counted from DAY_ORIGIN) in their low DAY_BITS bits
+DAY_BITS = 20
+DAY_ORIGIN = np.datetime64("1900-01-01", "D").view(np.int64)
+NAT_DAY = (1 << DAY_BITS) - 1
+
+# Changed baskets whose old contents are read back from the bitsets at a time
+UNPACK_BATCH = 4096
+
+
+def _word_bits(baskets):
+    baskets = baskets.astype(np.uint64)
+    return (baskets >> np.uint64(6)).astype(np.intp), np.left_shift(np.uint64(1), baskets & np.uint64(63))
+
+
+class IncrementalMiner:
+
+    def __init__(self, grouping="member", min_support=0.01, max_len=None):
+        self.grouping = grouping
+        self.min_support = min_support
+        self.max_len = max_len
+        self.items = []
+        self.item_codes = {}
+        # Basket keys in ascending order and the basket number of each
+        self.keys = np.empty(0, dtype=np.int64)
+        self.key_baskets = np.empty(0, dtype=np.int64)
+        self.n_baskets = 0
+        # (n_items, capacity words) uint64, bit b of item i set when basket b holds item i
+        self.bits = np.zeros((0, 1), dtype=np.uint64)
+        # Support count of every itemset counted on the last pass (the frequent ones and the
+        # negative border), keyed on its ascending item codes. Border counts are kept up to
+        # date from the delta too, so only itemsets that were never candidates need the FUP
+        # bound and a count over the whole history.
+        self.counts = {}
+        self.source = {}
+        self.last_update = {}
+
+    def _basket_keys(self, data):
+        # One int64 per basket: the member number, shifted left past the day for transactions
+        members = data["Member_number"]
+        if not pd.api.types.is_integer_dtype(members):
+            raise ValueError("Incremental mining needs integer Member_number values.")
+        members = members.to_numpy(np.int64)
+        if self.grouping == "member":
+            return members
+        days = data["Date"].to_numpy("datetime64[D]").view(np.int64)
+        days = np.where(data["Date"].isna().to_numpy(), NAT_DAY, days - DAY_ORIGIN)
+        return (members << DAY_BITS) | days
+
+    def _find_baskets(self, keys):
+        # Basket number of each key, -1 for keys not seen yet
+        baskets = np.full(len(keys), -1, dtype=np.int64)
+        if len(self.keys):
+            positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            found = self.keys[positions] == keys
+            baskets[found] = self.key_baskets[positions[found]]
+        return baskets
+
+    def _add_keys(self, keys, baskets):
+        # keys are sorted and new, so inserting keeps self.keys sorted
+        positions = np.searchsorted(self.keys, keys)
+        self.keys = np.insert(self.keys, positions, keys)
+        self.key_baskets = np.insert(self.key_baskets, positions, baskets)
+
+    def _encode_items(self, names):
+        codes, uniques = pd.factorize(names.astype(str))
+        lookup = np.empty(len(uniques), dtype=np.intp)
+        for i, name in enumerate(uniques):
+            lookup[i] = self.item_codes.setdefault(name, len(self.item_codes))
+        if len(self.item_codes) > len(self.items):
+            self.items = list(self.item_codes)
+            grown = np.zeros((len(self.items), self.bits.shape[1]), dtype=np.uint64)
+            grown[:len(self.bits)] = self.bits
+            self.bits = grown
+        return lookup[codes]
+
+    def _grow_baskets(self, n_baskets):
+        # Capacity doubles so appending a day does not copy every bitset each time
+        words = -(-n_baskets // 64)
+        if words > self.bits.shape[1]:
+            grown = np.zeros((len(self.bits), max(words, 2 * self.bits.shape[1])), dtype=np.uint64)
+            grown[:, :self.bits.shape[1]] = self.bits
+            self.bits = grown
+
+    def _contents(self, baskets):
+        # (len(baskets), n_items) bool matrix of what the baskets hold now
+        rows = []
+        for start in range(0, len(baskets), UNPACK_BATCH):
+            words, masks = _word_bits(baskets[start:start + UNPACK_BATCH])
+            rows.append(sparse.csr_matrix((self.bits[:, words] & masks).T != 0))
+        if not rows:
+            return sparse.csr_matrix((0, len(self.items)), dtype=bool)
+        return sparse.vstack(rows).tocsr()
+
+    def add_rows(self, data):
+        # Merge cleaned rows into the baskets. Returns the old and new contents of every
+        # basket that changed (as basket x item matrices) and the number of new baskets.
+        item_codes = self._encode_items(data["itemDescription"])
+        key_uniques, key_codes = np.unique(self._basket_keys(data), return_inverse=True)
+        known = self._find_baskets(key_uniques)
+        new = known < 0
+        basket_numbers = known.astype(np.int64)
+        basket_numbers[new] = self.n_baskets + np.arange(new.sum())
+
+        n_items = len(self.items)
+        pairs = np.unique(basket_numbers[key_codes] * n_items + item_codes)
+        baskets, items = pairs // n_items, pairs % n_items
+
+        # Entries the baskets already hold change nothing
+        words, masks = _word_bits(baskets)
+        old = baskets < self.n_baskets
+        held = np.zeros(len(pairs), dtype=bool)
+        held[old] = (self.bits[items[old], words[old]] & masks[old]) != 0
+        baskets, items, words, masks = baskets[~held], items[~held], words[~held], masks[~held]
+
+        changed = np.unique(baskets[baskets < self.n_baskets])
+        before = self._contents(changed)
+
+        old_n = self.n_baskets
+        self.n_baskets += int(new.sum())
+        self._grow_baskets(self.n_baskets)
+        np.bitwise_or.at(self.bits, (items, words), masks)
+        self._add_keys(key_uniques[new], basket_numbers[new])
+
+        touched = np.concatenate((changed, np.arange(old_n, self.n_baskets)))
+        after = self._contents(touched)
+        return before, after, self.n_baskets - old_n
+
+    def update(self, before, after, added):
+        # FUP pass over the levels; before / after are the old and new versions of the changed baskets
+        n, old_n = self.n_baskets, self.n_baskets - added
+        before_bits, after_bits = pack_item_bitsets(before), pack_item_bitsets(after)
+        used = self.bits[:, :max(1, -(-n // 64))]
+        counts, rescanned, candidates = {}, 0, np.arange(len(self.items)).reshape(-1, 1)
+
+        while n and len(candidates):
+            net = count_itemsets(after_bits, candidates) - count_itemsets(before_bits, candidates)
+            if old_n == 0:
+                # First run: the delta is the whole dataset
+                total = net
+            else:
+                old = np.array([self.counts.get(row, -1) for row in map(tuple, candidates.tolist())], dtype=np.int64)
+                known = old >= 0
+                total = np.where(known, old + net, -1)
+                # Never counted before, so not frequent before either: the FUP bound applies
+                rescan = ~known & (net > self.min_support * added - PRUNE_SLACK)
+                if rescan.any():
+                    total[rescan] = count_itemsets(used, candidates[rescan])
+                    rescanned += int(rescan.sum())
+            counted = total >= 0
+            counts.update(zip(map(tuple, candidates[counted].tolist()), total[counted].tolist()))
+            keep = counted & (total / n >= self.min_support)
+            itemsets = candidates[keep]
+            if len(itemsets) < 2 or (self.max_len is not None and itemsets.shape[1] >= self.max_len):
+                break
+            left, right = join_candidates(itemsets)
+            candidates = np.column_stack((itemsets[left], itemsets[right, -1]))
+
+        self.last_update.update(changed_baskets=before.shape[0], new_baskets=added, rescanned=rescanned)
+        self.counts = counts
+
+    def refresh_rows(self, data):
+        before, after, added = self.add_rows(data)
+        self.last_update = {"rows": len(data)}
+        self.update(before, after, added)
+
+    def frequent_itemsets(self):
+        # ['support', 'itemsets'] frame in the same row order the bitset engine gives for the whole dataset
+        names = np.array(self.items, dtype=object)
+        order = np.argsort(names, kind="stable")
+        rank = np.empty(len(names), dtype=np.intp)
+        rank[order] = np.arange(len(names))
+
+        by_size = {}
+        for codes, count in self.counts.items():
+            if count / self.n_baskets >= self.min_support:
+                by_size.setdefault(len(codes), []).append((sorted(rank[list(codes)]), count))
+        levels = []
+        for size in sorted(by_size):
+            rows = sorted(by_size[size])
+            levels.append((np.array([r for r, _ in rows], dtype=np.intp), np.array([c for _, c in rows], dtype=np.int64)))
+        frame = levels_to_frame(levels, max(self.n_baskets, 1), list(names[order]))
+        frame.attrs["compact"] = None
+        return frame
+
+    def save(self, folder):
+        # Written next to the old state and swapped in, so an interrupted save keeps the old one
+        tmp = folder + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        used = self.bits[:, :max(1, -(-self.n_baskets // 64))]
+        by_size = {}
+        for codes, count in self.counts.items():
+            by_size.setdefault(len(codes), ([], []))
+            by_size[len(codes)][0].append(codes)
+            by_size[len(codes)][1].append(count)
+        arrays = {"bits": used, "keys": self.keys, "key_baskets": self.key_baskets}
+        for size, (codes, counts) in by_size.items():
+            arrays[f"codes_{size}"] = np.array(codes, dtype=np.int64)
+            arrays[f"counts_{size}"] = np.array(counts, dtype=np.int64)
+        np.savez(os.path.join(tmp, "state.npz"), **arrays)
+        meta = {
+            "grouping": self.grouping,
+            "min_support": self.min_support,
+            "max_len": self.max_len,
+            "n_baskets": self.n_baskets,
+            "items": self.items,
+            "source": self.source,
+        }
+        with open(os.path.join(tmp, "meta.json"), "w") as handle:
+            json.dump(meta, handle)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+
+    @classmethod
+    def load(cls, folder):
+        with open(os.path.join(folder, "meta.json")) as handle:
+            meta = json.load(handle)
+        miner = cls(meta["grouping"], meta["min_support"], meta["max_len"])
+        miner.n_baskets = meta["n_baskets"]
+        miner.items = meta["items"]
+        miner.item_codes = {name: code for code, name in enumerate(miner.items)}
+        miner.source = meta["source"]
+        with np.load(os.path.join(folder, "state.npz")) as arrays:
+            miner.bits = arrays["bits"].copy()
+            miner.keys = arrays["keys"]
+            miner.key_baskets = arrays["key_baskets"]
+            for name in arrays.files:
+                if name.startswith("codes_"):
+                    size = name.split("_")[1]
+                    miner.counts.update(zip(map(tuple, arrays[name].tolist()), arrays[f"counts_{size}"].tolist()))
+        return miner
+
+
+def _head_digest(file_path, length):
+    with open(file_path, "rb") as handle:
+        return hashlib.sha1(handle.read(min(length, HEAD_BYTES))).hexdigest()
+
+
+def read_appended(file_path, source):
+    # Cleaned rows added to the CSV after source["offset"]; None when the file was rewritten
+    size = os.path.getsize(file_path)
+    if not source or size < source["offset"] or _head_digest(file_path, source["offset"]) != source["head"]:
+        return None
+    with open(file_path, "rb") as handle:
+        handle.seek(source["offset"])
+        tail = handle.read()
+    if not tail.strip():
+        return clean_data(pd.DataFrame(columns=source["columns"]))
+    return clean_data(pd.read_csv(io.BytesIO(tail), header=None, names=source["columns"]))
+
+
+def state_folder(file_path=DATASET_PATH, grouping="member", root=STATE_DIR):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(root, f"{stem}-{grouping}")
+
+
+def refresh(file_path=DATASET_PATH, grouping="member", min_support=0.01, max_len=None, root=STATE_DIR):
+    # The miner for the CSV as it is now, updated from the saved state when only rows were
+    # appended. miner.last_update["mode"] says whether it was "unchanged", "incremental" or "full".
+    folder = state_folder(file_path, grouping, root)
+    miner = None
+    if os.path.isdir(folder):
+        miner = IncrementalMiner.load(folder)
+        if (miner.min_support, miner.max_len) != (min_support, max_len):
+            miner = None
+
+    size = os.path.getsize(file_path)
+    appended = read_appended(file_path, miner.source) if miner is not None else None
+    if appended is None:
+        miner = IncrementalMiner(grouping, min_support, max_len)
+        with stage("full mine"):
+            data = load_clean_data(file_path)
+            miner.refresh_rows(data)
+        mode = "full"
+    elif len(appended):
+        with stage("incremental mine"):
+            miner.refresh_rows(appended)
+        mode = "incremental"
+    else:
+        miner.last_update = {"rows": 0}
+        mode = "unchanged"
+
+    if mode != "unchanged":
+        miner.source = {
+            "offset": size,
+            "head": _head_digest(file_path, size),
+            "columns": list(pd.read_csv(file_path, nrows=0).columns),
+        }
+        os.makedirs(root, exist_ok=True)
+        miner.save(folder)
+    miner.last_update["mode"] = mode
+    return miner
@@ -0,0 +1,164 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+# Per-run stage timings for the app. main.py starts a run before the page script and
+# ends it afterwards; anything in between (pages and the loaders / miners they call)
+# can wrap a step in `with stage("name"):`. With no run active, stage() hands back a
+# shared no-op context, so the instrumented code costs one attribute lookup.
+#
+# Each Streamlit session runs its script on its own thread, so the active run is
+# thread-local. Allocation tracking uses tracemalloc, which is process-wide and slows
+# Python-heavy code down while on; it is a separate switch from the timings. Runs that
+# track allocations share it through a count: the first one starts it (unless something
+# else already had) and the last one stops it. Its peak is process-wide too, so a stage
+# only reports allocations when its run was the only tracking run from start to end;
+# while several overlap, their stages get None.
+
+logger = logging.getLogger("groceries.stages")
+
+# Where end_run also writes the Prometheus text dump, if set
+METRICS_FILE = os.environ.get("GROCERIES_METRICS_FILE")
+
+_local = threading.local()
+_NULL_STAGE = contextlib.nullcontext()
+
+# Runs tracking allocations right now, whether the first of them started tracemalloc, and
+# how many times a run started while another was tracking (stages compare it at each end)
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_started_tracing = False
+_overlaps = 0
+
+
+class StageRun:
+
+    def __init__(self, page=None, trace_memory=False, log=False):
+        self.page = page
+        self.trace_memory = trace_memory
+        self.log = log
+        self.records = []
+        self.seconds = None
+        self._stack = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # Records are kept in start order with their nesting depth
+        record = {"stage": name, "depth": len(self._stack), "seconds": None, "alloc_bytes": None}
+        self.records.append(record)
+        frame = {"peak": 0, "overlaps": None}
+        if self.trace_memory:
+            with _tracing_lock:
+                if _tracing_runs == 1:
+                    frame["overlaps"] = _overlaps
+                    frame["current"] = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self._stack.pop()
+            if self.trace_memory:
+                with _tracing_lock:
+                    alone = frame["overlaps"] is not None and frame["overlaps"] == _overlaps
+                    if alone:
+                        # reset_peak in a nested stage loses the outer peak, so children report theirs up
+                        peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+                        record["alloc_bytes"] = peak - frame["current"]
+                        if self._stack:
+                            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            if self.log:
+                logger.info(json.dumps({"page": self.page, **record}))
+
+
+def _start_tracing():
+    global _tracing_runs, _started_tracing, _overlaps
+    with _tracing_lock:
+        if _tracing_runs == 0:
+            _started_tracing = not tracemalloc.is_tracing()
+            if _started_tracing:
+                tracemalloc.start()
+        else:
+            _overlaps += 1
+        _tracing_runs += 1
+
+
+def _stop_tracing():
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def begin_run(page=None, enabled=False, trace_memory=False, log=False):
+    if not enabled:
+        _local.run = None
+        return None
+    run = StageRun(page, trace_memory=trace_memory, log=log)
+    if trace_memory:
+        _start_tracing()
+    _local.run = run
+    return run
+
+
+def end_run():
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    run.seconds = time.perf_counter() - run._start
+    if run.trace_memory:
+        _stop_tracing()
+    if run.log:
+        logger.info(json.dumps({"page": run.page, "stage": "total", "seconds": run.seconds}))
+    if METRICS_FILE:
+        with open(METRICS_FILE, "w") as handle:
+            handle.write(prometheus_text(run))
+    return run
+
+
+def stage(name):
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NULL_STAGE
+    return run.stage(name)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text(run):
+    # Prometheus text exposition of the run's stages (the last run of each name wins)
+    page = _label(run.page)
+    lines = [
+        "# HELP groceries_stage_seconds Wall time of the pipeline stage in the last page run",
+        "# TYPE groceries_stage_seconds gauge",
+    ]
+    latest = {record["stage"]: record for record in run.records}
+    for name, record in latest.items():
+        lines.append(f'groceries_stage_seconds{{page="{page}",stage="{_label(name)}"}} {record["seconds"]:.6f}')
+    if run.trace_memory:
+        lines += [
+            "# HELP groceries_stage_alloc_bytes Peak traced allocations of the pipeline stage above its start",
+            "# TYPE groceries_stage_alloc_bytes gauge",
+        ]
+        for name, record in latest.items():
+            # None when another session's run overlapped the stage
+            if record["alloc_bytes"] is not None:
+                lines.append(f'groceries_stage_alloc_bytes{{page="{page}",stage="{_label(name)}"}} {record["alloc_bytes"]}')
+    lines += [
+        "# HELP groceries_page_seconds Wall time of the last page run",
+        "# TYPE groceries_page_seconds gauge",
+        f'groceries_page_seconds{{page="{page}"}} {run.seconds:.6f}',
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,182 @@
+import time
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from utils.bitsetMiner import bitset_apriori
+from utils.instrumentation import stage
+from utils.parallelMiner import son_apriori
+from utils.preflight import MemoryBudgetError, plan_mining
+
+
+def _mlxtend(name):
+    # mlxtend (and joblib behind it) is only imported once one of its engines runs,
+    # so pages that never mine do not pay for it at startup
+    def run(df, **options):
+        from mlxtend import frequent_patterns
+
+        return getattr(frequent_patterns, name)(df, **options)
+
+    run.__name__ = name
+    return run
+
+
+# Mining backends that can be picked from the sidebar. All of them return the same
+# ['support', 'itemsets'] frame that association_rules and the charts expect.
+ENGINES = {
+    "apriori": _mlxtend("apriori"),
+    "fpgrowth": _mlxtend("fpgrowth"),
+    "fpmax": _mlxtend("fpmax"),
+    "bitset": bitset_apriori,
+    "son": son_apriori,
+}
+
+ENGINE_LABELS = {
+    "apriori": "Apriori",
+    "fpgrowth": "FP-Growth",
+    "fpmax": "FP-Max (maximal itemsets)",
+    "bitset": "Bitset Apriori (NumPy)",
+    "son": "Partitioned Bitset (SON, multi-core)",
+}
+
+# Engines that take a worker count
+PARALLEL_ENGINES = {"son"}
+
+# Engines that report progress (see bitsetMiner.mine_bitsets; son reports partitions)
+PROGRESS_ENGINES = {"bitset", "son"}
+
+# Engines whose results the bitset search reproduces exactly (same itemsets and order),
+# so runs asked for progress mine with it instead
+LEVELWISE_ENGINES = {"apriori", "bitset"}
+
+
+def mine_frequent_itemsets(one_hot, min_support, engine="apriori", closed=False, max_len=None, workers=None, budget_mb=None,
+                           progress=None):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown mining engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+
+    miner = "bitset" if progress is not None and engine in LEVELWISE_ENGINES else engine
+
+    # Runs predicted to go over the memory budget are capped, or refused with MemoryBudgetError
+    with stage("preflight"):
+        plan = plan_mining(one_hot, min_support, engine=miner, max_len=max_len, budget_mb=budget_mb)
+    max_len = plan["max_len"]
+    options = {"workers": workers} if engine in PARALLEL_ENGINES else {}
+    if plan["low_memory"]:
+        options["low_memory"] = True
+    if progress is not None and miner in PROGRESS_ENGINES:
+        options["progress"] = progress
+    with stage(f"mine ({engine})"):
+        frequent_itemsets = ENGINES[miner](one_hot, min_support=min_support, use_colnames=True, max_len=max_len, **options)
+    frequent_itemsets = frequent_itemsets[["support", "itemsets"]]
+
+    compact = "maximal" if engine == "fpmax" else None
+    if closed and compact is None:
+        with stage("closed itemsets"):
+            frequent_itemsets = closed_itemsets(frequent_itemsets)
+        compact = "closed"
+
+    # Remember when the result is not downward closed, so rule generation can
+    # count the missing subsets itself
+    frequent_itemsets.attrs["compact"] = compact
+    frequent_itemsets.attrs["capped"] = plan["capped"]
+    frequent_itemsets.attrs["max_len"] = max_len
+    return frequent_itemsets
+
+
+def closed_itemsets(frequent_itemsets):
+    # An itemset is closed when no one-item-larger superset has the same support.
+    # Each (k+1)-itemset marks its k-subsets through a dict lookup instead of
+    # comparing every pair of itemsets.
+    support = dict(zip(frequent_itemsets["itemsets"], frequent_itemsets["support"]))
+    not_closed = set()
+    for itemset, itemset_support in support.items():
+        if len(itemset) < 2:
+            continue
+        for item in itemset:
+            subset = itemset - {item}
+            if support.get(subset) == itemset_support:
+                not_closed.add(subset)
+    keep = ~frequent_itemsets["itemsets"].isin(not_closed)
+    return frequent_itemsets[keep].reset_index(drop=True)
+
+
+def _count_support(one_hot, itemsets, chunk_size=2048):
+    # Support of arbitrary itemsets counted directly on the basket matrix
+    matrix = one_hot.sparse.to_coo().tocsc() if hasattr(one_hot, "sparse") else one_hot.to_numpy()
+    column = {item: i for i, item in enumerate(one_hot.columns)}
+    n_rows = one_hot.shape[0]
+
+    supports = {}
+    by_size = {}
+    for itemset in itemsets:
+        by_size.setdefault(len(itemset), []).append(itemset)
+    for size, group in by_size.items():
+        codes = np.array([[column[item] for item in itemset] for itemset in group])
+        for start in range(0, len(group), chunk_size):
+            chunk = codes[start:start + chunk_size]
+            present = None
+            for k in range(size):
+                cols = matrix[:, chunk[:, k]]
+                cols = cols.toarray() if hasattr(cols, "toarray") else cols
+                present = cols.astype(bool) if present is None else present & cols.astype(bool)
+            counts = present.sum(axis=0)
+            for itemset, count in zip(group[start:start + chunk_size], counts):
+                supports[itemset] = count / n_rows
+    return supports
+
+
+def expand_itemsets(frequent_itemsets, one_hot):
+    # Closed / maximal results leave out subsets that association_rules needs;
+    # every subset of a frequent itemset is frequent, so count them and add them back
+    known = dict(zip(frequent_itemsets["itemsets"], frequent_itemsets["support"]))
+    missing = set()
+    for itemset in known:
+        for size in range(1, len(itemset)):
+            for subset in combinations(sorted(itemset), size):
+                subset = frozenset(subset)
+                if subset not in known:
+                    missing.add(subset)
+    if missing:
+        known.update(_count_support(one_hot, missing))
+    expanded = pd.DataFrame({"support": list(known.values()), "itemsets": list(known.keys())})
+    return expanded.sort_values("itemsets", key=lambda s: s.map(len), kind="stable").reset_index(drop=True)
+
+
+def generate_rules(frequent_itemsets, min_confidence, one_hot, metric="confidence", n_baskets=None):
+    # n_baskets stands in for len(one_hot) when the itemsets were counted without a one-hot frame
+    if frequent_itemsets.attrs.get("compact"):
+        with stage("expand itemsets"):
+            frequent_itemsets = expand_itemsets(frequent_itemsets, one_hot)
+
+    from mlxtend.frequent_patterns import association_rules
+
+    with stage("association rules"):
+        # Check if 'num_itemsets' argument is needed
+        if "num_itemsets" in association_rules.__code__.co_varnames:
+            return association_rules(
+                frequent_itemsets, metric=metric, min_threshold=min_confidence,
+                num_itemsets=len(one_hot) if n_baskets is None else n_baskets,
+            )
+        return association_rules(frequent_itemsets, metric=metric, min_threshold=min_confidence)
+
+
+def compare_engines(one_hot, min_support, engines=None, max_len=None, workers=None):
+    # Time every engine on the same basket matrix and support level
+    timings = []
+    for engine in engines or ENGINES:
+        start = time.perf_counter()
+        try:
+            frequent_itemsets = mine_frequent_itemsets(one_hot, min_support, engine=engine, max_len=max_len, workers=workers)
+        except MemoryBudgetError as error:
+            timings.append({"engine": ENGINE_LABELS[engine], "seconds": None, "itemsets": None, "note": str(error)})
+            continue
+        timings.append({
+            "engine": ENGINE_LABELS[engine],
+            "seconds": time.perf_counter() - start,
+            "itemsets": len(frequent_itemsets),
+            "note": f"capped to {frequent_itemsets.attrs['capped']}" if frequent_itemsets.attrs["capped"] else "",
+        })
+    timings = pd.DataFrame(timings).sort_values("seconds").reset_index(drop=True)
+    return timings
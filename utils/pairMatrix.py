@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import sparse
+
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, get_basket_matrix
+from utils.instrumentation import stage
+
+# Pair analytics without mining. One sparse product X^T X of the basket x item matrix
+# counts, for every pair of items, the baskets that hold both (its diagonal is the item
+# counts). Support, confidence, lift, leverage and conviction of every rule a -> b with
+# one item on each side follow from those counts in a few vectorized array operations,
+# and they are computed once per dataset and grouping: any support or confidence level
+# is then a mask over the same arrays, so moving a slider never re-mines anything.
+
+# Metrics offered for the heatmap and partner rankings
+PAIR_METRICS = ["lift", "confidence", "support", "leverage", "conviction"]
+
+# Items shown in the heatmap when none are picked (the most frequent ones)
+HEATMAP_ITEMS = 30
+
+
+class PairMatrix:
+
+    def __init__(self, matrix, items):
+        x = sparse.csc_matrix(matrix, dtype=np.int32)
+        self.items = list(items)
+        self.codes = {item: i for i, item in enumerate(self.items)}
+        self.n_rows = x.shape[0]
+        with stage("co-occurrence matrix"):
+            self.counts = (x.T @ x).tocsr()
+        self.item_counts = self.counts.diagonal().astype(np.int64)
+
+        # Every directed pair a -> b (a != b) that occurs together at least once,
+        # most frequent first
+        with stage("pair metrics"):
+            coo = self.counts.tocoo()
+            keep = coo.row != coo.col
+            together = coo.data[keep].astype(np.int64)
+            order = np.lexsort((coo.col[keep], coo.row[keep], -together))
+            self.antecedent = coo.row[keep][order]
+            self.consequent = coo.col[keep][order]
+            self.metrics = self._metrics(self.antecedent, self.consequent, together[order])
+
+    def _metrics(self, antecedent, consequent, together):
+        n = self.n_rows
+        support = together / n
+        antecedent_support = self.item_counts[antecedent] / n
+        consequent_support = self.item_counts[consequent] / n
+        confidence = together / self.item_counts[antecedent]
+        with np.errstate(divide="ignore"):
+            conviction = np.where(confidence < 1, (1 - consequent_support) / (1 - confidence), np.inf)
+        return {
+            "antecedent support": antecedent_support,
+            "consequent support": consequent_support,
+            "support": support,
+            "confidence": confidence,
+            "lift": confidence / consequent_support,
+            "leverage": support - antecedent_support * consequent_support,
+            "conviction": conviction,
+        }
+
+    def __len__(self):
+        return len(self.antecedent)
+
+    def _mask(self, min_support=0.0, min_confidence=0.0):
+        return (self.metrics["support"] >= min_support) & (self.metrics["confidence"] >= min_confidence)
+
+    def _frame(self, positions):
+        # Same layout as association_rules, one item per side
+        frame = pd.DataFrame({
+            "antecedents": [frozenset([self.items[i]]) for i in self.antecedent[positions].tolist()],
+            "consequents": [frozenset([self.items[i]]) for i in self.consequent[positions].tolist()],
+        })
+        for name, values in self.metrics.items():
+            frame[name] = values[positions]
+        return frame
+
+    def pairs(self, min_support=0.0, min_confidence=0.0):
+        # Rules a -> b at these thresholds, most frequent first
+        return self._frame(np.flatnonzero(self._mask(min_support, min_confidence)))
+
+    def partners(self, item, metric="lift", k=10, min_support=0.0):
+        # The k items bought with item that score highest on metric, as rules item -> partner
+        rows = np.flatnonzero((self.antecedent == self.codes[item]) & self._mask(min_support))
+        rows = rows[np.argsort(-self.metrics[metric][rows], kind="stable")[:k]]
+        return self._frame(rows)
+
+    def top_items(self, n=HEATMAP_ITEMS):
+        order = np.argsort(-self.item_counts, kind="stable")[:n]
+        return [self.items[i] for i in order]
+
+    def heatmap(self, items=None, metric="lift", min_support=0.0):
+        # Square frame of metric for rules row -> column between the given items (the most
+        # frequent ones by default); pairs below min_support, and the diagonal, are NaN
+        items = self.top_items() if items is None else list(items)
+        codes = np.array([self.codes[item] for item in items], dtype=np.intp)
+        position = np.full(len(self.items), -1, dtype=np.intp)
+        position[codes] = np.arange(len(codes))
+        rows = np.flatnonzero((position[self.antecedent] >= 0) & (position[self.consequent] >= 0) & self._mask(min_support))
+        grid = np.full((len(codes), len(codes)), np.nan)
+        grid[position[self.antecedent[rows]], position[self.consequent[rows]]] = self.metrics[metric][rows]
+        return pd.DataFrame(grid, index=items, columns=items)
+
+
+@st.cache_resource(max_entries=4, show_spinner="Counting item pairs...")
+def _cached_pair_matrix(file_path, grouping, fingerprint):
+    matrix, items, _ = get_basket_matrix(file_path, grouping=grouping)
+    return PairMatrix(matrix, items)
+
+
+def get_pair_matrix(file_path=DATASET_PATH, grouping="member"):
+    # One read-only PairMatrix per dataset version and grouping, shared by every session
+    return _cached_pair_matrix(file_path, grouping, dataset_fingerprint(file_path))
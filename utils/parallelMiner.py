@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.bitsetMiner import as_matrix, count_itemsets, levels_to_frame, mine_bitsets, pack_item_bitsets
+
+# Multi-core frequent itemset mining following Savasere, Omiecinski and Navathe (SON):
+#   1. split the baskets into partitions and mine each one locally in a process pool;
+#      anything globally frequent is frequent in at least one partition
+#   2. count the union of the local results over every partition in a second parallel
+#      pass and keep the candidates that are frequent overall
+
+# Worker processes used when none are given (override with GROCERIES_MINING_WORKERS)
+DEFAULT_WORKERS = int(os.environ.get("GROCERIES_MINING_WORKERS", os.cpu_count() or 1))
+
+# Local threshold slack so float rounding can never drop a globally frequent itemset
+LOCAL_SUPPORT_SLACK = 1e-9
+
+# Smallest local support count a partition may mine at. Below a handful of baskets
+# almost every subset of every basket is locally frequent, so fewer, larger
+# partitions are used instead (down to mining the whole matrix at once).
+MIN_LOCAL_COUNT = 25
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers):
+    # One pool per server process, rebuilt only when the worker count changes.
+    # Forking the multi-threaded Streamlit / pyarrow process can deadlock the
+    # children, so workers come from a clean forkserver (spawn where unavailable).
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _executor_workers = workers
+        return _executor
+
+
+def _mine_partition(matrix, min_support, max_len):
+    levels = mine_bitsets(matrix, min_support * (1 - LOCAL_SUPPORT_SLACK), max_len=max_len)
+    return [codes for codes, _ in levels if len(codes)]
+
+
+def _count_partition(matrix, candidates_by_size):
+    bits = pack_item_bitsets(matrix)
+    return [count_itemsets(bits, candidates) for candidates in candidates_by_size]
+
+
+def _partitions(matrix, parts):
+    bounds = np.linspace(0, matrix.shape[0], parts + 1).astype(int)
+    return [matrix[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def son_mine(matrix, min_support, max_len=None, workers=None, partitions=None, progress=None):
+    # Level-by-level (itemsets, counts) pairs, identical to mine_bitsets on the whole matrix.
+    # progress is called like mine_bitsets does, plus unit="partitions" after each partition
+    # result of either pass; it may raise to stop the run (partitions already running in
+    # the pool still finish there, the rest are cancelled).
+    workers = workers or DEFAULT_WORKERS
+    max_parts = int(matrix.shape[0] * min_support // MIN_LOCAL_COUNT)
+    parts = _partitions(matrix, max(1, min(partitions or workers, max_parts)))
+    if workers <= 1 or len(parts) <= 1:
+        return mine_bitsets(matrix, min_support, max_len=max_len, progress=progress)
+
+    executor = get_executor(workers)
+
+    # Pass 1: local frequent itemsets of every partition
+    local = executor.map(_mine_partition, parts, [min_support] * len(parts), [max_len] * len(parts))
+    by_size = {}
+    for done, levels in enumerate(local, start=1):
+        for codes in levels:
+            by_size.setdefault(codes.shape[1], []).append(codes)
+        if progress is not None:
+            progress(1, done, len(parts), [], unit="partitions mined")
+    if not by_size:
+        return [(np.empty((0, 1), dtype=np.intp), np.empty(0, dtype=np.int64))]
+
+    # Sorted rows keep the same level / lexicographic order as the single-core miners
+    sizes = sorted(by_size)
+    candidates = [np.unique(np.concatenate(by_size[size]), axis=0) for size in sizes]
+
+    # Pass 2: global support of the candidates, summed over the partitions
+    totals = [np.zeros(len(c), dtype=np.int64) for c in candidates]
+    for done, counts in enumerate(executor.map(_count_partition, parts, [candidates] * len(parts)), start=1):
+        for total, count in zip(totals, counts):
+            total += count
+        if progress is not None:
+            progress(2, done, len(parts), [], unit="partitions counted")
+
+    levels = []
+    for codes, counts in zip(candidates, totals):
+        keep = counts / matrix.shape[0] >= min_support
+        if keep.any():
+            levels.append((codes[keep], counts[keep]))
+    return levels or [(np.empty((0, 1), dtype=np.intp), np.empty(0, dtype=np.int64))]
+
+
+def son_apriori(df, min_support=0.5, use_colnames=False, max_len=None, workers=None, partitions=None, progress=None):
+    # Drop-in for mlxtend's apriori that spreads the work over a process pool
+    if min_support <= 0.0 or min_support > 1.0:
+        raise ValueError(f"`min_support` must be a positive number within the interval `(0, 1]`. Got {min_support}.")
+    matrix = as_matrix(df)
+    levels = son_mine(matrix, min_support, max_len=max_len, workers=workers, partitions=partitions, progress=progress)
+    return levels_to_frame(levels, matrix.shape[0], list(df.columns) if use_colnames else None)
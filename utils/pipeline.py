@@ -0,0 +1,110 @@
+import time
+
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, load_basket_matrix
+from utils.encoder import to_one_hot
+from utils.mining import generate_rules, mine_frequent_itemsets
+
+# The mining pipeline the pages run (load, clean, group, encode, mine, rules) without any
+# Streamlit calls in between, so batch jobs can reuse it.
+
+
+def run_pipeline(
+    file_path=DATASET_PATH,
+    grouping="member",
+    min_support=0.1,
+    min_confidence=0.5,
+    min_lift=None,
+    engine="apriori",
+    closed=False,
+    workers=None,
+    max_len=None,
+    budget_mb=None,
+):
+    timings = {}
+
+    start = time.perf_counter()
+    matrix, items, baskets = load_basket_matrix(file_path, grouping)
+    one_hot = to_one_hot(matrix, items)
+    timings["load_and_encode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frequent_itemsets = mine_frequent_itemsets(
+        one_hot, min_support, engine=engine, closed=closed, max_len=max_len, workers=workers, budget_mb=budget_mb
+    )
+    timings["mine"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rules = generate_rules(frequent_itemsets, min_confidence, one_hot)
+    if min_lift:
+        rules = rules[rules["lift"] >= min_lift].reset_index(drop=True)
+    timings["rules"] = time.perf_counter() - start
+
+    meta = {
+        "source": file_path,
+        "fingerprint": dataset_fingerprint(file_path),
+        "grouping": grouping,
+        "baskets": int(matrix.shape[0]),
+        "items": int(matrix.shape[1]),
+        "min_support": min_support,
+        "min_confidence": min_confidence,
+        "min_lift": min_lift,
+        "engine": engine,
+        "closed": closed,
+        "compact": frequent_itemsets.attrs.get("compact"),
+        # The memory guard may have lowered max_len; artifacts with one are not served to the pages
+        "max_len": frequent_itemsets.attrs.get("max_len", max_len),
+        "capped": frequent_itemsets.attrs.get("capped") or None,
+        "itemset_count": int(len(frequent_itemsets)),
+        "rule_count": int(len(rules)),
+        "timings": timings,
+    }
+    return frequent_itemsets, rules, meta
+
+
+def run_incremental_pipeline(
+    file_path=DATASET_PATH,
+    grouping="member",
+    min_support=0.1,
+    min_confidence=0.5,
+    min_lift=None,
+    engine="apriori",
+    max_len=None,
+    state_dir=None,
+):
+    # Same outputs as run_pipeline, but the itemsets come from the saved FUP state updated
+    # with the rows appended since the last run. They are the complete frequent itemsets,
+    # so the result stands in for any engine that returns all of them (not fpmax / closed).
+    from utils.incrementalMiner import STATE_DIR, refresh
+
+    timings = {}
+
+    start = time.perf_counter()
+    miner = refresh(file_path, grouping, min_support, max_len, root=state_dir or STATE_DIR)
+    frequent_itemsets = miner.frequent_itemsets()
+    timings["refresh"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rules = generate_rules(frequent_itemsets, min_confidence, None, n_baskets=miner.n_baskets)
+    if min_lift:
+        rules = rules[rules["lift"] >= min_lift].reset_index(drop=True)
+    timings["rules"] = time.perf_counter() - start
+
+    meta = {
+        "source": file_path,
+        "fingerprint": dataset_fingerprint(file_path),
+        "grouping": grouping,
+        "baskets": int(miner.n_baskets),
+        "items": len(miner.items),
+        "min_support": min_support,
+        "min_confidence": min_confidence,
+        "min_lift": min_lift,
+        "engine": engine,
+        "incremental": miner.last_update,
+        "closed": False,
+        "compact": None,
+        "max_len": max_len,
+        "itemset_count": int(len(frequent_itemsets)),
+        "rule_count": int(len(rules)),
+        "timings": timings,
+    }
+    return frequent_itemsets, rules, meta
@@ -0,0 +1,144 @@
+import math
+import os
+
+import numpy as np
+from scipy import sparse
+
+from utils.bitsetMiner import BATCH_SIZE, as_matrix
+
+# Pre-flight check of a mining run: how many candidates each Apriori level will count and
+# roughly how much memory the engine needs for them, predicted from cheap counts before
+# anything is mined. Level 1 and level 2 are exact (item counts and the item
+# co-occurrence matrix); deeper levels are extrapolated from how the first two behaved,
+# so they are estimates, not bounds. plan_mining compares the prediction with the memory
+# budget and caps the run (low_memory for mlxtend's apriori, then a smaller max_len) or
+# refuses it, so one low support slider cannot take the shared server process down.
+
+# Memory a single mining run may use, in MB (0 turns the check off)
+MEMORY_BUDGET_MB = int(os.environ.get("GROCERIES_MEMORY_BUDGET_MB", "2048"))
+
+# Above this many candidate pairs the pair counts are estimated instead of counted
+EXACT_PAIR_LIMIT = 5_000_000
+
+# Rough per-object sizes used by the estimates
+FROZENSET_BYTES = 250
+FP_NODE_BYTES = 300
+SPARSE_ENTRY_BYTES = 13
+
+
+class MemoryBudgetError(ValueError):
+    pass
+
+
+def _pair_degrees(matrix, frequent, min_count):
+    # For each frequent item (in code order), how many later frequent items it forms a
+    # frequent pair with: the sizes of the blocks join_candidates pairs up at level 3
+    n_frequent = len(frequent)
+    if n_frequent * (n_frequent - 1) // 2 <= EXACT_PAIR_LIMIT:
+        sub = sparse.csc_matrix(matrix[:, frequent], dtype=np.int32)
+        pairs = sparse.triu(sub.T @ sub, k=1).tocoo()
+        rows = pairs.row[pairs.data >= min_count]
+        return np.bincount(rows, minlength=n_frequent)
+    # Independence estimate: a pair is taken as frequent when p_i * p_j reaches the support
+    n_rows = matrix.shape[0]
+    support = np.asarray(matrix[:, frequent].sum(axis=0)).ravel() / n_rows
+    order = np.sort(support)
+    needed = (min_count / n_rows) / support
+    partners = len(order) - np.searchsorted(order, needed, side="left") - (support * support >= min_count / n_rows)
+    return np.maximum(partners, 0) // 2
+
+
+def estimate_levels(one_hot, min_support, max_len=None):
+    # [{"size", "candidates", "frequent"}] per Apriori level, levels 3+ extrapolated
+    matrix = as_matrix(one_hot)
+    n_rows, n_items = matrix.shape
+    min_count = math.ceil(min_support * n_rows - 1e-9)
+    item_counts = np.asarray(matrix.sum(axis=0)).ravel()
+    frequent = np.flatnonzero(item_counts >= min_count)
+    levels = [{"size": 1, "candidates": n_items, "frequent": len(frequent)}]
+    if len(frequent) < 2 or max_len == 1:
+        return levels
+
+    degrees = _pair_degrees(matrix, frequent, min_count)
+    candidates = len(frequent) * (len(frequent) - 1) // 2
+    n_pairs = int(degrees.sum())
+    levels.append({"size": 2, "candidates": candidates, "frequent": n_pairs})
+
+    # Level 3 candidates are exact from the pair blocks; past that each level is taken to
+    # pass the same share of its candidates as the last one, and to join like level 2 did
+    next_candidates = int((degrees * (degrees - 1) // 2).sum())
+    hit_rate = n_pairs / candidates
+    previous, current = len(frequent), n_pairs
+    size = 3
+    while next_candidates > 0 and (max_len is None or size <= max_len) and size <= len(frequent):
+        frequent_count = max(0, int(next_candidates * hit_rate))
+        levels.append({"size": size, "candidates": next_candidates, "frequent": frequent_count})
+        if frequent_count < 2:
+            break
+        if current:
+            hit_rate = min(1.0, frequent_count / next_candidates)
+        previous, current = current, frequent_count
+        next_candidates = int(current * (current / max(previous, 1)) / 2)
+        size += 1
+    return levels
+
+
+def estimate_memory(one_hot, levels, engine="apriori", low_memory=False):
+    # Peak bytes a run is expected to allocate, from estimate_levels
+    matrix = as_matrix(one_hot)
+    n_rows, n_items = matrix.shape
+    column_entries = matrix.nnz / max(n_items, 1)
+    results = sum(level["frequent"] for level in levels) * FROZENSET_BYTES
+    is_sparse = hasattr(one_hot, "sparse")
+
+    if engine in ("bitset", "son"):
+        words = max(1, -(-n_rows // 64)) * 8
+        kept = max(level["frequent"] for level in levels)
+        # the item bitsets, a level's bitsets while the next one is stacked, and one batch
+        working = n_items * words + 3 * kept * words + 3 * BATCH_SIZE * words
+    elif engine in ("fpgrowth", "fpmax"):
+        working = matrix.nnz * FP_NODE_BYTES
+    elif low_memory:
+        # Candidates are counted one prefix at a time, over dense columns of the basket matrix
+        working = 2 * n_rows * n_items + matrix.nnz * SPARSE_ENTRY_BYTES + max(level["frequent"] * level["size"] * 8 for level in levels)
+    elif is_sparse:
+        # mlxtend compares every candidate's columns at once, into dense (rows x candidates)
+        # boolean arrays, three of them alive while the items of a candidate are ANDed
+        working = max(
+            level["candidates"] * (3 * n_rows + level["size"] * 8 + column_entries * SPARSE_ENTRY_BYTES)
+            for level in levels
+        )
+    else:
+        working = max(level["candidates"] * (n_rows * (level["size"] + 1) + level["size"] * 8) for level in levels)
+    return int(working + results)
+
+
+def plan_mining(one_hot, min_support, engine="apriori", max_len=None, budget_mb=None):
+    # Options for the run that keep it inside the budget:
+    #   {"max_len", "low_memory", "estimated_mb", "capped"}
+    # capped describes what was given up ("" when nothing was). Raises MemoryBudgetError
+    # when even the smallest run would not fit.
+    budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    levels = estimate_levels(one_hot, min_support, max_len)
+    estimated = estimate_memory(one_hot, levels, engine) / 2**20
+    plan = {"max_len": max_len, "low_memory": False, "estimated_mb": estimated, "capped": ""}
+    if not budget_mb or estimated <= budget_mb:
+        return plan
+
+    if engine == "apriori":
+        estimated = estimate_memory(one_hot, levels, engine, low_memory=True) / 2**20
+        if estimated <= budget_mb:
+            return {**plan, "low_memory": True, "estimated_mb": estimated, "capped": "apriori's low-memory mode"}
+
+    low_memory = engine == "apriori"
+    for size in range(len(levels) - 1, 0, -1):
+        estimated = estimate_memory(one_hot, levels[:size], engine, low_memory=low_memory) / 2**20
+        if estimated <= budget_mb:
+            return {
+                "max_len": size, "low_memory": low_memory, "estimated_mb": estimated,
+                "capped": f"itemsets of at most {size} items",
+            }
+    raise MemoryBudgetError(
+        f"Mining at a minimum support of {min_support:g} would need about {plan['estimated_mb']:,.0f} MB, "
+        f"over the {budget_mb:,} MB budget. Raise the minimum support, or use the top-K mode on the pages."
+    )
@@ -0,0 +1,322 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import streamlit as st
+
+from utils.artifacts import load_artifact_itemsets, load_artifact_rules
+from utils.instrumentation import stage
+from utils.mining import generate_rules, mine_frequent_itemsets
+from utils.ruleIndex import RuleIndex
+from utils.sampleMiner import sample_mine
+from utils.topkMiner import top_k_itemsets
+
+# Number of (dataset, grouping, engine) results kept before the least recently used is evicted
+MAX_ENTRIES = 16
+
+# Windows kept by the windowed mining cache (a few years of months for a couple of settings)
+WINDOW_ENTRIES = 128
+
+# Memory the cached frames may take before the least recently used entries are evicted
+MAX_BYTES = int(os.environ.get("GROCERIES_RESULT_CACHE_MB", "512")) << 20
+
+# Rule sets kept per entry (each mined at a different support/confidence pair)
+MAX_RULE_SETS = 4
+
+# Engines whose itemsets at a higher support are exactly a filter of the itemsets at a
+# lower support. Maximal itemsets (fpmax) are not, so those only hit on an exact match.
+MONOTONE_ENGINES = {"apriori", "fpgrowth", "bitset", "son"}
+
+
+def mining_key(fingerprint, grouping, engine="apriori", closed=False):
+    return (fingerprint, grouping, engine, closed)
+
+
+def _answers(engine, cached_support, min_support):
+    # Whether a result mined at cached_support can answer a request at min_support
+    return cached_support == min_support or (engine in MONOTONE_ENGINES and cached_support <= min_support)
+
+
+def _capped_key(key):
+    # Where results the memory guard capped are kept, apart from the full ones
+    return key + ("capped",)
+
+
+def _filter_itemsets(frequent_itemsets, min_support):
+    filtered = frequent_itemsets[frequent_itemsets["support"] >= min_support].reset_index(drop=True)
+    filtered.attrs = dict(frequent_itemsets.attrs)
+    return filtered
+
+
+def _filter_rules(rules, min_support, min_confidence):
+    keep = (rules["support"] >= min_support) & (rules["confidence"] >= min_confidence)
+    return rules[keep].reset_index(drop=True)
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+class MiningCache:
+    # Mining results keyed on (dataset fingerprint, grouping, engine, closed).
+    # A request at a support/confidence at or above a cached one is answered by
+    # filtering the cached result; only going below the cached threshold re-mines.
+    #
+    # The cache is shared by every session of the server process. Callers always get
+    # a filtered copy, never the cached frame itself, and the least recently used
+    # entries go once there are more than max_entries or they hold more than max_bytes.
+    # Misses run through in_flight, so sessions asking for the same thing at the same
+    # time wait for one computation instead of each starting their own.
+    #
+    # Results the memory guard capped are kept under their own key and never replace or
+    # stand in for full ones.
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Requests answered by waiting on another session's computation
+        self.shared = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        # Support reached by the k most frequent itemsets, per (key, k)
+        self._top_k = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _slots(self, key):
+        # (entry, whether it answers higher supports) for the full result, then the capped one.
+        # A result the memory guard capped (a lower max_len) is kept apart and only answers
+        # the same support again: at a higher support the run may fit uncapped.
+        full = self._entry(key)
+        capped = self._entry(_capped_key(key))
+        return [(entry, monotone) for entry, monotone in [(full, True), (capped, False)] if entry is not None]
+
+    def get_itemsets(self, key, min_support):
+        engine = key[2]
+        with self._lock:
+            for entry, monotone in self._slots(key):
+                if _answers(engine if monotone else None, entry["min_support"], min_support):
+                    self.hits += 1
+                    return _filter_itemsets(entry["itemsets"], min_support)
+            return None
+
+    def _evict(self):
+        # The newest entry stays even when it alone is over max_bytes. Top-K supports go
+        # with the entry whose itemsets they point at.
+        while len(self._entries) > self.max_entries or (self.bytes > self.max_bytes and len(self._entries) > 1):
+            key, entry = self._entries.popitem(last=False)
+            self.bytes -= entry["bytes"]
+            for top_k_key in [top_k_key for top_k_key in self._top_k if top_k_key[0] == key]:
+                del self._top_k[top_k_key]
+
+    def count_miss(self):
+        # Called by whoever computes a result the cache could not answer
+        with self._lock:
+            self.misses += 1
+
+    def put_itemsets(self, key, min_support, frequent_itemsets):
+        size = _frame_bytes(frequent_itemsets)
+        capped = bool(frequent_itemsets.attrs.get("capped"))
+        key = _capped_key(key) if capped else key
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or capped or key[2] not in MONOTONE_ENGINES or min_support <= entry["min_support"]:
+                # Rule sets stay valid: each one remembers the support it was mined at
+                rules = entry["rules"] if entry is not None else []
+                new_entry = {"min_support": min_support, "itemsets": frequent_itemsets, "itemset_bytes": size, "rules": rules}
+                new_entry["bytes"] = size + sum(rule_set[3] for rule_set in rules)
+                self.bytes += new_entry["bytes"] - (entry["bytes"] if entry is not None else 0)
+                self._entries[key] = new_entry
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_rules(self, key, min_support, min_confidence):
+        engine = key[2]
+        with self._lock:
+            for entry, monotone in self._slots(key):
+                for cached_support, cached_confidence, rules, _ in entry["rules"]:
+                    if _answers(engine if monotone else None, cached_support, min_support) and cached_confidence <= min_confidence:
+                        self.hits += 1
+                        return _filter_rules(rules, min_support, min_confidence)
+            return None
+
+    def put_rules(self, key, min_support, min_confidence, rules, capped=False):
+        # capped: the rules come from itemsets the memory guard capped
+        size = _frame_bytes(rules)
+        key = _capped_key(key) if capped else key
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            # Drop rule sets the new one can answer for, newest first
+            kept = [
+                rule_set for rule_set in entry["rules"]
+                if not (min_support <= rule_set[0] and min_confidence <= rule_set[1])
+            ]
+            entry["rules"] = [(min_support, min_confidence, rules, size)] + kept[:MAX_RULE_SETS - 1]
+            before = entry["bytes"]
+            entry["bytes"] = entry["itemset_bytes"] + sum(rule_set[3] for rule_set in entry["rules"])
+            self.bytes += entry["bytes"] - before
+            self._evict()
+
+    def get_top_k_support(self, key, k):
+        with self._lock:
+            return self._top_k.get((key, k))
+
+    def put_top_k_support(self, key, k, min_support):
+        # Only kept while the itemsets it points at are (see _evict)
+        with self._lock:
+            if key in self._entries:
+                self._top_k[(key, k)] = min_support
+
+    def in_flight(self, flight, compute, *args):
+        # compute(*args), unless the same flight (a tuple naming the request) is already
+        # running in another session: then wait for it and return its result
+        with self._lock:
+            future = self._inflight.get(flight)
+            owner = future is None
+            if owner:
+                future = self._inflight[flight] = Future()
+            else:
+                self.shared += 1
+        if not owner:
+            result = future.result()
+            # None: the session computing it was stopped (e.g. rerun) before it finished
+            return compute(*args) if result is None else result
+        try:
+            result = compute(*args)
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        except BaseException:
+            future.set_result(None)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._inflight.pop(flight, None)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._top_k.clear()
+            self.hits = 0
+            self.misses = 0
+            self.shared = 0
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource
+def get_mining_cache():
+    # One cache per server process, shared by every session
+    return MiningCache()
+
+
+@st.cache_resource
+def get_window_cache():
+    # Per-window results of the drift page, kept apart so they do not evict the full-range ones
+    return MiningCache(max_entries=WINDOW_ENTRIES)
+
+
+def _compute_itemsets(cache, key, one_hot, min_support, engine, closed, workers, progress):
+    cache.count_miss()
+    # Precomputed results from mine.py are used before mining in the page
+    fingerprint, grouping = key[0], key[1]
+    frequent_itemsets = load_artifact_itemsets(
+        fingerprint, grouping, engine, closed, min_support, engine in MONOTONE_ENGINES
+    )
+    if frequent_itemsets is None:
+        frequent_itemsets = mine_frequent_itemsets(
+            one_hot, min_support, engine=engine, closed=closed, workers=workers, progress=progress
+        )
+    cache.put_itemsets(key, min_support, frequent_itemsets)
+    return frequent_itemsets
+
+
+def cached_itemsets(key, one_hot, min_support, engine="apriori", closed=False, workers=None, cache=None, progress=None):
+    # progress is passed on to the miner (see mine_frequent_itemsets) when this call mines
+    cache = get_mining_cache() if cache is None else cache
+    with stage("frequent itemsets"):
+        frequent_itemsets = cache.get_itemsets(key, min_support)
+        if frequent_itemsets is None:
+            frequent_itemsets = cache.in_flight(
+                ("itemsets", key, min_support), _compute_itemsets, cache, key, one_hot, min_support, engine, closed, workers,
+                progress,
+            )
+            frequent_itemsets = _filter_itemsets(frequent_itemsets, min_support)
+        return frequent_itemsets
+
+
+def _compute_top_k(cache, key, one_hot, k):
+    cache.count_miss()
+    frequent_itemsets = top_k_itemsets(one_hot, k)
+    cache.put_itemsets(key, frequent_itemsets.attrs["min_support"], frequent_itemsets)
+    cache.put_top_k_support(key, k, frequent_itemsets.attrs["min_support"])
+    return frequent_itemsets
+
+
+def cached_top_k(key, one_hot, k, cache=None):
+    # The k most frequent itemsets (more on ties) and the support of the k-th. They are
+    # exactly the frequent itemsets at that support, so they go into the cache as such:
+    # key should name a monotone engine, and the same rules cache serves them.
+    cache = get_mining_cache() if cache is None else cache
+    with stage("top-k itemsets"):
+        min_support = cache.get_top_k_support(key, k)
+        frequent_itemsets = None if min_support is None else cache.get_itemsets(key, min_support)
+        if frequent_itemsets is None:
+            frequent_itemsets = cache.in_flight(("top_k", key, k), _compute_top_k, cache, key, one_hot, k)
+            min_support = frequent_itemsets.attrs["min_support"]
+            frequent_itemsets = _filter_itemsets(frequent_itemsets, min_support)
+        return frequent_itemsets, min_support
+
+
+def _compute_rules(cache, key, frequent_itemsets, one_hot, min_support, min_confidence):
+    cache.count_miss()
+    fingerprint, grouping, engine, closed = key
+    rules = load_artifact_rules(
+        fingerprint, grouping, engine, closed, min_support, min_confidence, engine in MONOTONE_ENGINES
+    )
+    if rules is None:
+        rules = generate_rules(frequent_itemsets, min_confidence, one_hot)
+    cache.put_rules(key, min_support, min_confidence, rules, capped=bool(frequent_itemsets.attrs.get("capped")))
+    return rules
+
+
+def cached_rules(key, frequent_itemsets, one_hot, min_support, min_confidence, cache=None):
+    cache = get_mining_cache() if cache is None else cache
+    with stage("rules"):
+        rules = cache.get_rules(key, min_support, min_confidence)
+        if rules is None:
+            rules = cache.in_flight(
+                ("rules", key, min_support, min_confidence),
+                _compute_rules, cache, key, frequent_itemsets, one_hot, min_support, min_confidence,
+            )
+            rules = _filter_rules(rules, min_support, min_confidence)
+        return rules
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def cached_sample(key, min_support, min_confidence, sample_size, verify, seed, _one_hot):
+    # Approximate results are kept out of the MiningCache, which only holds exact ones
+    with stage("sampled mining"):
+        return sample_mine(_one_hot, min_support, min_confidence, sample_size, verify=verify, seed=seed)
+
+
+@st.cache_resource(max_entries=MAX_ENTRIES)
+def get_rule_index(key, min_support, min_confidence, metric, _rules):
+    # Compiled recommendation index for the rules mined under key at these thresholds
+    return RuleIndex(_rules, metric=metric)
@@ -0,0 +1,140 @@
+import numpy as np
+
+# Compiled lookup structure for "given this cart, what should we suggest".
+# Every rule is split into one row per consequent item. The antecedent of each row is
+# stored as a packed uint64 bitmask over the item vocabulary, and an inverted index
+# maps items to rows. Each row is posted once, under the rarest item of its antecedent
+# (a rule can only fire when that item is in the cart), so a query scans short,
+# contiguous postings and keeps the rows whose antecedent is a subset of the cart,
+# i.e. (antecedent & ~cart) == 0 word by word.
+
+METRICS = ["lift", "confidence"]
+
+
+def _pack(codes, n_words):
+    mask = np.zeros(n_words, dtype=np.uint64)
+    for code in codes:
+        mask[code >> 6] |= np.uint64(1) << np.uint64(code & 63)
+    return mask
+
+
+class RuleIndex:
+
+    def __init__(self, rules, metric="lift"):
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+        self.metric = metric
+        self.n_rules = len(rules)
+
+        antecedents = list(rules["antecedents"])
+        consequents = list(rules["consequents"])
+        # Kept for explain, so callers never look rule ids up in a frame of their own
+        self.antecedents = antecedents
+        self.items = sorted(set().union(*antecedents, *consequents)) if self.n_rules else []
+        self.codes = {item: code for code, item in enumerate(self.items)}
+        self.n_words = max(1, -(-len(self.items) // 64))
+
+        rows_rule, rows_item = [], []
+        for rule, consequent in enumerate(consequents):
+            for item in consequent:
+                rows_rule.append(rule)
+                rows_item.append(self.codes[item])
+        rows_rule = np.asarray(rows_rule, dtype=np.intp)
+
+        # Rows are stored best score first, so ascending row ids are descending scores
+        scores = rules[metric].to_numpy(dtype=float)[rows_rule] if len(rows_rule) else np.empty(0)
+        order = np.argsort(-scores, kind="stable")
+        self.rule_ids = rows_rule[order]
+        self.consequents = np.asarray(rows_item, dtype=np.intp)[order]
+        self.scores = scores[order]
+        self.confidence = rules["confidence"].to_numpy(dtype=float)[self.rule_ids]
+        self.lift = rules["lift"].to_numpy(dtype=float)[self.rule_ids]
+
+        rule_masks = np.array(
+            [_pack([self.codes[item] for item in antecedent], self.n_words) for antecedent in antecedents],
+            dtype=np.uint64,
+        ).reshape(self.n_rules, self.n_words)
+
+        # Post each row under its least common antecedent item, grouped by item and in
+        # score order within an item, so each posting is a contiguous slice
+        frequency = np.zeros(len(self.items), dtype=np.int64)
+        for antecedent in antecedents:
+            for item in antecedent:
+                frequency[self.codes[item]] += 1
+        anchors = np.array(
+            [min((self.codes[item] for item in antecedent), key=frequency.__getitem__) for antecedent in antecedents],
+            dtype=np.intp,
+        )[self.rule_ids] if self.n_rules else np.empty(0, dtype=np.intp)
+        by_anchor = np.argsort(anchors, kind="stable")
+        self.posting_rows = by_anchor
+        # Word-major (n_words, rows) so the subset test is a few flat AND / OR passes
+        self.posting_masks = np.ascontiguousarray(rule_masks[self.rule_ids[by_anchor]].T)
+        self.bounds = np.searchsorted(anchors[by_anchor], np.arange(len(self.items) + 1))
+
+    def __len__(self):
+        return len(self.consequents)
+
+    def basket_codes(self, basket):
+        return [self.codes[item] for item in basket if item in self.codes]
+
+    def matching_rows(self, codes):
+        # Rows whose whole antecedent is inside the basket, best score first.
+        # The postings of every basket item are gathered in one go (no loop over items).
+        codes = np.asarray(codes, dtype=np.intp)
+        starts = self.bounds[codes]
+        lengths = self.bounds[codes + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.intp)
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        positions = offsets + np.arange(total)
+        outside = ~_pack(codes.tolist(), self.n_words)
+        missing = self.posting_masks[0][positions] & outside[0]
+        for word in range(1, self.n_words):
+            missing |= self.posting_masks[word][positions] & outside[word]
+        return np.sort(self.posting_rows[positions[missing == 0]])
+
+    def best_rows(self, basket, k=5):
+        # Rows behind the top-k suggestions. An item's score is the best score of any
+        # matching rule that predicts it; items already in the basket are skipped.
+        codes = self.basket_codes(basket)
+        rows = self.matching_rows(codes)
+        # rows are in descending score order, so the first row of each item is its best
+        seen, best = set(codes), []
+        for row, item in zip(rows.tolist(), self.consequents[rows].tolist()):
+            if item not in seen:
+                seen.add(item)
+                best.append(row)
+                if len(best) == k:
+                    break
+        return best
+
+    def recommend(self, basket, k=5):
+        # Top-k (item, score) suggestions for the basket
+        return [(self.items[self.consequents[row]], float(self.scores[row])) for row in self.best_rows(basket, k)]
+
+    def explain(self, basket, k=5):
+        # Same as recommend, with the rule behind each suggestion: its position in the rules
+        # the index was built from, and its antecedent
+        return [
+            {
+                "item": self.items[self.consequents[row]],
+                "rule": int(self.rule_ids[row]),
+                "antecedent": self.antecedents[self.rule_ids[row]],
+                "confidence": float(self.confidence[row]),
+                "lift": float(self.lift[row]),
+            }
+            for row in self.best_rows(basket, k)
+        ]
+
+
+def linear_recommend(rules, basket, k=5, metric="lift"):
+    # Reference scan of the rules DataFrame, used to check and benchmark the index
+    basket = set(basket)
+    best = {}
+    for antecedent, consequent, score in zip(rules["antecedents"], rules["consequents"], rules[metric]):
+        if antecedent <= basket:
+            for item in consequent - basket:
+                if score > best.get(item, -np.inf):
+                    best[item] = score
+    return sorted(best.items(), key=lambda pair: -pair[1])[:k]
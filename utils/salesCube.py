@@ -0,0 +1,270 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.dataLoader import CACHE_DIR, DATASET_PATH, dataset_fingerprint
+from utils.instrumentation import stage
+from utils.transactionStore import load_transaction_store
+
+# Pre-aggregated sales over time for the sales charts. The cleaned rows are unique
+# (member, day, item) triples, so everything the charts need can be counted once per
+# dataset version and kept as a handful of small tables:
+#   day         date -> items sold, distinct customers (plus its week / month start)
+#   week, month period start -> items sold, distinct customers
+#   item_day    (item, date) -> items sold, sorted by item then date
+#   member_day  (date, member) -> items bought, sorted by date then member
+#   member      member -> items bought over the whole dataset
+# The tables are written next to the dataset snapshot as Parquet. Queries slice them
+# with binary searches on the sorted dates / items, so a date range or a single item
+# costs the size of the answer rather than a pass over the rows.
+
+# Time series granularities; week and month rows are keyed by the period's first day
+LEVELS = {"day": None, "week": "W", "month": "M"}
+
+TABLES = ["items", "day", "week", "month", "item_day", "member_day", "member"]
+
+
+def _count_pairs(major, minor, n_minor, weights=None):
+    # Distinct (major, minor) pairs sorted by major then minor, with their counts / weight sums
+    keys, inverse = np.unique(major.astype(np.int64) * n_minor + minor, return_inverse=True)
+    counts = np.bincount(inverse, weights=weights).astype(np.int64)
+    return keys // n_minor, keys % n_minor, counts
+
+
+def build_cube(member_codes, day_codes, item_codes, day_values, items):
+    # Tables from de-duplicated (member, day, item) code triples; rows without a date are left out
+    day_values = pd.DatetimeIndex(day_values)
+    keep = (day_codes >= 0) & ~np.asarray(day_values.isna())[day_codes]
+    member_codes, day_codes, item_codes = member_codes[keep], day_codes[keep], item_codes[keep]
+
+    # Re-number the dates that are left so they stay in calendar order
+    used = np.unique(day_codes)
+    dates = day_values[used]
+    order = np.argsort(dates.asi8, kind="stable")
+    remap = np.empty(len(day_values), dtype=np.int64)
+    remap[used[order]] = np.arange(len(used))
+    day_codes, dates = remap[day_codes], dates[order]
+    n_days = len(dates)
+    n_members = int(member_codes.max()) + 1 if len(member_codes) else 1
+
+    tables = {"items": pd.DataFrame({"item": pd.Index(items).astype(str)})}
+
+    item, item_day, sold = _count_pairs(item_codes, day_codes, max(n_days, 1))
+    tables["item_day"] = pd.DataFrame({"item": item.astype(np.int32), "date": dates[item_day], "sold": sold})
+
+    day, member, bought = _count_pairs(day_codes, member_codes, n_members)
+    tables["member_day"] = pd.DataFrame({"date": dates[day], "member": member, "items": bought})
+
+    members = np.unique(member)
+    tables["member"] = pd.DataFrame({"member": members, "items": np.bincount(member, weights=bought, minlength=n_members).astype(np.int64)[members]})
+
+    day_table = pd.DataFrame({
+        "date": dates,
+        "sold": np.bincount(day_codes, minlength=n_days),
+        "customers": np.bincount(day, minlength=n_days),
+    })
+    for level, freq in LEVELS.items():
+        if freq is None:
+            continue
+        starts = dates.to_period(freq).start_time
+        day_table[level] = starts
+        period_codes, periods = pd.factorize(starts, sort=True)
+        period_of_row = period_codes[day]
+        # Distinct customers of a week / month, not the sum of the daily counts
+        customers = np.bincount(np.unique(period_of_row * n_members + member) // n_members, minlength=len(periods))
+        tables[level] = pd.DataFrame({
+            "date": periods,
+            "sold": np.bincount(period_codes, weights=day_table["sold"], minlength=len(periods)).astype(np.int64),
+            "customers": customers,
+        })
+    tables["day"] = day_table
+    return tables
+
+
+def cube_from_frame(data):
+    # Tables from the cleaned dataset (clean_data output)
+    member_codes, _ = pd.factorize(data["Member_number"], sort=True)
+    day_codes, day_values = pd.factorize(data["Date"], sort=True)
+    items = data["itemDescription"].astype("category")
+    return build_cube(member_codes, day_codes, items.cat.codes.to_numpy(np.int64), day_values, items.cat.categories)
+
+
+def cube_from_store(store):
+    # Tables from the integer-coded transaction store
+    member_codes, day_codes, item_codes = store.entry_codes()
+    return build_cube(member_codes, day_codes.astype(np.int64), item_codes, store.day_values, store.items)
+
+
+class SalesCube:
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.items = tables["items"]["item"].to_numpy()
+
+        day = tables["day"]
+        self.dates = day["date"].to_numpy("datetime64[ns]")
+        self.day_sold = day["sold"].to_numpy()
+        self.day_customers = day["customers"].to_numpy()
+        # Per level: period code of every day, the periods' first days and their rolled-up rows
+        self.periods = {}
+        for level, freq in LEVELS.items():
+            if freq is None:
+                continue
+            codes, starts = pd.factorize(day[level], sort=True)
+            first = np.searchsorted(codes, np.arange(len(starts)))
+            self.periods[level] = (codes, first, tables[level])
+
+        item_day = tables["item_day"]
+        self.item_day_item = item_day["item"].to_numpy()
+        self.item_day_date = item_day["date"].to_numpy("datetime64[ns]")
+        self.item_day_sold = item_day["sold"].to_numpy()
+        self.item_bounds = np.searchsorted(self.item_day_item, np.arange(len(self.items) + 1))
+
+        member_day = tables["member_day"]
+        self.member_day_date = member_day["date"].to_numpy("datetime64[ns]")
+        self.member_day_member = member_day["member"].to_numpy()
+        self.member_day_items = member_day["items"].to_numpy()
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.dates[0]) if len(self.dates) else None
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1]) if len(self.dates) else None
+
+    def _day_range(self, start=None, end=None):
+        # [lo, hi) positions of the days between start and end, both inclusive
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)), side="left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end)), side="right")
+        return lo, max(lo, hi)
+
+    def _rows_between(self, row_dates, lo, hi):
+        # Slice of a date-sorted table holding the days [lo, hi)
+        if lo == hi:
+            return slice(0, 0)
+        return slice(
+            np.searchsorted(row_dates, self.dates[lo], side="left"),
+            np.searchsorted(row_dates, self.dates[hi - 1], side="right"),
+        )
+
+    def _customers_between(self, lo, hi):
+        # Distinct customers over days [lo, hi) from the (date, member) rows
+        return len(np.unique(self.member_day_member[self._rows_between(self.member_day_date, lo, hi)]))
+
+    def totals(self, level="day", start=None, end=None):
+        # date, sold, customers per day / week / month between start and end
+        lo, hi = self._day_range(start, end)
+        if level == "day" or lo == hi:
+            return pd.DataFrame({"date": self.dates[lo:hi], "sold": self.day_sold[lo:hi], "customers": self.day_customers[lo:hi]})
+
+        codes, first, rolled = self.periods[level]
+        p_lo, p_hi = codes[lo], codes[hi - 1] + 1
+        result = rolled.iloc[p_lo:p_hi].reset_index(drop=True)
+        # Periods cut by the range are recounted from their days inside it
+        ends = np.append(first[1:], len(self.dates))
+        for edge in {p_lo, p_hi - 1}:
+            edge_lo, edge_hi = max(first[edge], lo), min(ends[edge], hi)
+            if (edge_lo, edge_hi) != (first[edge], ends[edge]):
+                result.loc[edge - p_lo, "sold"] = self.day_sold[edge_lo:edge_hi].sum()
+                result.loc[edge - p_lo, "customers"] = self._customers_between(edge_lo, edge_hi)
+        return result
+
+    def item_series(self, item, level="day", start=None, end=None):
+        # date, sold for one item per day / week / month between start and end
+        code = np.flatnonzero(self.items == item)
+        if not len(code):
+            return pd.DataFrame({"date": np.array([], dtype="datetime64[ns]"), "sold": np.array([], dtype=np.int64)})
+        lo, hi = self.item_bounds[code[0]], self.item_bounds[code[0] + 1]
+        dates, sold = self.item_day_date[lo:hi], self.item_day_sold[lo:hi]
+        inside = self._rows_between(dates, *self._day_range(start, end))
+        dates, sold = dates[inside], sold[inside]
+        if level == "day":
+            return pd.DataFrame({"date": dates, "sold": sold})
+
+        codes, first, rolled = self.periods[level]
+        period = codes[np.searchsorted(self.dates, dates)]
+        periods, inverse = np.unique(period, return_inverse=True)
+        return pd.DataFrame({"date": rolled["date"].to_numpy()[periods], "sold": np.bincount(inverse, weights=sold).astype(np.int64)})
+
+    def items_per_customer(self, start=None, end=None):
+        # Items bought by each customer with a purchase between start and end
+        lo, hi = self._day_range(start, end)
+        if (lo, hi) == (0, len(self.dates)):
+            return self.tables["member"]["items"].to_numpy()
+        if lo == hi:
+            return np.array([], dtype=np.int64)
+        rows = self._rows_between(self.member_day_date, lo, hi)
+        counts = np.bincount(self.member_day_member[rows], weights=self.member_day_items[rows])
+        return counts[counts > 0].astype(np.int64)
+
+
+def cube_path(file_path=DATASET_PATH, fingerprint=None):
+    fingerprint = fingerprint or dataset_fingerprint(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(CACHE_DIR, f"cube-{stem}-{fingerprint}")
+
+
+def _remove_stale_cubes(file_path, keep):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        # Temporary folders belong to builds that may still be writing
+        if name.startswith(f"cube-{stem}-") and not name.endswith(".tmp") and path != keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def save_cube(tables, folder):
+    # Written to a temporary folder of its own and moved into place, so readers never see
+    # half a cube and concurrent builds never share files. When another build got there
+    # first its cube is kept: the same fingerprint means the same tables.
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(folder) + ".", suffix=".tmp", dir=os.path.dirname(folder) or ".")
+    try:
+        for name, table in tables.items():
+            table.to_parquet(os.path.join(tmp, f"{name}.parquet"), index=False)
+        os.replace(tmp, folder)
+    except OSError:
+        if not os.path.isdir(folder):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def read_cube(folder):
+    return {name: pd.read_parquet(os.path.join(folder, f"{name}.parquet")) for name in TABLES}
+
+
+def load_sales_cube(file_path=DATASET_PATH):
+    # The dataset's cube, read from disk or built (and written) when the CSV has changed
+    folder = cube_path(file_path)
+    if os.path.isdir(folder):
+        with stage("read sales cube"):
+            return SalesCube(read_cube(folder))
+
+    store = load_transaction_store(file_path)
+    with stage("build sales cube"):
+        tables = cube_from_store(store)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        save_cube(tables, folder)
+        _remove_stale_cubes(file_path, keep=folder)
+    except (OSError, ImportError):
+        # Same as the dataset snapshot: without a writable folder the cube is just rebuilt next time
+        pass
+    return SalesCube(tables)
+
+
+# cache_resource shares the one read-only cube between sessions without copying it
+@st.cache_resource(max_entries=4, show_spinner="Loading sales cube...")
+def _cached_sales_cube(file_path, fingerprint):
+    return load_sales_cube(file_path)
+
+
+def get_sales_cube(file_path=DATASET_PATH):
+    return _cached_sales_cube(file_path, dataset_fingerprint(file_path))
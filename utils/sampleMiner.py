@@ -0,0 +1,230 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils.bitsetMiner import as_matrix, count_itemsets, join_candidates, levels_to_frame, mine_bitsets, pack_item_bitsets
+from utils.encoder import to_one_hot
+from utils.instrumentation import stage
+from utils.mining import generate_rules
+from utils.preflight import plan_mining
+
+# Approximate mining on a random sample of the baskets, after Toivonen's "Sampling Large
+# Databases for Association Rules". The sample is mined at a support lowered by what the
+# sampling error could hide, which gives every itemset that is probably frequent in the
+# whole data (S). Its negative border (the itemsets outside S whose subsets are all in S)
+# is what a miss would have to go through: if no border itemset turns out frequent in the
+# full data, nothing frequent was missed.
+#
+# Without verification the itemsets and rules are the sample's, at the requested
+# thresholds, with confidence intervals on support, confidence and lift. With verification
+# S and its border are counted over every basket in one pass, so supports are exact; when
+# a border itemset is frequent after all, the border of what was found is counted in
+# further passes until it holds no frequent itemset, so the verified result is always
+# exactly the frequent itemsets.
+
+# Baskets drawn when no sample size is given
+SAMPLE_SIZE = 2000
+
+# Chance, per itemset, that the lowered threshold misses one that is frequent overall
+MISS_PROBABILITY = 0.05
+
+# Coverage of the reported intervals
+CONFIDENCE_LEVEL = 0.95
+
+# The sample is never mined below this many baskets, nor below this share of the requested
+# support: at one basket every subset of every sampled basket would count as frequent
+MIN_SAMPLE_COUNT = 2
+MIN_LOWERED_SHARE = 0.5
+
+# Columns of an empty rules frame
+RULE_COLUMNS = ["antecedents", "consequents", "antecedent support", "consequent support", "support", "confidence", "lift"]
+
+
+def sample_baskets(matrix, sample_size, seed=0):
+    # Rows of the CSR basket matrix drawn without replacement (all of them when the sample
+    # is at least as large), kept in their original order
+    n_rows = matrix.shape[0]
+    if sample_size >= n_rows:
+        return matrix
+    rows = np.sort(np.random.default_rng(seed).choice(n_rows, sample_size, replace=False))
+    return matrix[rows]
+
+
+def lowered_support(min_support, sample_size, miss_probability=MISS_PROBABILITY):
+    # Sample support an itemset at exactly min_support stays above with probability
+    # 1 - miss_probability (normal approximation of its binomial count), floored at
+    # MIN_SAMPLE_COUNT baskets and MIN_LOWERED_SHARE of min_support. A sample too small to
+    # see min_support at all is mined at MIN_SAMPLE_COUNT baskets, above min_support, and
+    # misses more (verification still finds them through the border).
+    z = NormalDist().inv_cdf(1 - miss_probability)
+    lowered = min_support - z * math.sqrt(min_support * (1 - min_support) / sample_size)
+    return max(lowered, MIN_SAMPLE_COUNT / sample_size, MIN_LOWERED_SHARE * min_support)
+
+
+def negative_border(levels, n_items):
+    # Itemsets outside the given ones whose subsets are all among them, as sorted code
+    # rows per size starting at 1. levels holds sorted code rows per size, in the order
+    # mine_bitsets produces (each level sorted row by row).
+    found = [set(map(tuple, codes.tolist())) for codes in levels]
+    singles = levels[0][:, 0] if levels else np.empty(0, dtype=np.intp)
+    border = [np.setdiff1d(np.arange(n_items), singles).reshape(-1, 1)]
+    for size, codes in enumerate(levels, start=1):
+        left, right = join_candidates(codes)
+        candidates = np.column_stack((codes[left], codes[right, -1])) if len(left) else np.empty((0, size + 1), dtype=np.intp)
+        # Dropping either of the last two items gives a joined itemset; the others are checked
+        below, above = found[size - 1], found[size] if size < len(found) else set()
+        keep = [
+            row not in above and all(row[:d] + row[d + 1:] in below for d in range(size - 1))
+            for row in map(tuple, candidates.tolist())
+        ]
+        border.append(candidates[np.array(keep, dtype=bool)] if keep else candidates)
+    return border
+
+
+def _levels_of(itemsets):
+    # Sorted code rows per size, from a collection of code tuples
+    by_size = {}
+    for row in itemsets:
+        by_size.setdefault(len(row), []).append(row)
+    if not by_size:
+        return []
+    return [
+        np.array(sorted(by_size.get(size, [])), dtype=np.intp).reshape(-1, size)
+        for size in range(1, max(by_size) + 1)
+    ]
+
+
+def wilson_interval(successes, trials, z, correction=1.0):
+    # Wilson score interval of a binomial proportion, arrays in and out. correction scales
+    # the half-width (the finite population correction when sampling without replacement).
+    successes = np.asarray(successes, dtype=float)
+    trials = np.maximum(np.asarray(trials, dtype=float), 1)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * np.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator * correction
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def _with_intervals(frequent_itemsets, rules, n_sample, n_rows, confidence_level):
+    # Interval columns for sample estimates: Wilson intervals for support and confidence,
+    # and a delta-method interval on log lift
+    z = NormalDist().inv_cdf(0.5 + confidence_level / 2)
+    correction = math.sqrt((n_rows - n_sample) / max(n_rows - 1, 1))
+    frequent_itemsets["support_low"], frequent_itemsets["support_high"] = wilson_interval(
+        frequent_itemsets["support"] * n_sample, n_sample, z, correction
+    )
+    if rules.empty:
+        return
+    both = (rules["support"] * n_sample).round()
+    antecedent = (rules["antecedent support"] * n_sample).round()
+    rules["support_low"], rules["support_high"] = wilson_interval(both, n_sample, z, correction)
+    rules["confidence_low"], rules["confidence_high"] = wilson_interval(both, antecedent, z, correction)
+    confidence = rules["confidence"].clip(upper=1 - 1e-12)
+    consequent = rules["consequent support"].clip(upper=1 - 1e-12)
+    log_error = np.sqrt((1 - confidence) / (confidence * antecedent) + (1 - consequent) / (consequent * n_sample)) * correction
+    rules["lift_low"] = rules["lift"] * np.exp(-z * log_error)
+    rules["lift_high"] = rules["lift"] * np.exp(z * log_error)
+
+
+def _exact_intervals(frequent_itemsets, rules):
+    # Verified values are counted over every basket: the intervals are the values themselves
+    for column in ("support_low", "support_high"):
+        frequent_itemsets[column] = frequent_itemsets["support"]
+    for metric in ("support", "confidence", "lift"):
+        if not rules.empty:
+            rules[f"{metric}_low"] = rules[metric]
+            rules[f"{metric}_high"] = rules[metric]
+
+
+def _verify(bits, sample_levels, border, min_count, max_len=None):
+    # Count the candidates over every basket, then the border of what is frequent until it
+    # holds nothing new, never past max_len (the memory guard's cap on the whole run).
+    # Returns ({code tuple: count} of the frequent itemsets, misses, passes).
+    counted = {}
+    pending = [codes for codes in sample_levels + border if len(codes)]
+    misses, passes = 0, 0
+    border_rows = {row for codes in border for row in map(tuple, codes.tolist())}
+    while pending:
+        passes += 1
+        for codes in pending:
+            counted.update(zip(map(tuple, codes.tolist()), count_itemsets(bits, codes).tolist()))
+        frequent = [row for row, count in counted.items() if count >= min_count]
+        if passes == 1:
+            misses = sum(row in border_rows for row in frequent)
+        pending = [
+            codes[[row not in counted for row in map(tuple, codes.tolist())]]
+            for codes in negative_border(_levels_of(frequent), bits.shape[0])[:max_len]
+        ]
+        pending = [codes for codes in pending if len(codes)]
+    return {row: counted[row] for row in frequent}, misses, passes
+
+
+def _rules(frequent_itemsets, min_confidence, n_baskets):
+    if frequent_itemsets.empty:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+    return generate_rules(frequent_itemsets, min_confidence, None, n_baskets=n_baskets)
+
+
+def sample_mine(one_hot, min_support, min_confidence, sample_size=SAMPLE_SIZE, verify=False, seed=0,
+                max_len=None, confidence_level=CONFIDENCE_LEVEL, miss_probability=MISS_PROBABILITY, budget_mb=None):
+    # (frequent_itemsets, rules, info) for the one-hot frame. The frames are laid out like
+    # the exact ones, plus <metric>_low / <metric>_high interval columns. info describes the
+    # run: baskets, sample, lowered_support, candidates, border, max_len and capped (what the
+    # memory guard gave up, "" when nothing), and once verified misses (border itemsets found
+    # frequent) and passes over the full data. Raises MemoryBudgetError like
+    # mine_frequent_itemsets when even the smallest run would not fit.
+    matrix = as_matrix(one_hot)
+    n_rows, n_items = matrix.shape
+    columns = list(one_hot.columns)
+    with stage("sample baskets"):
+        sample = sample_baskets(matrix, sample_size, seed)
+    n_sample = sample.shape[0]
+    lowered = lowered_support(min_support, n_sample, miss_probability)
+
+    # The sample mine, and the verification passes over every basket, go through the same
+    # memory guard as the exact engines
+    with stage("preflight"):
+        plan = plan_mining(to_one_hot(sample, columns), lowered, engine="bitset", max_len=max_len, budget_mb=budget_mb)
+        if verify:
+            full_plan = plan_mining(one_hot, min_support, engine="bitset", max_len=plan["max_len"], budget_mb=budget_mb)
+            plan = full_plan if full_plan["capped"] else plan
+    max_len = plan["max_len"]
+
+    with stage("mine sample"):
+        sample_levels = [(codes, counts) for codes, counts in mine_bitsets(sample, lowered, max_len=max_len) if len(codes)]
+        border = negative_border([codes for codes, _ in sample_levels], n_items)[:max_len]
+    info = {
+        "baskets": n_rows,
+        "sample": n_sample,
+        "lowered_support": lowered,
+        "candidates": sum(len(codes) for codes, _ in sample_levels),
+        "border": sum(len(codes) for codes in border),
+        "max_len": max_len,
+        "capped": plan["capped"],
+        "verified": verify,
+    }
+
+    if verify:
+        with stage("verify on full data"):
+            min_count = math.ceil(min_support * n_rows - 1e-9)
+            frequent, info["misses"], info["passes"] = _verify(
+                pack_item_bitsets(matrix), [codes for codes, _ in sample_levels], border, min_count, max_len
+            )
+            levels = [(codes, np.array([frequent[row] for row in map(tuple, codes.tolist())], dtype=np.int64))
+                      for codes in _levels_of(frequent)]
+        frequent_itemsets = levels_to_frame(levels, n_rows, columns)
+        rules = _rules(frequent_itemsets, min_confidence, n_rows)
+        _exact_intervals(frequent_itemsets, rules)
+    else:
+        # The sample's own frequent itemsets at the requested support (still downward closed)
+        min_count = math.ceil(min_support * n_sample - 1e-9)
+        levels = [(codes[counts >= min_count], counts[counts >= min_count]) for codes, counts in sample_levels]
+        frequent_itemsets = levels_to_frame([level for level in levels if len(level[0])], n_sample, columns)
+        rules = _rules(frequent_itemsets, min_confidence, n_sample)
+        _with_intervals(frequent_itemsets, rules, n_sample, n_rows, confidence_level)
+    frequent_itemsets.attrs["capped"] = plan["capped"]
+    frequent_itemsets.attrs["max_len"] = max_len
+    return frequent_itemsets, rules, info
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.dataLoader import DATASET_PATH, DATE_FORMAT
+from utils.encoder import GROUPINGS
+from utils.instrumentation import stage
+
+# Streaming ingestion for transaction files that do not fit in memory. The CSV is read
+# in chunks, members / days / items are dictionary-encoded as they arrive, and only the
+# de-duplicated (member, day, item) code triples are kept, so peak memory follows the
+# number of basket entries instead of the raw row count.
+
+# Rows per chunk for the pandas reader
+CHUNK_SIZE = 500_000
+
+# Bytes per block for the pyarrow reader
+BLOCK_SIZE = 8 << 20
+
+# Collapse the buffered triples once this many rows have been added since the last time
+COMPACT_EVERY = 4_000_000
+
+COLUMNS = ["Member_number", "Date", "itemDescription"]
+
+# Integer used for missing dates (NaT) in the day vocabulary
+NAT = np.iinfo(np.int64).min
+
+# Bits given to each code when a (member, day, item) triple is packed into one int64
+MEMBER_BITS, DAY_BITS, ITEM_BITS = 26, 16, 22
+
+
+def _lookup(uniques, vocabulary, clean=None):
+    # Global codes for a chunk's distinct values; only these go through Python
+    lookup = np.empty(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        if clean is not None:
+            value = clean(value)
+        lookup[i] = vocabulary.setdefault(value, len(vocabulary))
+    return lookup
+
+
+def _sorted_unique(keys):
+    # Sort-based unique; noticeably faster than np.unique on large int64 arrays
+    keys = np.sort(keys)
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+
+def _clean_item(item):
+    return item.lower().strip()
+
+
+def _parse_days(date_strings):
+    # Distinct date strings -> int64 nanoseconds; unparseable dates become NaT like the regular loader
+    parsed = pd.to_datetime(pd.Series(date_strings, dtype="object"), format=DATE_FORMAT, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+class BasketBuilder:
+    # Collects basket contents chunk by chunk and builds the sparse basket matrices at the end
+
+    def __init__(self):
+        self.members = {}
+        self.days = {}
+        self.items = {}
+        self.rows_read = 0
+        self._keys = []
+        self._pending = 0
+
+    def add_codes(self, member, member_uniques, date, date_uniques, item, item_uniques):
+        # Add one chunk given as per-chunk codes (-1 for missing) plus the values they refer to
+        self.rows_read += len(item)
+        valid = (member >= 0) & (item >= 0)
+        if not valid.all():
+            member, date, item = member[valid], date[valid], item[valid]
+        if len(item) == 0:
+            return
+
+        member_codes = _lookup(member_uniques, self.members)[member]
+        days = np.append(_parse_days(date_uniques), NAT)  # code -1 (missing date) -> NaT
+        day_codes = _lookup(days, self.days)[date]
+        item_codes = _lookup(item_uniques, self.items, clean=_clean_item)[item]
+        if len(self.members) >= 1 << MEMBER_BITS or len(self.days) >= 1 << DAY_BITS or len(self.items) >= 1 << ITEM_BITS:
+            raise ValueError("Too many distinct members, days or items for the streaming loader.")
+
+        keys = (member_codes << (DAY_BITS + ITEM_BITS)) | (day_codes << ITEM_BITS) | item_codes
+        self._keys.append(_sorted_unique(keys))
+        self._pending += len(keys)
+        if self._pending >= COMPACT_EVERY:
+            self._compact()
+
+    def add_chunk(self, chunk):
+        # Add one chunk given as a DataFrame with the raw CSV columns
+        member, member_uniques = pd.factorize(chunk["Member_number"])
+        date, date_uniques = pd.factorize(chunk["Date"])
+        item, item_uniques = pd.factorize(chunk["itemDescription"])
+        self.add_codes(member, member_uniques, date, date_uniques, item, item_uniques)
+
+    def _compact(self):
+        if len(self._keys) > 1:
+            self._keys = [_sorted_unique(np.concatenate(self._keys))]
+        self._pending = 0
+
+    def finish(self):
+        self._compact()
+        keys = self._keys[0] if self._keys else np.empty(0, dtype=np.int64)
+        triples = np.column_stack((
+            keys >> (DAY_BITS + ITEM_BITS),
+            (keys >> ITEM_BITS) & ((1 << DAY_BITS) - 1),
+            keys & ((1 << ITEM_BITS) - 1),
+        ))
+        return StreamedBaskets(triples, self.members, self.days, self.items, self.rows_read)
+
+
+def _sorted_vocabulary(vocabulary, key=None):
+    # Re-number a vocabulary in sorted order so codes line up with the regular loader
+    values = list(vocabulary)
+    order = sorted(range(len(values)), key=(lambda i: key(values[i])) if key else values.__getitem__)
+    remap = np.empty(len(values), dtype=np.int32)
+    remap[order] = np.arange(len(values), dtype=np.int32)
+    return [values[i] for i in order], remap
+
+
+def _day_key(day):
+    # NaT sorts after every real date, like groupby(dropna=False)
+    return (day == NAT, day)
+
+
+class StreamedBaskets:
+    # Result of a streaming read: de-duplicated (member, day, item) code triples plus vocabularies
+
+    def __init__(self, triples, members, days, items, rows_read):
+        member_values, member_remap = _sorted_vocabulary(members)
+        day_values, day_remap = _sorted_vocabulary(days, key=_day_key)
+        item_values, item_remap = _sorted_vocabulary(items)
+
+        self.rows_read = rows_read
+        self.member_values = np.array(member_values)
+        self.day_values = pd.DatetimeIndex(np.array(day_values, dtype=np.int64).view("datetime64[ns]"))
+        self.items = pd.Index(item_values)
+        self.member_codes = member_remap[triples[:, 0]]
+        self.day_codes = day_remap[triples[:, 1]]
+        self.item_codes = item_remap[triples[:, 2]]
+
+    @property
+    def entries(self):
+        return len(self.item_codes)
+
+    def basket_matrix(self, grouping="member"):
+        # Same (matrix, items, baskets) triple that encoder.build_basket_matrix returns
+        if grouping not in GROUPINGS:
+            raise ValueError(f"Unknown grouping '{grouping}'. Choose one of: {', '.join(GROUPINGS)}")
+        if grouping == "member":
+            basket_keys = self.member_codes.astype(np.int64)
+        else:
+            basket_keys = self.member_codes.astype(np.int64) * len(self.day_values) + self.day_codes
+        unique_keys, basket_codes = np.unique(basket_keys, return_inverse=True)
+
+        matrix = sparse.coo_matrix(
+            (np.ones(len(basket_codes), dtype=bool), (basket_codes, self.item_codes)),
+            shape=(len(unique_keys), len(self.items)),
+        ).tocsr()
+
+        if grouping == "member":
+            baskets = pd.Index(self.member_values[unique_keys], name="Member_number")
+        else:
+            members = self.member_values[unique_keys // len(self.day_values)]
+            days = self.day_values[unique_keys % len(self.day_values)]
+            baskets = pd.MultiIndex.from_arrays([members, days], names=GROUPINGS["transaction"])
+        return matrix, self.items, baskets
+
+
+def _pandas_chunks(file_path, chunksize):
+    yield from pd.read_csv(
+        file_path,
+        usecols=COLUMNS,
+        dtype={"Date": "str", "itemDescription": "str"},
+        chunksize=chunksize,
+    )
+
+
+def _pyarrow_chunks(file_path, block_size):
+    from pyarrow import csv
+
+    reader = csv.open_csv(
+        file_path,
+        read_options=csv.ReadOptions(block_size=block_size),
+        convert_options=csv.ConvertOptions(
+            include_columns=COLUMNS,
+            column_types={"Date": "string", "itemDescription": "string"},
+        ),
+    )
+    for batch in reader:
+        yield batch
+
+
+def _arrow_codes(column):
+    # Dictionary-encode an Arrow column without creating a Python object per row
+    encoded = column.dictionary_encode()
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+    return codes, encoded.dictionary.to_pylist()
+
+
+def stream_baskets(file_path=DATASET_PATH, engine="pandas", chunksize=CHUNK_SIZE, block_size=BLOCK_SIZE):
+    # Read a Member_number,Date,itemDescription CSV chunk by chunk into basket codes.
+    # engine is "pandas" (read_csv with chunksize) or "pyarrow" (streaming CSV reader).
+    if engine == "pandas":
+        chunks = _pandas_chunks(file_path, chunksize)
+    elif engine == "pyarrow":
+        chunks = _pyarrow_chunks(file_path, block_size)
+    else:
+        raise ValueError(f"Unknown ingestion engine '{engine}'. Choose 'pandas' or 'pyarrow'.")
+
+    builder = BasketBuilder()
+    with stage(f"stream csv ({engine})"):
+        for chunk in chunks:
+            if engine == "pyarrow":
+                builder.add_codes(*(part for name in COLUMNS for part in _arrow_codes(chunk.column(name))))
+            else:
+                builder.add_chunk(chunk)
+        return builder.finish()
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.charts import SET_COLUMNS, rules_fingerprint
+
+# Paginated views of itemset / rule frames. Sorting and filtering run on the server
+# against a prepared copy of the frame (numeric columns as arrays, item sets exploded
+# to integer codes), and only the visible page is turned into strings and sent to the
+# browser, so each rerun ships the same small payload whatever the result size.
+
+PAGE_SIZE = 50
+
+# Threshold filters offered when the frame has the column
+FILTER_COLUMNS = ["support", "confidence", "lift"]
+
+
+class TableIndex:
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.numeric = {c: frame[c].to_numpy(dtype=float) for c in frame.columns if pd.api.types.is_numeric_dtype(frame[c])}
+        self.set_columns = [c for c in SET_COLUMNS if c in frame]
+
+        # (row, item code) pairs over every item set column, for the item filter
+        vocabulary = {}
+        rows, codes = [], []
+        for column in self.set_columns:
+            for row, items in enumerate(frame[column]):
+                for item in ([items] if isinstance(items, str) else items):
+                    rows.append(row)
+                    codes.append(vocabulary.setdefault(item, len(vocabulary)))
+        self.items = np.array(list(vocabulary), dtype=object)
+        self.item_rows = np.asarray(rows, dtype=np.intp)
+        self.item_codes = np.asarray(codes, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def query(self, text="", minimums=None, sort_by=None, descending=True):
+        # Positions of the matching rows in display order
+        keep = np.ones(len(self.frame), dtype=bool)
+        for column, minimum in (minimums or {}).items():
+            if minimum:
+                keep &= self.numeric[column] >= minimum
+        text = text.strip().lower()
+        if text:
+            matching = np.flatnonzero([text in str(item).lower() for item in self.items])
+            has_item = np.zeros(len(self.frame), dtype=bool)
+            has_item[self.item_rows[np.isin(self.item_codes, matching)]] = True
+            keep &= has_item
+        positions = np.flatnonzero(keep)
+        if sort_by in self.numeric:
+            values = self.numeric[sort_by][positions]
+            order = np.argsort(-values if descending else values, kind="stable")
+            positions = positions[order]
+        return positions
+
+    def page(self, positions):
+        # Display copy of just these rows: item sets joined into "a, b" strings
+        rows = self.frame.iloc[positions].copy()
+        for column in self.set_columns:
+            rows[column] = [items if isinstance(items, str) else ", ".join(sorted(items)) for items in rows[column]]
+        return rows
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_table_index(fingerprint, _frame):
+    return TableIndex(_frame)
+
+
+def table_index(frame):
+    return _cached_table_index(rules_fingerprint(frame), frame)
+
+
+def paged_table(frame, key, page_size=PAGE_SIZE, sort_by=None):
+    # Filter / sort controls plus one page of the frame; row labels are kept so they
+    # match the "Row i" labels of the rule charts
+    index = table_index(frame)
+    sortable = list(index.numeric)
+    filters = [c for c in FILTER_COLUMNS if c in index.numeric]
+
+    with st.container(border=True):
+        left, middle, right = st.columns([3, 2, 1])
+        text = left.text_input("Item contains", key=f"{key}_text", placeholder="e.g. milk") if index.set_columns else ""
+        default = sortable.index(sort_by) if sort_by in sortable else (sortable.index("lift") if "lift" in sortable else 0)
+        sort_column = middle.selectbox("Sort by", sortable, index=default, key=f"{key}_sort") if sortable else None
+        descending = right.toggle("Descending", value=True, key=f"{key}_desc")
+
+        minimums = {}
+        for column, slot in zip(filters, st.columns(len(filters)) if filters else []):
+            minimums[column] = slot.number_input(f"Min {column}", min_value=0.0, value=0.0, step=0.01, format="%.3f", key=f"{key}_min_{column}")
+
+        positions = index.query(text, minimums, sort_column, descending)
+        n_pages = max(1, math.ceil(len(positions) / page_size))
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, value=1, step=1, key=f"{key}_page")
+        page = min(page, n_pages)
+        start = (page - 1) * page_size
+        st.dataframe(index.page(positions[start:start + page_size]))
+        shown = f"{start + 1:,}-{min(start + page_size, len(positions)):,}" if len(positions) else "0"
+        st.caption(f"Rows {shown} of {len(positions):,} matching ({len(index):,} total)")
+    return positions
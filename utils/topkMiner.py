@@ -0,0 +1,87 @@
+import numpy as np
+
+from utils.bitsetMiner import BATCH_SIZE, as_matrix, join_candidates, levels_to_frame, pack_item_bitsets, popcount
+
+# Top-K frequent itemsets without a support threshold. The search runs level by level
+# over the packed item bitsets like the bitset engine, but the threshold is not given:
+# it is the K-th best count found so far, and it only ever goes up. A k-itemset below it
+# cannot lead to anything better (no superset is more frequent), so each level is cut
+# back to the itemsets at or above the threshold before it is joined. With K itemsets
+# kept, a level joins at most K(K-1)/2 candidates, whatever the data, which is what
+# makes this mode safe to offer where a low support slider is not.
+#
+# Itemsets tied with the K-th are all kept, so the result is exactly the frequent
+# itemsets at the final threshold and can be cached like any other mining result.
+
+# Lift has no bound that shrinks with support (pairs of rare items have the highest
+# lifts), so the K highest-lift rules are taken from the rules among the RULE_POOL * K
+# most frequent itemsets rather than from every itemset
+RULE_POOL = 10
+
+
+def _kth_count(found, k):
+    # K-th largest count over every level so far (1 while fewer than K were found)
+    counts = np.concatenate(found)
+    if len(counts) < k:
+        return 1
+    return max(1, int(np.partition(counts, len(counts) - k)[len(counts) - k]))
+
+
+def top_k_levels(matrix, k, max_len=None, bits=None):
+    # (levels, min_count): one (itemsets, counts) pair per level as in mine_bitsets, and the
+    # count of the K-th most frequent itemset
+    bits = pack_item_bitsets(matrix) if bits is None else bits
+    counts = popcount(bits)
+    found = [counts]
+    threshold = _kth_count(found, k)
+
+    keep = counts >= threshold
+    itemsets = np.flatnonzero(keep).reshape(-1, 1)
+    levels = [(itemsets, counts[keep])]
+    level_bits = bits[keep]
+
+    while len(itemsets) > 1 and (max_len is None or itemsets.shape[1] < max_len):
+        left, right = join_candidates(itemsets)
+        new, new_counts, new_bits = [], [], []
+        for start in range(0, len(left), BATCH_SIZE):
+            i = left[start:start + BATCH_SIZE]
+            j = right[start:start + BATCH_SIZE]
+            candidate_bits = level_bits[i] & level_bits[j]
+            candidate_counts = popcount(candidate_bits)
+            mask = candidate_counts >= threshold
+            if mask.any():
+                new.append(np.column_stack((itemsets[i[mask]], itemsets[j[mask], -1])))
+                new_counts.append(candidate_counts[mask])
+                new_bits.append(candidate_bits[mask])
+                # Raise the threshold as soon as the batch pushes the K-th count up
+                found.append(candidate_counts[mask])
+                threshold = _kth_count(found, k)
+                found = [np.concatenate(found)]
+        if not new:
+            break
+        itemsets = np.concatenate(new)
+        counts = np.concatenate(new_counts)
+        level_bits = np.concatenate(new_bits)
+        keep = counts >= threshold
+        itemsets, level_bits = itemsets[keep], level_bits[keep]
+        levels.append((itemsets, counts[keep]))
+
+    # Earlier levels were cut at a lower threshold than the final one
+    levels = [(codes[level_counts >= threshold], level_counts[level_counts >= threshold]) for codes, level_counts in levels]
+    return [level for level in levels if len(level[0])], threshold
+
+
+def top_k_itemsets(df, k, max_len=None, use_colnames=True):
+    # ['support', 'itemsets'] frame of the K most frequent itemsets (more on ties), with
+    # the support of the K-th in attrs["min_support"]
+    if k < 1:
+        raise ValueError(f"`k` must be at least 1. Got {k}.")
+    matrix = as_matrix(df)
+    levels, min_count = top_k_levels(matrix, k, max_len=max_len)
+    frequent_itemsets = levels_to_frame(levels, matrix.shape[0], list(df.columns) if use_colnames else None)
+    frequent_itemsets.attrs["min_support"] = min_count / matrix.shape[0]
+    return frequent_itemsets
+
+
+def top_k_rules(rules, k, metric="lift"):
+    return rules.sort_values(metric, ascending=False, kind="stable").head(k).reset_index(drop=True)
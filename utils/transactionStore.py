@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.dataLoader import CACHE_DIR, DATASET_PATH, STREAMING_THRESHOLD_BYTES, dataset_fingerprint, load_clean_data
+from utils.encoder import GROUPINGS
+from utils.instrumentation import stage
+
+# Integer-coded store of the dataset's baskets, built in one pass and kept on disk as
+# plain .npy arrays that are memory-mapped on load. One sorted vocabulary each for
+# members, days and items; every transaction (member + day) is a (member code, day code)
+# key; basket contents are CSR offsets / item-code arrays, for transactions and for
+# members, so either grouping's basket matrix is a view over the stored arrays:
+#   items.json, members.npy, days.npy    vocabularies (days as int64 ns, NaT last)
+#   tx_member.npy, tx_day.npy            key codes of each transaction, sorted by member then day
+#   tx_offsets.npy, tx_items.npy         item codes of each transaction (CSR)
+#   member_offsets.npy, member_items.npy item codes of each member over all their days (CSR)
+
+ARRAYS = ["members", "days", "tx_member", "tx_day", "tx_offsets", "tx_items", "member_offsets", "member_items"]
+
+
+def _csr_arrays(basket_codes, item_codes, n_baskets):
+    # offsets / items of baskets given (basket, item) pairs sorted by basket then item
+    offsets = np.zeros(n_baskets + 1, dtype=np.int64)
+    np.cumsum(np.bincount(basket_codes, minlength=n_baskets), out=offsets[1:])
+    return offsets, item_codes
+
+
+def _index_dtype(n):
+    # scipy keeps int32 indices when they fit; using the same type on disk avoids a copy on load
+    return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+
+class TransactionStore:
+
+    def __init__(self, arrays, items):
+        self.arrays = arrays
+        self.items = pd.Index(items)
+        self.member_values = arrays["members"]
+        self.day_values = pd.DatetimeIndex(np.asarray(arrays["days"], dtype=np.int64).view("datetime64[ns]"))
+
+    @classmethod
+    def from_codes(cls, member_codes, day_codes, item_codes, member_values, day_values, items):
+        # Codes must index into sorted vocabularies (days with NaT last); duplicates are dropped
+        n_items = len(items)
+        order = np.lexsort((item_codes, day_codes, member_codes))
+        member_codes, day_codes, item_codes = member_codes[order], day_codes[order], item_codes[order]
+        new_tx = np.ones(len(order), dtype=bool)
+        new_tx[1:] = (member_codes[1:] != member_codes[:-1]) | (day_codes[1:] != day_codes[:-1])
+        keep = new_tx.copy()
+        keep[1:] |= item_codes[1:] != item_codes[:-1]
+        member_codes, day_codes, item_codes, new_tx = member_codes[keep], day_codes[keep], item_codes[keep], new_tx[keep]
+        tx_codes = np.cumsum(new_tx) - 1
+        tx_member, tx_day = member_codes[new_tx], day_codes[new_tx]
+
+        # A member's items over all their days, each item once
+        member_keys = np.unique(member_codes.astype(np.int64) * n_items + item_codes)
+        index = _index_dtype(max(len(item_codes), n_items))
+        tx_offsets, tx_items = _csr_arrays(tx_codes, item_codes, len(tx_member))
+        member_offsets, member_items = _csr_arrays(member_keys // n_items, member_keys % n_items, len(member_values))
+        arrays = {
+            "members": np.asarray(member_values),
+            "days": np.asarray(pd.DatetimeIndex(day_values).as_unit("ns").asi8, dtype=np.int64),
+            "tx_member": tx_member.astype(np.int32),
+            "tx_day": tx_day.astype(np.int32),
+            "tx_offsets": tx_offsets.astype(index),
+            "tx_items": tx_items.astype(index),
+            "member_offsets": member_offsets.astype(index),
+            "member_items": member_items.astype(index),
+        }
+        return cls(arrays, list(items))
+
+    @classmethod
+    def from_frame(cls, data):
+        # From the cleaned dataset (clean_data output)
+        member_codes, member_values = pd.factorize(data["Member_number"], sort=True)
+        day_codes, day_values = pd.factorize(data["Date"], sort=True, use_na_sentinel=False)
+        items = data["itemDescription"].astype("category").cat.remove_unused_categories()
+        item_codes = items.cat.codes.to_numpy(np.int64)
+        return cls.from_codes(member_codes, day_codes, item_codes, member_values, day_values, items.cat.categories.astype(str))
+
+    @classmethod
+    def from_stream(cls, baskets):
+        # From a StreamedBaskets read, for files too large to load whole
+        return cls.from_codes(
+            baskets.member_codes, baskets.day_codes, baskets.item_codes,
+            baskets.member_values, baskets.day_values, baskets.items,
+        )
+
+    @property
+    def n_transactions(self):
+        return len(self.arrays["tx_member"])
+
+    @property
+    def n_members(self):
+        return len(self.member_values)
+
+    def basket_matrix(self, grouping="member"):
+        # Same (matrix, items, baskets) triple that encoder.build_basket_matrix returns,
+        # with the CSR structure taken straight from the stored arrays
+        if grouping not in GROUPINGS:
+            raise ValueError(f"Unknown grouping '{grouping}'. Choose one of: {', '.join(GROUPINGS)}")
+        prefix = "member" if grouping == "member" else "tx"
+        offsets, indices = self.arrays[f"{prefix}_offsets"], self.arrays[f"{prefix}_items"]
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, offsets),
+            shape=(len(offsets) - 1, len(self.items)),
+            copy=False,
+        )
+        if grouping == "member":
+            baskets = pd.Index(self.member_values, name="Member_number")
+        else:
+            baskets = pd.MultiIndex.from_arrays(
+                [self.member_values[self.arrays["tx_member"]], self.day_values[self.arrays["tx_day"]]],
+                names=GROUPINGS["transaction"],
+            )
+        return matrix, self.items, baskets
+
+    def entry_codes(self):
+        # (member, day, item) codes of every transaction entry
+        lengths = np.diff(self.arrays["tx_offsets"])
+        return (
+            np.repeat(self.arrays["tx_member"], lengths),
+            np.repeat(self.arrays["tx_day"], lengths),
+            np.asarray(self.arrays["tx_items"]),
+        )
+
+    def nbytes(self):
+        return sum(np.asarray(a).nbytes for a in self.arrays.values())
+
+    def save(self, folder):
+        # Written to a temporary folder of its own and moved into place, like the sales
+        # cube, so concurrent builds never share files. When another build got there
+        # first its store is kept: the same fingerprint means the same arrays.
+        tmp = tempfile.mkdtemp(prefix=os.path.basename(folder) + ".", suffix=".tmp", dir=os.path.dirname(folder) or ".")
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(tmp, f"{name}.npy"), self.arrays[name], allow_pickle=False)
+            with open(os.path.join(tmp, "items.json"), "w") as handle:
+                json.dump([str(item) for item in self.items], handle)
+            os.replace(tmp, folder)
+        except OSError:
+            if not os.path.isdir(folder):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return folder
+
+    @classmethod
+    def load(cls, folder, mmap=True):
+        arrays = {
+            name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r" if mmap else None, allow_pickle=False)
+            for name in ARRAYS
+        }
+        with open(os.path.join(folder, "items.json")) as handle:
+            items = json.load(handle)
+        return cls(arrays, items)
+
+
+def store_path(file_path=DATASET_PATH, fingerprint=None):
+    fingerprint = fingerprint or dataset_fingerprint(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(CACHE_DIR, f"store-{stem}-{fingerprint}")
+
+
+def _remove_stale_stores(file_path, keep):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        # Temporary folders belong to builds that may still be writing
+        if name.startswith(f"store-{stem}-") and not name.endswith(".tmp") and path != keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_transaction_store(file_path=DATASET_PATH):
+    # The dataset's store, memory-mapped from disk or built (and written) when the CSV has changed
+    folder = store_path(file_path)
+    if os.path.isdir(folder):
+        with stage("read transaction store"):
+            return TransactionStore.load(folder)
+
+    if os.path.getsize(file_path) >= STREAMING_THRESHOLD_BYTES:
+        from utils.streamLoader import stream_baskets
+
+        baskets = stream_baskets(file_path)
+        with stage("build transaction store"):
+            store = TransactionStore.from_stream(baskets)
+    else:
+        data = load_clean_data(file_path)
+        with stage("build transaction store"):
+            store = TransactionStore.from_frame(data)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        store.save(folder)
+        _remove_stale_stores(file_path, keep=folder)
+    except (OSError, ImportError):
+        # Same as the dataset snapshot: without a writable folder the store is rebuilt next time
+        pass
+    return store
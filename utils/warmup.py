@@ -0,0 +1,74 @@
+import importlib
+import logging
+import os
+import threading
+
+import streamlit as st
+
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, get_basket_matrix, get_clean_data
+from utils.encoder import to_one_hot
+from utils.instrumentation import begin_run, end_run, stage
+from utils.pairMatrix import get_pair_matrix
+from utils.resultCache import cached_itemsets, cached_rules, mining_key
+from utils.salesCube import get_sales_cube
+
+# Optional server-side warmup. With GROCERIES_WARMUP=1, main.py starts a background
+# thread on the first script run of the server process that fills the shared caches the
+# pages read from: the cleaned dataset, both basket matrices and their item pair metrics,
+# the sales cube and the mining results at the pages' default sliders, and imports the
+# chart libraries the pages defer. Every session shares those caches, so whoever opens a
+# mining page next gets the warm path. The stage timings of the warmup are logged like a page run's.
+
+WARMUP = os.environ.get("GROCERIES_WARMUP", "0") not in ("", "0")
+
+# (grouping, min_support, min_confidence) at the pages' default slider values. The member
+# run covers both the recommendation page (0.01 / 0.1) and the member pages (0.1 / 0.5),
+# since a cached result answers any higher threshold.
+DEFAULT_RUNS = [
+    ("transaction", 0.1, 0.5),
+    ("member", 0.01, 0.1),
+]
+
+# Deferred in the pages; importing them here takes that cost off the first chart
+CHART_MODULES = ["mlxtend.frequent_patterns", "plotly.express", "matplotlib.pyplot", "seaborn"]
+
+logger = logging.getLogger("groceries.warmup")
+
+
+def warm_up(file_path=DATASET_PATH, runs=DEFAULT_RUNS, engine="apriori"):
+    begin_run("warmup", enabled=True, log=True)
+    try:
+        with stage("load dataset"):
+            get_clean_data(file_path)
+        with stage("sales cube"):
+            get_sales_cube(file_path)
+        fingerprint = dataset_fingerprint(file_path)
+        for grouping, min_support, min_confidence in runs:
+            with stage(f"load baskets ({grouping})"):
+                basket_matrix, items, _ = get_basket_matrix(file_path, grouping=grouping)
+            get_pair_matrix(file_path, grouping=grouping)
+            one_hot = to_one_hot(basket_matrix, items)
+            key = mining_key(fingerprint, grouping, engine)
+            frequent_itemsets = cached_itemsets(key, one_hot, min_support, engine=engine)
+            if not frequent_itemsets.empty:
+                cached_rules(key, frequent_itemsets, one_hot, min_support, min_confidence)
+        with stage("import chart libraries"):
+            for module in CHART_MODULES:
+                importlib.import_module(module)
+    except Exception:
+        # A failed warmup only means the first visitor pays for the work instead
+        logger.exception("warmup failed")
+    finally:
+        end_run()
+
+
+@st.cache_resource
+def start_warmup(file_path=DATASET_PATH):
+    # Once per server process; the thread is returned so it can be waited on
+    thread = threading.Thread(target=warm_up, args=(file_path,), name="groceries-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for_warmup(timeout=None):
+    start_warmup().join(timeout)
@@ -0,0 +1,150 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from utils.encoder import GROUPINGS, build_basket_matrix, to_one_hot
+from utils.instrumentation import stage
+from utils.mining import PARALLEL_ENGINES, generate_rules, mine_frequent_itemsets
+from utils.parallelMiner import DEFAULT_WORKERS, get_executor
+
+# Mining per time window of the Date column, and how the rules move between windows.
+# Windows are whole calendar months: tumbling windows (step == length) cover each month
+# once, sliding windows (step < length) overlap, and every window is the same length. Each window is keyed on a digest of its
+# own rows rather than the dataset fingerprint, so when new months are appended to the
+# CSV the earlier windows keep their keys and come straight out of the cache; only the
+# windows that changed are mined, in parallel over the shared process pool.
+
+# Columns kept from each window's rules
+RULE_COLUMNS = ["antecedents", "consequents", "support", "confidence", "lift"]
+
+# Lift moves smaller than this between two windows count as unchanged
+LIFT_TOLERANCE = 0.1
+
+DRIFT_STATUSES = ["appeared", "disappeared", "changed", "stable"]
+
+
+def time_windows(dates, months=1, step=None):
+    # (start, end) month-aligned windows, end exclusive, each a full `months` long. Windows
+    # stop at the last one that ends with the data's last month: a trailing window that ran
+    # past it would hold fewer months than the others, and comparing it with a full one
+    # would show drift that is only missing data. Months after the last full window (when
+    # step does not divide the data) are left out.
+    dates = pd.to_datetime(pd.Series(dates)).dropna()
+    if dates.empty:
+        return []
+    step = step or months
+    first = dates.min().to_period("M").start_time
+    end_of_data = dates.max().to_period("M").start_time + pd.DateOffset(months=1)
+    windows = []
+    start = first
+    while start + pd.DateOffset(months=months) <= end_of_data:
+        windows.append((start, start + pd.DateOffset(months=months)))
+        start = start + pd.DateOffset(months=step)
+    return windows
+
+
+def window_label(start, end):
+    last = end - pd.DateOffset(months=1)
+    if last.to_period("M") == start.to_period("M"):
+        return start.strftime("%Y-%m")
+    return f"{start:%Y-%m} to {last:%Y-%m}"
+
+
+def window_digest(rows):
+    # Identifies a window's rows whatever their order in the file
+    hashed = pd.util.hash_pandas_object(rows[["Member_number", "Date", "itemDescription"]], index=False).to_numpy()
+    total = int(hashed.sum(dtype=np.uint64))
+    return hashlib.sha1(f"{len(rows)}|{total}".encode("utf-8")).hexdigest()[:16]
+
+
+def _mine_window(matrix, items, min_support, min_confidence, engine, closed):
+    # Runs in a pool worker; the multi-core engines stay on one core here since the
+    # windows are already spread over the pool
+    if matrix.shape[0] == 0:
+        return pd.DataFrame(columns=["support", "itemsets"]), pd.DataFrame(columns=RULE_COLUMNS)
+    one_hot = to_one_hot(matrix, items)
+    workers = 1 if engine in PARALLEL_ENGINES else None
+    frequent_itemsets = mine_frequent_itemsets(one_hot, min_support, engine=engine, closed=closed, workers=workers)
+    if frequent_itemsets.empty:
+        return frequent_itemsets, pd.DataFrame(columns=RULE_COLUMNS)
+    rules = generate_rules(frequent_itemsets, min_confidence, one_hot)
+    return frequent_itemsets, rules[RULE_COLUMNS]
+
+
+def mine_windows(data, windows, cache, grouping="member", min_support=0.01, min_confidence=0.1,
+                 engine="apriori", closed=False, workers=None):
+    # One dict per window with its label, basket count, itemsets and rules. cache is a
+    # MiningCache; a window is only mined when the cache cannot answer it.
+    workers = workers or DEFAULT_WORKERS
+    dates = data["Date"]
+    results, pending = [], []
+    with stage("mine windows"):
+        for start, end in windows:
+            rows = data[(dates >= start) & (dates < end)]
+            key = (window_digest(rows), grouping, engine, closed)
+            result = {"window": window_label(start, end), "start": start, "end": end, "key": key, "cached": True}
+            result["itemsets"] = cache.get_itemsets(key, min_support)
+            result["rules"] = cache.get_rules(key, min_support, min_confidence) if result["itemsets"] is not None else None
+            if result["rules"] is None:
+                cache.count_miss()
+                matrix, items, _ = build_basket_matrix(rows, grouping)
+                result["cached"] = False
+                pending.append((result, matrix, items))
+            result["baskets"] = rows.groupby(GROUPINGS[grouping]).ngroups
+            results.append(result)
+
+        if pending:
+            args = [(matrix, items, min_support, min_confidence, engine, closed) for _, matrix, items in pending]
+            if workers > 1 and len(pending) > 1:
+                mined = get_executor(workers).map(_mine_window, *zip(*args))
+            else:
+                mined = (_mine_window(*arg) for arg in args)
+            for (result, _, _), (frequent_itemsets, rules) in zip(pending, mined):
+                cache.put_itemsets(result["key"], min_support, frequent_itemsets)
+                cache.put_rules(result["key"], min_support, min_confidence, rules)
+                result["itemsets"], result["rules"] = frequent_itemsets, rules
+    return results
+
+
+def window_summary(results):
+    return pd.DataFrame([
+        {
+            "window": r["window"],
+            "baskets": r["baskets"],
+            "itemsets": len(r["itemsets"]),
+            "rules": len(r["rules"]),
+            "cached": r["cached"],
+        }
+        for r in results
+    ])
+
+
+def compare_rules(before, after, tolerance=LIFT_TOLERANCE):
+    # Rules of two windows side by side, each marked appeared / disappeared / changed / stable
+    columns = ["support", "confidence", "lift"]
+    merged = pd.merge(
+        before[RULE_COLUMNS], after[RULE_COLUMNS],
+        on=["antecedents", "consequents"], how="outer", suffixes=("_before", "_after"),
+    )
+    merged["lift_change"] = merged["lift_after"] - merged["lift_before"]
+    status = np.where(
+        merged["lift_before"].isna(), "appeared",
+        np.where(merged["lift_after"].isna(), "disappeared",
+                 np.where(merged["lift_change"].abs() >= tolerance, "changed", "stable")),
+    )
+    merged.insert(2, "status", pd.Categorical(status, categories=DRIFT_STATUSES))
+    order = [f"{c}_{side}" for c in columns for side in ("before", "after")]
+    # How far a rule moved: the size of its lift change, or its lift when it is in one window only
+    merged["drift"] = merged["lift_change"].abs().fillna(merged[["lift_before", "lift_after"]].max(axis=1))
+    merged = merged[["antecedents", "consequents", "status"] + order + ["lift_change", "drift"]]
+    return merged.sort_values("drift", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def drift_summary(results, tolerance=LIFT_TOLERANCE):
+    # Status counts for every pair of consecutive windows
+    rows = []
+    for before, after in zip(results, results[1:]):
+        counts = compare_rules(before["rules"], after["rules"], tolerance)["status"].value_counts()
+        rows.append({"window": after["window"], **{status: int(counts.get(status, 0)) for status in DRIFT_STATUSES}})
+    return pd.DataFrame(rows, columns=["window"] + DRIFT_STATUSES)
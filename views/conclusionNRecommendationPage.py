@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from mlxtend.frequent_patterns import apriori, association_rules
+from utils.compaction import compacted_itemsets, pruned_rules
+from utils.controls import compaction_controls, compaction_note, engine_controls, engine_timing_panel, worker_controls
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, get_basket_matrix, get_clean_data
+from utils.encoder import to_one_hot
+from utils.instrumentation import stage
+from utils.resultCache import cached_itemsets, cached_rules, mining_key
+from utils.tables import paged_table
 
 # Streamlit app title
 st.title("Groceries Dataset Analysis with Recommendations and Conclusions")
@@ -11,68 +14,84 @@ st.title("Groceries Dataset Analysis with Recommendations and Conclusions")
 st.sidebar.header("Parameters")
 min_support = st.sidebar.slider("Minimum Support", 0.01, 1.0, 0.1)
 min_confidence = st.sidebar.slider("Minimum Confidence", 0.01, 1.0, 0.5)
+engine, closed = engine_controls()
+workers = worker_controls(engine)
+itemset_mode, prune = compaction_controls()
 
 # Load the groceries dataset
-file_path = "assets/csv/Groceries_dataset.csv"  # Ensure this file is in the same directory
+file_path = DATASET_PATH  # Ensure this file is in the same directory
 try:
-    data = pd.read_csv(file_path)
+    # Cleaned dataset from the shared cached loader
+    with stage("load data"):
+        data = get_clean_data(file_path)
 
-    # Data cleaning
-    data = data.dropna(subset=["Member_number", "itemDescription"])
-    data["itemDescription"] = data["itemDescription"].str.lower().str.strip()
-    data = data.drop_duplicates()
-
-    # Group transactions by `Member_number`
-    transactions = data.groupby("Member_number")["itemDescription"].apply(list)
+    # Baskets per `Member_number`, from the shared cached loader (built from the transaction store)
+    with stage("load baskets"):
+        basket_matrix, items, baskets = get_basket_matrix(file_path, grouping="member")
 
     # Convert transactions into a one-hot encoded DataFrame
-    item_set = set(data["itemDescription"].unique())
-    one_hot_encoded = pd.DataFrame(
-        [{item: (item in transaction) for item in item_set} for transaction in transactions]
-    )
+    one_hot_encoded = to_one_hot(basket_matrix, items)
+
+    engine_timing_panel(one_hot_encoded, min_support, workers)
 
-    # Apply Apriori algorithm
-    frequent_itemsets = apriori(one_hot_encoded, min_support=min_support, use_colnames=True)
+    # Mining results are cached per dataset version, grouping and engine; moving a slider
+    # above an already mined threshold only filters the cached result
+    cache_key = mining_key(dataset_fingerprint(file_path), "member", engine, closed)
+
+    # Apply the selected mining engine (Apriori by default)
+    frequent_itemsets = cached_itemsets(cache_key, one_hot_encoded, min_support, engine=engine, closed=closed, workers=workers)
 
     if frequent_itemsets.empty:
         st.warning("No frequent itemsets found for the given support level. Try lowering the minimum support.")
     else:
         st.subheader("Frequent Itemsets")
         st.write("Frequent itemsets represent combinations of items often purchased together.")
-        st.write(frequent_itemsets)
-
-        num_itemsets = len(transactions)
+        # Closed / maximal itemsets only, when chosen in the sidebar
+        shown_itemsets, report = compacted_itemsets(frequent_itemsets, itemset_mode)
+        compaction_note(report)
+        paged_table(shown_itemsets, key="itemsets", sort_by="support")
 
         # Generate association rules
-        rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence, num_itemsets=num_itemsets)
+        rules = cached_rules(cache_key, frequent_itemsets, one_hot_encoded, min_support, min_confidence)
+        rules, report = pruned_rules(rules, prune)
 
         if rules.empty:
             st.warning("No association rules found for the given confidence level. Try lowering the minimum confidence.")
         else:
             st.subheader("Association Rules")
             st.write("Association rules help identify relationships between items in transactions.")
-            st.write(rules)
+            compaction_note(report)
+            paged_table(rules, key="rules")
 
             # Visualization of Item Frequencies
             item_frequencies = data['itemDescription'].value_counts()
             st.subheader("Top 10 Most Frequent Items")
-            fig, ax = plt.subplots(figsize=(10, 6))
-            item_frequencies.head(10).plot(kind='bar', ax=ax)
-            ax.set_title("Top 10 Most Frequent Items")
-            ax.set_xlabel("Item Description")
-            ax.set_ylabel("Frequency")
-            ax.tick_params(axis='x', rotation=45)
-            st.pyplot(fig)
+            with stage("plot item frequencies"):
+                # Imported here rather than at the top: matplotlib and seaborn take most of a second
+                # to load, which pages without these charts should not pay
+                import matplotlib.pyplot as plt
+
+                fig, ax = plt.subplots(figsize=(10, 6))
+                item_frequencies.head(10).plot(kind='bar', ax=ax)
+                ax.set_title("Top 10 Most Frequent Items")
+                ax.set_xlabel("Item Description")
+                ax.set_ylabel("Frequency")
+                ax.tick_params(axis='x', rotation=45)
+                st.pyplot(fig)
             st.write("The bar graph above shows the top 10 most frequently purchased items in the dataset. These items are likely candidates for promotions or bundling.")
 
             # Visualization of Confidence vs Lift
             st.subheader("Confidence vs Lift for Association Rules")
-            fig, ax = plt.subplots(figsize=(10, 6))
-            sns.scatterplot(x='confidence', y='lift', data=rules, ax=ax)
-            ax.set_title("Confidence vs Lift for Association Rules")
-            ax.set_xlabel("Confidence")
-            ax.set_ylabel("Lift")
-            st.pyplot(fig)
+            with stage("plot rules"):
+                import matplotlib.pyplot as plt
+                import seaborn as sns
+
+                fig, ax = plt.subplots(figsize=(10, 6))
+                sns.scatterplot(x='confidence', y='lift', data=rules, ax=ax)
+                ax.set_title("Confidence vs Lift for Association Rules")
+                ax.set_xlabel("Confidence")
+                ax.set_ylabel("Lift")
+                st.pyplot(fig)
             st.write("The scatter plot above shows the relationship between confidence and lift for the association rules. Rules with higher confidence and lift indicate stronger associations between items.")
 
             # Recommendations based on the analysis
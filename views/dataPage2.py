@@ -1,49 +1,91 @@
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from mlxtend.frequent_patterns import apriori, association_rules
+from utils.charts import cached_rule_scatter
+from utils.backgroundMiner import background_job, release_job
+from utils.compaction import compacted_itemsets, pruned_rules
+from utils.controls import (
+    budget_note, compaction_controls, compaction_note, engine_controls, engine_timing_panel, mining_progress, top_k_controls,
+    worker_controls,
+)
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, get_basket_matrix
+from utils.encoder import describe_memory, encoding_memory, to_one_hot
+from utils.exports import export_buttons
+from utils.instrumentation import stage
+from utils.resultCache import cached_itemsets, cached_rules, cached_top_k, mining_key
+from utils.tables import paged_table
+from utils.topkMiner import RULE_POOL, top_k_rules
 
 # Streamlit app title
 st.title("Apriori Algorithm for Groceries Dataset")
 
 # Sidebar for parameters
 st.sidebar.header("Parameters")
-min_support = st.sidebar.slider("Minimum Support", 0.01, 1.0, 0.1)
+top_k, rank = top_k_controls()
+min_support = st.sidebar.slider("Minimum Support", 0.01, 1.0, 0.1, disabled=top_k is not None)
 min_confidence = st.sidebar.slider("Minimum Confidence", 0.01, 1.0, 0.5)
+engine, closed = engine_controls()
+workers = worker_controls(engine)
+itemset_mode, prune = compaction_controls()
+background = st.sidebar.toggle(
+    "Mine in the background",
+    help="Keep the page usable while mining, with progress, partial results and a cancel button.",
+)
 
 # Load the groceries dataset
-file_path = "assets/csv/Groceries_dataset.csv"  # Ensure this file is in the same directory
+file_path = DATASET_PATH  # Ensure this file is in the same directory
 try:
-    data = pd.read_csv(file_path)
-
-    # Data cleaning
-    data = data.dropna(subset=["Member_number", "itemDescription"])
-    data["itemDescription"] = data["itemDescription"].str.lower().str.strip()
-    data = data.drop_duplicates()
-
     # Group transactions by `Member_number` (unique shopper)
     st.write("### Grouping transactions by `Member_number`")
-    transactions = data.groupby("Member_number")["itemDescription"].apply(list)
+    with stage("load baskets"):
+        basket_matrix, items, baskets = get_basket_matrix(file_path, grouping="member")
     st.write("Transactions have been grouped by `Member_number`, representing individual shoppers.")
 
     # Convert transactions into a one-hot encoded DataFrame
-    item_set = set(data["itemDescription"].unique())  # All unique items
-    one_hot_encoded = pd.DataFrame(
-        [{item: (item in transaction) for item in item_set} for transaction in transactions]
-    )
-    
+    one_hot_encoded = to_one_hot(basket_matrix, items)
+
     st.write("One-hot encoded data preview:")
-    st.dataframe(one_hot_encoded.head())
+    st.dataframe(one_hot_encoded.head().sparse.to_dense())
+    st.caption(describe_memory(encoding_memory(basket_matrix)))
+
+    engine_timing_panel(one_hot_encoded, min_support, workers)
 
-    # Apply Apriori algorithm
+    # Mining results are cached per dataset version, grouping and engine; moving a slider
+    # above an already mined threshold only filters the cached result
+    cache_key = mining_key(dataset_fingerprint(file_path), "member", engine, closed)
+
+    # Apply the selected mining engine (Apriori by default)
     st.subheader("Frequent Itemsets")
-    frequent_itemsets = apriori(one_hot_encoded, min_support=min_support, use_colnames=True)
-    if frequent_itemsets.empty:
+    if top_k is not None or not background:
+        # A job left from background mining is no longer watched (and stops if nobody else watches it)
+        release_job()
+    if top_k is None and background:
+        # Mined off the script thread; None until the job has put its results in the cache
+        job = background_job(cache_key, one_hot_encoded, min_support, min_confidence, engine, closed, workers)
+        if job is not None and job.error is not None:
+            raise job.error
+        if job is None or job.stage == "done":
+            frequent_itemsets = cached_itemsets(cache_key, one_hot_encoded, min_support, engine=engine, closed=closed, workers=workers)
+            budget_note(frequent_itemsets)
+        else:
+            frequent_itemsets = None
+    elif top_k is None:
+        frequent_itemsets = cached_itemsets(cache_key, one_hot_encoded, min_support, engine=engine, closed=closed, workers=workers)
+        budget_note(frequent_itemsets)
+    else:
+        # Top-K mode: the support threshold is whatever the K-th most frequent itemset reaches.
+        # The bitset search is bounded by K, and its itemsets are cached as the bitset engine's.
+        cache_key = mining_key(dataset_fingerprint(file_path), "member", "bitset")
+        frequent_itemsets, min_support = cached_top_k(cache_key, one_hot_encoded, top_k if rank == "itemsets" else top_k * RULE_POOL)
+        st.caption(f"The {len(frequent_itemsets)} most frequent itemsets reach down to a support of {min_support:.4f}.")
+    if frequent_itemsets is None:
+        mining_progress(job)
+    elif frequent_itemsets.empty:
         st.warning("No frequent itemsets found for the given support level. Try lowering the minimum support.")
     else:
         st.write("The table below lists the frequent itemsets discovered from the transactions. Each row shows an itemset, its support, and other relevant details.")
-        st.write(frequent_itemsets)
+        # Closed / maximal itemsets only, when chosen in the sidebar
+        shown_itemsets, report = compacted_itemsets(frequent_itemsets, itemset_mode)
+        compaction_note(report)
+        paged_table(shown_itemsets, key="itemsets", sort_by="support")
 
         # Generate item frequency based on frequent itemsets
         st.subheader("Item Frequency from Frequent Itemsets")
@@ -61,63 +103,49 @@ try:
 
         # Visualization of Item Frequencies (Bar Graph for Item Frequencies)
         st.subheader("Bar Graph of Item Frequencies")
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.barplot(data=item_frequencies.head(20), x='Support', y='Item', ax=ax)
-        ax.set_title("Top 20 Most Frequent Items Based on Frequent Itemsets")
-        ax.set_xlabel("Support")
-        ax.set_ylabel("Item")
-        st.pyplot(fig)
+        with stage("plot item frequencies"):
+            # Imported here rather than at the top: matplotlib and seaborn take most of a second
+            # to load, which pages without these charts should not pay
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+
+            fig, ax = plt.subplots(figsize=(10, 6))
+            sns.barplot(data=item_frequencies.head(20), x='Support', y='Item', ax=ax)
+            ax.set_title("Top 20 Most Frequent Items Based on Frequent Itemsets")
+            ax.set_xlabel("Support")
+            ax.set_ylabel("Item")
+            st.pyplot(fig)
         st.write("This bar graph displays the top 20 most frequently purchased items based on the frequent itemsets. The x-axis shows the item names, while the y-axis represents their support values.")
 
         # Generate association rules
         st.subheader("Association Rules")
         try:
-            # Check if 'num_itemsets' argument is needed
-            if "num_itemsets" in association_rules.__code__.co_varnames:
-                rules = association_rules(
-                    frequent_itemsets, metric="confidence", min_threshold=min_confidence, num_itemsets=len(frequent_itemsets)
-                )
-            else:
-                rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
+            rules = cached_rules(cache_key, frequent_itemsets, one_hot_encoded, min_support, min_confidence)
+            rules, report = pruned_rules(rules, prune)
+            compaction_note(report)
+            if rank == "rules":
+                rules = top_k_rules(rules, top_k)
 
             if rules.empty:
                 st.warning("No association rules found for the given confidence level. Try lowering the minimum confidence.")
             else:
                 st.write("The table below displays the association rules generated based on the given minimum confidence threshold. Each row includes the antecedent, consequent, support, confidence, lift, and other metrics.")
-                st.write(rules)
+                paged_table(rules, key="rules")
 
                 # Visualization of Association Rules (Confidence vs Lift)
                 st.subheader("Metrics for Association Rules")
 
                 # Plot Confidence vs Lift
-                fig, ax = plt.subplots(figsize=(10, 6))
-                sns.scatterplot(x='confidence', y='lift', data=rules, ax=ax)
-
-                # Label each dot with its corresponding row number ("Row #")
-                for i, row in rules.iterrows():
-                    ax.text(
-                        row['confidence'], row['lift'], 
-                        f"Row {i}",  # Add row number (starting from 1)
-                        horizontalalignment='left', 
-                        size='small', 
-                        color='black'
-                    )
-
-                ax.set_title("Confidence vs Lift for Association Rules")
-                ax.set_xlabel("Confidence")
-                ax.set_ylabel("Lift")
-                st.pyplot(fig)
+                with stage("plot rules"):
+                    # WebGL scatter (density heatmap for very many rules) with only the top rules labelled
+                    st.plotly_chart(cached_rule_scatter(rules, title="Confidence vs Lift for Association Rules"))
                 st.write("The scatter plot shows the relationship between confidence and lift for the association rules. Each point represents a rule, and its position reflects its confidence (x-axis) and lift (y-axis). Rules with higher lift are generally more meaningful.")
 
                 # Download link for results
                 st.subheader("Download Results")
-                csv = rules.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="Download Rules as CSV",
-                    data=csv,
-                    file_name="association_rules.csv",
-                    mime="text/csv",
-                )
+                # Files are only built when a button is clicked
+                export_buttons(rules, "association_rules", key="rules_export")
+                export_buttons(shown_itemsets, "frequent_itemsets", key="itemsets_export")
         except Exception as e:
             st.error(f"An error occurred while generating association rules: {e}")
 
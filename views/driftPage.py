@@ -0,0 +1,84 @@
+import plotly.express as px
+import streamlit as st
+from utils.controls import engine_controls
+from utils.dataLoader import DATASET_PATH, get_clean_data
+from utils.instrumentation import stage
+from utils.parallelMiner import DEFAULT_WORKERS
+from utils.resultCache import get_window_cache
+from utils.tables import paged_table
+from utils.windowMining import DRIFT_STATUSES, LIFT_TOLERANCE, compare_rules, drift_summary, mine_windows, time_windows, window_summary
+
+# Streamlit app title
+st.title("Rule Drift Over Time")
+st.write(
+    "Mine each period of the dataset on its own and see which association rules appear, "
+    "disappear or change strength from one period to the next."
+)
+
+# Sidebar for parameters
+st.sidebar.header("Parameters")
+grouping = st.sidebar.radio("Baskets", ["transaction", "member"], format_func=lambda g: f"By {g}")
+months = st.sidebar.selectbox("Window Length (months)", [1, 2, 3, 6, 12], index=0)
+sliding = st.sidebar.toggle("Sliding windows", value=False, disabled=months == 1, help="Overlapping windows that move forward by the step below.")
+step = st.sidebar.slider("Step (months)", 1, months - 1, 1) if sliding and months > 1 else months
+min_support = st.sidebar.slider("Minimum Support", 0.001, 0.2, 0.005, step=0.001, format="%.3f")
+min_confidence = st.sidebar.slider("Minimum Confidence", 0.01, 1.0, 0.05)
+engine, closed = engine_controls()
+workers = st.sidebar.number_input("Worker Processes", min_value=1, max_value=64, value=DEFAULT_WORKERS, help="Windows mined side by side.")
+tolerance = st.sidebar.number_input("Lift Change Threshold", min_value=0.0, value=LIFT_TOLERANCE, step=0.05, format="%.2f")
+
+file_path = DATASET_PATH
+try:
+    with stage("load data"):
+        data = get_clean_data(file_path)
+
+    windows = time_windows(data["Date"], months=months, step=step)
+    if len(windows) < 2:
+        st.warning("The dataset covers fewer than two full windows. Try a shorter window length.")
+    else:
+        # Windows already mined at these settings come from the cache; only new or changed ones are mined
+        results = mine_windows(
+            data, windows, get_window_cache(), grouping=grouping, min_support=min_support,
+            min_confidence=min_confidence, engine=engine, closed=closed, workers=workers,
+        )
+        summary = window_summary(results)
+        st.subheader("Windows")
+        st.dataframe(summary, hide_index=True)
+        mined = int((~summary["cached"]).sum())
+        st.caption(f"{len(results)} windows, {mined} mined on this run and {len(results) - mined} from the cache.")
+
+        # Rule churn between consecutive windows (stacked bar)
+        st.subheader("Rule Changes Between Windows")
+        with stage("plot drift"):
+            drift = drift_summary(results, tolerance)
+            drift_fig = px.bar(
+                drift.melt(id_vars="window", var_name="status", value_name="rules"),
+                x="window", y="rules", color="status", category_orders={"status": DRIFT_STATUSES},
+                title="Rules compared with the previous window",
+            )
+            st.plotly_chart(drift_fig)
+
+        # Side-by-side comparison of two windows
+        st.subheader("Compare Two Windows")
+        labels = [r["window"] for r in results]
+        left, right = st.columns(2)
+        before = left.selectbox("Before", labels, index=len(labels) - 2)
+        after = right.selectbox("After", labels, index=len(labels) - 1)
+        by_label = {r["window"]: r for r in results}
+        comparison = compare_rules(by_label[before]["rules"], by_label[after]["rules"], tolerance)
+
+        counts = comparison["status"].value_counts()
+        for slot, status in zip(st.columns(len(DRIFT_STATUSES)), DRIFT_STATUSES):
+            slot.metric(status.title(), int(counts.get(status, 0)))
+
+        shown = st.multiselect("Show", DRIFT_STATUSES, default=["appeared", "disappeared", "changed"])
+        comparison = comparison[comparison["status"].isin(shown)].reset_index(drop=True)
+        if comparison.empty:
+            st.info("No rules with the selected status between these windows.")
+        else:
+            paged_table(comparison, key="drift", sort_by="drift")
+
+except FileNotFoundError:
+    st.error(f"The file '{file_path}' was not found. Please ensure it is in the correct folder.")
+except Exception as e:
+    st.error(f"An error occurred: {e}")
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from utils.dataLoader import DATASET_PATH
 
 # Streamlit app title
 st.title("🛒 Groceries Dataset Analysis")
@@ -19,10 +20,11 @@ Below is a sample of the dataset:
 """)
 
 # Load and display dataset
-file_path = "assets/csv/Groceries_dataset.csv"  # Ensure this file is in the correct location
+file_path = DATASET_PATH  # Ensure this file is in the correct location
 try:
-    data = pd.read_csv(file_path)
-    data_sample = data.head(10)  # Display the first 10 rows of the dataset
+    # The first 10 rows as they are in the CSV (the other pages use the cleaned data),
+    # read on their own rather than loading the whole file
+    data_sample = pd.read_csv(file_path, nrows=10)
     st.dataframe(data_sample)
 
     st.write("""
@@ -0,0 +1,66 @@
+import streamlit as st
+from utils.dataLoader import DATASET_PATH
+from utils.exports import export_buttons
+from utils.instrumentation import stage
+from utils.pairMatrix import HEATMAP_ITEMS, PAIR_METRICS, get_pair_matrix
+from utils.tables import paged_table
+
+# Streamlit app title
+st.title("Item Pairs")
+st.write(
+    "Every pair of items bought together, scored straight from the item co-occurrence counts. "
+    "No mining runs when the sliders move, so any support level answers instantly."
+)
+
+# Sidebar for parameters
+st.sidebar.header("Parameters")
+grouping = st.sidebar.radio("Baskets", ["member", "transaction"], format_func=lambda g: f"By {g}")
+min_support = st.sidebar.slider("Minimum Support", 0.0, 0.1, 0.005, step=0.001, format="%.3f")
+min_confidence = st.sidebar.slider("Minimum Confidence", 0.0, 1.0, 0.0, step=0.01)
+metric = st.sidebar.selectbox("Metric", PAIR_METRICS)
+
+file_path = DATASET_PATH
+try:
+    # Co-occurrence counts and pair metrics, computed once per dataset version and grouping
+    pairs = get_pair_matrix(file_path, grouping=grouping)
+    st.caption(f"{len(pairs):,} item pairs (in both directions) over {pairs.n_rows:,} baskets and {len(pairs.items):,} items.")
+
+    # Heatmap of the chosen metric between the most frequent (or the picked) items
+    st.subheader("Co-occurrence Heatmap")
+    st.write(f"Each cell scores the rule row item -> column item by {metric}. Pairs below the minimum support are left blank.")
+    n_items = st.slider("Most frequent items", 5, min(100, len(pairs.items)), min(HEATMAP_ITEMS, len(pairs.items)))
+    picked = st.multiselect("Or pick the items", pairs.items, placeholder="The most frequent items")
+    with stage("plot heatmap"):
+        # Imported here rather than at the top, like the other pages' chart libraries
+        import plotly.express as px
+
+        grid = pairs.heatmap(picked or pairs.top_items(n_items), metric=metric, min_support=min_support)
+        fig = px.imshow(grid, color_continuous_scale="Viridis", aspect="auto", labels={"color": metric})
+        fig.update_layout(height=max(400, 18 * len(grid) + 150))
+        st.plotly_chart(fig)
+
+    # Best partners of one item
+    st.subheader("Top Partners")
+    left, right = st.columns([3, 1])
+    item = left.selectbox("Item", pairs.top_items(len(pairs.items)))
+    k = right.number_input("Partners", min_value=1, max_value=50, value=10)
+    partners = pairs.partners(item, metric=metric, k=int(k), min_support=min_support)
+    if partners.empty:
+        st.info("No partner reaches the minimum support. Try lowering it.")
+    else:
+        partners = partners.assign(partner=[next(iter(c)) for c in partners["consequents"]])
+        st.dataframe(partners[["partner", "support", "confidence", "lift", "leverage", "conviction"]], hide_index=True)
+
+    # Every pair rule at the thresholds
+    st.subheader("All Pair Rules")
+    rules = pairs.pairs(min_support, min_confidence)
+    if rules.empty:
+        st.warning("No pairs found for these thresholds. Try lowering the minimum support or confidence.")
+    else:
+        paged_table(rules, key="pairs", sort_by=metric)
+        export_buttons(rules, "pair_rules", key="pairs_export")
+
+except FileNotFoundError:
+    st.error(f"The file '{file_path}' was not found. Please ensure it is in the correct folder.")
+except Exception as e:
+    st.error(f"An error occurred: {e}")
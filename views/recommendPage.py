@@ -0,0 +1,64 @@
+import time
+
+import pandas as pd
+import streamlit as st
+from utils.controls import engine_controls, worker_controls
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, get_basket_matrix
+from utils.encoder import to_one_hot
+from utils.instrumentation import stage
+from utils.resultCache import cached_itemsets, cached_rules, get_rule_index, mining_key
+from utils.ruleIndex import METRICS
+
+# Streamlit app title
+st.title("Basket Recommendations")
+st.write(
+    "Pick the items in a cart and get the products most likely to be bought with them, "
+    "ranked by the strongest association rule that predicts each one."
+)
+
+# Sidebar for parameters
+st.sidebar.header("Parameters")
+grouping = st.sidebar.radio("Baskets", ["member", "transaction"], format_func=lambda g: f"By {g}")
+min_support = st.sidebar.slider("Minimum Support", 0.001, 0.2, 0.01, step=0.001, format="%.3f")
+min_confidence = st.sidebar.slider("Minimum Confidence", 0.01, 1.0, 0.1)
+engine, closed = engine_controls()
+workers = worker_controls(engine)
+metric = st.sidebar.selectbox("Rank By", METRICS)
+top_k = st.sidebar.slider("Suggestions", 1, 20, 5)
+
+file_path = DATASET_PATH
+try:
+    basket_matrix, items, baskets = get_basket_matrix(file_path, grouping=grouping)
+    one_hot_encoded = to_one_hot(basket_matrix, items)
+
+    cache_key = mining_key(dataset_fingerprint(file_path), grouping, engine, closed)
+    frequent_itemsets = cached_itemsets(cache_key, one_hot_encoded, min_support, engine=engine, closed=closed, workers=workers)
+    rules = None if frequent_itemsets.empty else cached_rules(cache_key, frequent_itemsets, one_hot_encoded, min_support, min_confidence)
+    if rules is None:
+        st.warning("No frequent itemsets found for the given support level. Try lowering the minimum support.")
+    elif rules.empty:
+        st.warning("No association rules found for these thresholds. Try lowering the minimum support or confidence.")
+    else:
+        with stage("rule index"):
+            index = get_rule_index(cache_key, min_support, min_confidence, metric, rules)
+        st.caption(f"{len(rules):,} rules indexed over {len(index.items):,} items.")
+
+        cart = st.multiselect("Cart", index.items, placeholder="Choose the items in the cart")
+        if cart:
+            start = time.perf_counter()
+            suggestions = index.explain(cart, k=top_k)
+            elapsed = time.perf_counter() - start
+
+            if not suggestions:
+                st.info("No rule fires for this cart. Try other items or lower thresholds.")
+            else:
+                suggestions = pd.DataFrame(suggestions)
+                # The rule behind each suggestion
+                suggestions["because of"] = [", ".join(sorted(antecedent)) for antecedent in suggestions["antecedent"]]
+                st.dataframe(suggestions[["item", "because of", "confidence", "lift"]], hide_index=True)
+            st.caption(f"Lookup took {elapsed * 1e6:,.0f} µs.")
+
+except FileNotFoundError:
+    st.error(f"The file '{file_path}' was not found. Please ensure it is in the correct folder.")
+except Exception as e:
+    st.error(f"An error occurred: {e}")
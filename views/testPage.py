@@ -1,7 +1,14 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from mlxtend.frequent_patterns import apriori, association_rules
+from utils.compaction import compacted_itemsets, pruned_rules
+from utils.controls import compaction_controls, compaction_note, engine_controls, engine_timing_panel, worker_controls
+from utils.dataLoader import DATASET_PATH, dataset_fingerprint, get_basket_matrix, get_clean_data
+from utils.encoder import to_one_hot
+from utils.exports import export_buttons
+from utils.instrumentation import stage
+from utils.resultCache import cached_itemsets, cached_rules, mining_key
+from utils.salesCube import LEVELS, get_sales_cube
+from utils.tables import paged_table
 
 # Streamlit app title
 st.title("Interactive Apriori Algorithm for Groceries Dataset")
@@ -10,124 +17,147 @@ st.title("Interactive Apriori Algorithm for Groceries Dataset")
 st.sidebar.header("Parameters")
 min_support = st.sidebar.slider("Minimum Support", 0.01, 1.0, 0.1)
 min_confidence = st.sidebar.slider("Minimum Confidence", 0.01, 1.0, 0.5)
+engine, closed = engine_controls()
+workers = worker_controls(engine)
+itemset_mode, prune = compaction_controls()
 min_lift = st.sidebar.slider("Minimum Lift", 1.0, 10.0, 1.0)  # Additional filter for Lift
 top_n = st.sidebar.slider("Top N Associations", 1, 20, 10)  # Filter to display top N associations
 
 # Load the groceries dataset
-file_path = "assets/csv/Groceries_dataset.csv"
+file_path = DATASET_PATH
 try:
-    data = pd.read_csv(file_path)
-
     # # Display the raw dataset
     # st.subheader("Raw Dataset")
     # st.dataframe(data.head())
 
-    # Data cleaning
-    data = data.dropna(subset=["Member_number", "itemDescription"])
-    data["itemDescription"] = data["itemDescription"].str.lower().str.strip()
-    data = data.drop_duplicates()
+    # Cleaned dataset from the shared cached loader
+    with stage("load data"):
+        data = get_clean_data(file_path)
 
     # Display cleaned dataset
     st.subheader("Cleaned Dataset")
     st.dataframe(data.head())
 
-    # Preprocess the dataset
-    transactions = data.groupby("Member_number")["itemDescription"].apply(list)
+    # Member baskets from the shared integer-coded transaction store
+    basket_matrix, items, baskets = get_basket_matrix(file_path, grouping="member")
 
     # Convert transactions into a one-hot encoded DataFrame
-    item_set = set(data["itemDescription"].unique())
-    one_hot_encoded = pd.DataFrame(
-        [{item: (item in transaction) for item in item_set} for transaction in transactions]
-    )
-
-    # Convert date columns to proper format if necessary (e.g., to datetime)
-    data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
-
-    # Group by Month to get monthly sales
-    data['Month'] = data['Date'].dt.to_period('M').astype(str)
+    one_hot_encoded = to_one_hot(basket_matrix, items)
 
     # --- Begin Graph Section ---
     st.subheader("Sales Analysis")
 
-    # Items sold per month (bar chart)
-    items_per_month = data.groupby('Month')['itemDescription'].count().reset_index()
-    items_per_month_fig = px.bar(items_per_month, x='Month', y='itemDescription', title="Items Sold Per Month")
-    st.plotly_chart(items_per_month_fig)
+    # Sales charts read from the pre-aggregated cube (built once per dataset version)
+    # instead of grouping the rows again on every rerun
+    cube = get_sales_cube(file_path)
+    if cube.first_date is None:
+        st.warning("The dataset has no dated sales to chart.")
+    else:
+        date_range = st.date_input(
+            "Sales between",
+            value=(cube.first_date.date(), cube.last_date.date()),
+            min_value=cube.first_date.date(),
+            max_value=cube.last_date.date(),
+        )
+        # The picker holds a single date while the second one is being chosen
+        start, end = (list(date_range) + [None, None])[:2]
+
+        with stage("plot sales"):
+            # Items sold per month (bar chart)
+            items_per_month = cube.totals("month", start, end)
+            items_per_month["Month"] = items_per_month["date"].dt.strftime("%Y-%m")
+            items_per_month_fig = px.bar(items_per_month, x='Month', y='sold', title="Items Sold Per Month")
+            st.plotly_chart(items_per_month_fig)
+
+            # Items sold per customer (histogram)
+            items_per_customer_fig = px.histogram(x=cube.items_per_customer(start, end), title="Items Sold Per Customer")
+            st.plotly_chart(items_per_customer_fig)
+
+            daily = cube.totals("day", start, end)
+
+            # Customer sales per day (line chart)
+            customer_sales_day_fig = px.line(daily, x='date', y='customers', title="Customer Sales Per Day")
+            st.plotly_chart(customer_sales_day_fig)
+
+            # Total sales per day (line chart)
+            total_sales_day_fig = px.line(daily, x='date', y='sold', title="Total Sales Per Day")
+            st.plotly_chart(total_sales_day_fig)
+
+        # Drill down into a single item
+        left, right = st.columns([3, 1])
+        item = left.selectbox("Item sales over time", cube.items, index=None, placeholder="Choose an item")
+        level = right.radio("Per", list(LEVELS), index=1, horizontal=True)
+        if item is not None:
+            with stage("plot item sales"):
+                item_sales = cube.item_series(item, level, start, end)
+                item_sales_fig = px.line(item_sales, x='date', y='sold', markers=True, title=f"Sales of {item} per {level}")
+                st.plotly_chart(item_sales_fig)
 
-    # Items sold per customer (histogram)
-    items_per_customer = data.groupby('Member_number')['itemDescription'].count().reset_index()
-    items_per_customer_fig = px.histogram(items_per_customer, x='itemDescription', title="Items Sold Per Customer")
-    st.plotly_chart(items_per_customer_fig)
+    # --- End Graph Section ---
 
-    # Customer sales per day (line chart)
-    customer_sales_day = data.groupby('Date')['Member_number'].nunique().reset_index()
-    customer_sales_day_fig = px.line(customer_sales_day, x='Date', y='Member_number', title="Customer Sales Per Day")
-    st.plotly_chart(customer_sales_day_fig)
+    engine_timing_panel(one_hot_encoded, min_support, workers)
 
-    # Total sales per day (line chart)
-    total_sales_day = data.groupby('Date')['itemDescription'].count().reset_index()
-    total_sales_day_fig = px.line(total_sales_day, x='Date', y='itemDescription', title="Total Sales Per Day")
-    st.plotly_chart(total_sales_day_fig)
+    # Mining results are cached per dataset version, grouping and engine; moving a slider
+    # above an already mined threshold only filters the cached result
+    cache_key = mining_key(dataset_fingerprint(file_path), "member", engine, closed)
 
-    # --- End Graph Section ---
-
-    # Apply Apriori algorithm
+    # Apply the selected mining engine (Apriori by default)
     st.subheader("Frequent Itemsets")
-    frequent_itemsets = apriori(one_hot_encoded, min_support=min_support, use_colnames=True)
+    frequent_itemsets = cached_itemsets(cache_key, one_hot_encoded, min_support, engine=engine, closed=closed, workers=workers)
     if frequent_itemsets.empty:
         st.warning("No frequent itemsets found for the given support level. Try lowering the minimum support.")
     else:
-        st.write(frequent_itemsets)
-
-        # Calculate the number of frequent itemsets
-        num_itemsets = len(frequent_itemsets)
+        # Closed / maximal itemsets only, when chosen in the sidebar
+        shown_itemsets, report = compacted_itemsets(frequent_itemsets, itemset_mode)
+        compaction_note(report)
+        paged_table(shown_itemsets, key="itemsets", sort_by="support")
 
-        # Generate association rules with num_itemsets
+        # Generate association rules
         st.subheader("Association Rules")
-        rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence, num_itemsets=num_itemsets)
+        rules = cached_rules(cache_key, frequent_itemsets, one_hot_encoded, min_support, min_confidence)
+        rules, report = pruned_rules(rules, prune)
+        compaction_note(report)
         if rules.empty:
             st.warning("No association rules found for the given confidence level. Try lowering the minimum confidence.")
         else:
-            # Convert frozenset to strings
-            rules["antecedents"] = rules["antecedents"].apply(lambda x: ", ".join(list(x)))
-            rules["consequents"] = rules["consequents"].apply(lambda x: ", ".join(list(x)))
-
             # Display rules with selected columns (antecedent, consequent, support, confidence, lift)
             rules_selected = rules[['antecedents', 'consequents', 'support', 'confidence', 'lift']]
-            st.write(rules_selected)
+            paged_table(rules_selected, key="rules")
 
             # Interactive filtering for Lift
             st.subheader("Filter Rules")
             min_lift = st.slider("Minimum Lift", min_value=float(rules["lift"].min()), max_value=float(rules["lift"].max()), value=float(rules["lift"].min()))
             filtered_rules = rules_selected[rules_selected["lift"] >= min_lift]
-            st.write(filtered_rules)
+            paged_table(filtered_rules, key="filtered_rules")
 
 
             # --- Bar Chart for Top N Associations ---
-            top_associations = filtered_rules.sort_values(by="lift", ascending=False).head(top_n)
-            bar_chart_fig = px.bar(top_associations, x='antecedents', y='lift', color='lift', title=f"Top {top_n} Associations by Lift")
-            st.plotly_chart(bar_chart_fig)
+            with stage("plot top associations"):
+                top_associations = filtered_rules.sort_values(by="lift", ascending=False).head(top_n)
+                # Convert frozenset to strings (only for the rows being plotted)
+                top_associations = top_associations.assign(antecedents=top_associations["antecedents"].apply(lambda x: ", ".join(sorted(x))))
+                bar_chart_fig = px.bar(top_associations, x='antecedents', y='lift', color='lift', title=f"Top {top_n} Associations by Lift")
+                st.plotly_chart(bar_chart_fig)
 
             # Download link for filtered rules
             st.subheader("Download Filtered Rules")
-            csv = filtered_rules.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download Filtered Rules as CSV",
-                data=csv,
-                file_name="filtered_association_rules.csv",
-                mime="text/csv",
-            )
+            export_buttons(filtered_rules, "filtered_association_rules", key="rules_export")
 
     # --- Scatter Plot for Commonly Bought Together Items ---
     st.subheader("Commonly Bought Together Items")
 
     # Create a scatter plot of common items from the association rules
     if not rules_selected.empty:
-        common_items = rules_selected[['antecedents', 'consequents', 'support', 'confidence', 'lift']].head(20)
-        fig = px.scatter(common_items, x='support', y='confidence', color='lift', size='lift',
-                         hover_data=['antecedents', 'consequents'],
-                         title="Commonly Bought Together Items")
-        st.plotly_chart(fig)
+        with stage("plot rules"):
+            common_items = rules_selected[['antecedents', 'consequents', 'support', 'confidence', 'lift']].head(20)
+            common_items = common_items.assign(
+                antecedents=common_items["antecedents"].apply(lambda x: ", ".join(sorted(x))),
+                consequents=common_items["consequents"].apply(lambda x: ", ".join(sorted(x))),
+            )
+            fig = px.scatter(common_items, x='support', y='confidence', color='lift', size='lift',
+                             hover_data=['antecedents', 'consequents'],
+                             title="Commonly Bought Together Items")
+            st.plotly_chart(fig)
 
 except FileNotFoundError:
     st.error(f"The file '{file_path}' was not found. Please ensure it is in the correct folder.")